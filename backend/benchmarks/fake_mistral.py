@@ -0,0 +1,158 @@
+"""
+Stand-in for the Mistral chat completion API, for load tests and offline runs.
+
+Answers /v1/chat/completions (plain and streamed) after a configurable delay
+and fails a configurable share of requests, so the app can be exercised
+without network access or API quota. Point the app at it with
+MISTRAL_SERVER_URL=http://127.0.0.1:<port>.
+
+Usage (from the backend directory):
+    python -m benchmarks.fake_mistral --port 8090 --latency-ms 800 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class LatencyProfile:
+    """
+    How the fake server behaves.
+
+    latency_ms / jitter_ms: time to the full response (or first streamed token), drawn
+    uniformly from latency_ms ± jitter_ms. token_delay_ms: gap between streamed pieces.
+    error_rate: share of requests answered with an error; rate_limit_share of those
+    are 429s, the rest 500s.
+    """
+    latency_ms: float = 500
+    jitter_ms: float = 100
+    token_delay_ms: float = 5
+    error_rate: float = 0.0
+    rate_limit_share: float = 0.5
+    summary_words: int = 120
+
+
+WORDS = ("the module parses input validates records and writes results to storage while the service "
+         "handles retries caching and error reporting for each request it receives").split()
+
+
+def summary_text(words: int, rng: random.Random) -> str:
+    """Builds filler summary text of roughly the given number of words."""
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def reply_content(body: dict, profile: LatencyProfile, rng: random.Random) -> str:
+    """Builds the assistant message: a Title/Summary JSON object when one is requested, plain text otherwise."""
+    text = summary_text(profile.summary_words, rng)
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"Title": summary_text(4, rng).title(), "Summary": text})
+    return text
+
+
+def usage(body: dict, content: str) -> dict:
+    """Estimates token usage the way the app does, four characters per token."""
+    prompt_tokens = max(1, sum(len(message.get("content") or "") for message in body.get("messages", [])) // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def create_app(profile: LatencyProfile, seed: int = None) -> FastAPI:
+    """
+    Creates the fake API.
+
+    Args:
+        profile (LatencyProfile): Latency and error behaviour
+        seed (int, optional): Random seed, for repeatable runs
+
+    Returns:
+        FastAPI: ASGI app serving /v1/chat/completions
+    """
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.stats = {"requests": 0, "errors": 0}
+
+    async def delay():
+        latency = max(0.0, profile.latency_ms + rng.uniform(-profile.jitter_ms, profile.jitter_ms))
+        await asyncio.sleep(latency / 1000)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.stats["requests"] += 1
+        if rng.random() < profile.error_rate:
+            app.state.stats["errors"] += 1
+            await delay()
+            if rng.random() < profile.rate_limit_share:
+                return JSONResponse({"object": "error", "message": "Requests rate limit exceeded"}, status_code=429)
+            return JSONResponse({"object": "error", "message": "Internal server error"}, status_code=500)
+
+        completion_id = uuid.uuid4().hex
+        created = int(time.time())
+        model = body.get("model", "fake-model")
+        content = reply_content(body, profile, rng)
+
+        if not body.get("stream"):
+            await delay()
+            return {
+                "id": completion_id, "object": "chat.completion", "model": model, "created": created,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage(body, content),
+            }
+
+        async def events():
+            await delay()
+            pieces = [content[start:start + 16] for start in range(0, len(content), 16)]
+            for index, piece in enumerate(pieces):
+                last = index == len(pieces) - 1
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "model": model, "created": created,
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece},
+                                 "finish_reason": "stop" if last else None}],
+                }
+                if last:
+                    chunk["usage"] = usage(body, content)
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(profile.token_delay_ms / 1000)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """Adds the latency profile options to a command line parser."""
+    parser.add_argument("--latency-ms", type=float, default=500, help="Mean time to a completion")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="Uniform spread around the mean")
+    parser.add_argument("--token-delay-ms", type=float, default=5, help="Gap between streamed pieces")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--rate-limit-share", type=float, default=0.5, help="Share of failures answered with 429")
+
+
+def profile_from_arguments(args) -> LatencyProfile:
+    """Builds a LatencyProfile from parsed command line options."""
+    return LatencyProfile(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        token_delay_ms=args.token_delay_ms,
+        error_rate=args.error_rate,
+        rate_limit_share=args.rate_limit_share,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--seed", type=int, help="Random seed")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(profile_from_arguments(args), args.seed), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,409 @@
+"""
+End-to-end load test of the API against local stand-ins for Mistral and MongoDB.
+
+Starts the fake Mistral server (benchmarks/fake_mistral.py) in this process and
+the app in a child process, pointed at either an in-memory mongomock database
+or a scratch database on a local mongod. Registers a set of users, seeds
+summaries and files, then drives a weighted mix of create, upload, list, share
+and download requests at each concurrency level in turn and reports
+throughput, p50/p95/p99 latency, errors and the peak RSS of the app process
+per endpoint.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --concurrency 1,8,32 --duration 30
+    python -m benchmarks.load_test --mongo-url mongodb://localhost:27017 --output load.json
+
+The in-memory mode needs mongomock-motor (pip install mongomock-motor). It has
+no query planner or real I/O, so use it to find regressions in the app itself
+and a local mongod for numbers close to production. The scratch database is
+dropped afterwards unless --keep is given.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import uuid
+import httpx
+import uvicorn
+from benchmarks.fake_mistral import create_app as create_fake_mistral, add_profile_arguments, profile_from_arguments
+from benchmarks.stats import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = ("create", "upload", "list", "share", "download")
+DEFAULT_MIX = "create=20,upload=10,list=35,share=10,download=25"
+PASSWORD = "load-test-password"
+# Patches applied to the app process in the in-memory mode, kept for its lifetime
+mongomock_patches = contextlib.ExitStack()
+
+TEXT_WORDS = ("the parser reads each record validates its fields and forwards valid rows to the writer "
+              "which batches them into storage while failures are logged with their line numbers").split()
+
+
+def free_port() -> int:
+    """Asks the OS for a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def document_text(words: int, rng: random.Random) -> str:
+    """Builds unique filler text, so the summary cache does not answer the requests."""
+    return f"{uuid.uuid4().hex} " + " ".join(rng.choice(TEXT_WORDS) for _ in range(words))
+
+
+def current_rss(pid: int):
+    """
+    Reads the resident set size of a process from /proc.
+
+    Returns:
+        int: RSS in bytes, or None where /proc is unavailable
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def use_mongomock():
+    """
+    Points the app's Motor collections, database, client and GridFS bucket at
+    an in-memory mongomock database. Runs in the app process, inside its event
+    loop, after the app has been imported.
+    """
+    from mongomock_motor import AsyncMongoMockClient, enabled_gridfs_integration
+    from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection, AsyncIOMotorGridFSBucket
+    import config.database
+
+    mongomock_patches.enter_context(enabled_gridfs_integration())
+    mock_client = AsyncMongoMockClient()
+    mock_db = mock_client[config.database.db.name]
+    mock_bucket = AsyncIOMotorGridFSBucket(mock_db)
+
+    def swap(value):
+        if isinstance(value, AsyncIOMotorCollection):
+            return mock_db[value.name]
+        if isinstance(value, AsyncIOMotorDatabase):
+            return mock_db
+        if isinstance(value, AsyncIOMotorGridFSBucket):
+            return mock_bucket
+        if isinstance(value, AsyncIOMotorClient):
+            return mock_client
+        if isinstance(value, list):
+            return [tuple(swap(item) for item in entry) if isinstance(entry, tuple) else entry for entry in value]
+        return value
+
+    modules = [module for module in list(sys.modules.values())
+               if (getattr(module, "__file__", None) or "").startswith(BACKEND_DIR)]
+    for module in modules:
+        for name, value in list(vars(module).items()):
+            swapped = swap(value)
+            if swapped is not value:
+                setattr(module, name, swapped)
+            # Objects holding a collection of their own, e.g. the job queue and the Mongo rate limiter
+            collection = getattr(value, "collection", None)
+            if isinstance(collection, AsyncIOMotorCollection):
+                value.collection = swap(collection)
+
+
+def serve_app(port: int, env: dict, in_memory: bool):
+    """
+    Runs the app with uvicorn. Target of the app process; the environment is
+    applied before the app is imported so its configuration picks it up.
+    """
+    os.environ.update(env)
+    sys.path.insert(0, BACKEND_DIR)
+    from main import app
+
+    # One log line per Mistral request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    async def serve():
+        if in_memory:
+            use_mongomock()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        await server.serve()
+
+    asyncio.run(serve())
+
+
+def start_fake_mistral(args) -> tuple:
+    """
+    Serves the fake Mistral API from a background thread.
+
+    Returns:
+        tuple: (uvicorn.Server, base URL)
+    """
+    port = free_port()
+    app = create_fake_mistral(profile_from_arguments(args), args.seed)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_ready(client: httpx.AsyncClient, process, timeout: float = 60):
+    """Polls the app until it answers, failing early if its process exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise RuntimeError(f"The app process exited with code {process.exitcode}")
+        try:
+            if (await client.get("/metrics")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"The app did not start within {timeout} seconds")
+
+
+class LoadTest:
+    """
+    Registered users, seeded data and the requests making up the traffic mix.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.users = []      # {"id", "email", "headers"}
+        self.summaries = {}  # user ID -> IDs of summaries they own
+        self.files = []      # IDs of uploaded files
+        # mongomock cannot run the $substrCP preview projection of paged listings, so list in full there
+        self.list_params = {"limit": 20} if args.mongo_url else {}
+
+    async def register_users(self):
+        run_id = uuid.uuid4().hex[:8]
+        for index in range(self.args.users):
+            email = f"load-{run_id}-{index}@example.com"
+            user = {"firstName": "Load", "lastName": f"User{index}", "email": email,
+                    "password": PASSWORD, "confirmPassword": PASSWORD}
+            (await self.client.post("/user/create", json=user)).raise_for_status()
+            response = await self.client.post("/user/verify", json={"email": email, "password": PASSWORD})
+            response.raise_for_status()
+            result = response.json()["result"]
+            self.users.append({
+                "id": result["user"]["id"], "email": email,
+                "headers": {"Authorization": f"Bearer {result['auth_token']}"},
+            })
+            self.summaries[result["user"]["id"]] = []
+
+    async def seed(self):
+        """Gives every user summaries to list and share and files to download."""
+        for user in self.users:
+            for _ in range(self.args.seed_summaries):
+                status = await self.create(user)
+                if status >= 400:
+                    raise RuntimeError(f"Seeding a summary failed with HTTP {status}")
+            status = await self.upload(user)
+            if status >= 400:
+                raise RuntimeError(f"Seeding a file failed with HTTP {status}")
+
+    async def create(self, user) -> int:
+        body = {"userId": user["id"], "type": "documentation", "uploadType": "text",
+                "initialData": document_text(self.args.text_words, self.rng)}
+        response = await self.client.post("/summary/create", json=body, headers=user["headers"])
+        if response.status_code == 201:
+            self.summaries[user["id"]].append(response.json()["result"]["summary_id"])
+        return response.status_code
+
+    async def upload(self, user) -> int:
+        content = document_text(self.args.file_kb * 1024 // 8, self.rng).encode()[:self.args.file_kb * 1024]
+        response = await self.client.post(
+            "/summary/upload",
+            data={"userId": user["id"], "type": "documentation", "uploadType": "file"},
+            files={"file": ("load-test.txt", content, "text/plain")},
+            headers=user["headers"],
+        )
+        if response.status_code == 202:
+            self.files.append(response.json()["result"]["file_id"])
+        return response.status_code
+
+    async def list(self, user) -> int:
+        response = await self.client.get(f"/summaries/{user['id']}", params=self.list_params, headers=user["headers"])
+        return response.status_code
+
+    async def share(self, user) -> int:
+        owned = self.summaries[user["id"]]
+        recipient = self.rng.choice([other for other in self.users if other is not user] or [user])
+        body = {"summary_id": self.rng.choice(owned), "recipient": recipient["email"]}
+        response = await self.client.post("/summary/share", json=body, headers=user["headers"])
+        return response.status_code
+
+    async def download(self, user) -> int:
+        response = await self.client.get(f"/download/{self.rng.choice(self.files)}", headers=user["headers"])
+        return response.status_code
+
+    async def run_level(self, concurrency: int, mix: dict, pid: int) -> dict:
+        """
+        Runs the traffic mix with a fixed number of concurrent clients for the configured duration.
+
+        Returns:
+            dict: Stats of each endpoint at this concurrency level
+        """
+        names, weights = list(mix), list(mix.values())
+        latencies = {name: [] for name in names}
+        statuses = {name: {} for name in names}
+        in_flight = {name: 0 for name in names}
+        peak_rss = {name: None for name in names}
+        deadline = time.monotonic() + self.args.duration
+
+        async def worker():
+            while time.monotonic() < deadline:
+                name = self.rng.choices(names, weights)[0]
+                user = self.rng.choice(self.users)
+                in_flight[name] += 1
+                started = time.perf_counter()
+                try:
+                    status = await getattr(self, name)(user)
+                except httpx.HTTPError:
+                    status = 599
+                finally:
+                    in_flight[name] -= 1
+                latencies[name].append((time.perf_counter() - started) * 1000)
+                statuses[name][status] = statuses[name].get(status, 0) + 1
+
+        async def sample_rss():
+            # Attribute the app's memory to every endpoint with a request in flight at the time
+            while True:
+                rss = current_rss(pid)
+                if rss is not None:
+                    for name in names:
+                        if in_flight[name] and (peak_rss[name] is None or rss > peak_rss[name]):
+                            peak_rss[name] = rss
+                await asyncio.sleep(0.05)
+
+        sampler = asyncio.create_task(sample_rss())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+        await asyncio.gather(sampler, return_exceptions=True)
+
+        results = {}
+        for name in names:
+            samples = latencies[name]
+            results[name] = {
+                "requests": len(samples),
+                "errors": sum(count for status, count in statuses[name].items() if status >= 400),
+                "statuses": {str(status): count for status, count in sorted(statuses[name].items())},
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(samples, 0.50), 2) if samples else None,
+                "p95_ms": round(percentile(samples, 0.95), 2) if samples else None,
+                "p99_ms": round(percentile(samples, 0.99), 2) if samples else None,
+                "peak_rss_mb": round(peak_rss[name] / 2**20, 1) if peak_rss[name] else None,
+            }
+        return results
+
+
+def parse_mix(text: str) -> dict:
+    """Parses 'create=20,list=35,...' into endpoint weights."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name.strip()}', expected one of {', '.join(ENDPOINTS)}")
+        mix[name.strip()] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def print_level(concurrency: int, results: dict):
+    print(f"\nconcurrency {concurrency}")
+    print(f"  {'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak RSS MB':>13}")
+    for name, stats in results.items():
+        cells = [stats[key] if stats[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")]
+        print(f"  {name:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>9}"
+              f"{cells[0]:>10}{cells[1]:>10}{cells[2]:>10}{cells[3]:>13}")
+
+
+async def drive(args, base_url: str, process) -> dict:
+    levels = {}
+    mix = parse_mix(args.mix)
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        await wait_until_ready(client, process)
+        load_test = LoadTest(client, args)
+        await load_test.register_users()
+        await load_test.seed()
+        print(f"Registered {len(load_test.users)} users, seeded {args.seed_summaries} summaries and 1 file each")
+        for concurrency in args.concurrency:
+            results = await load_test.run_level(concurrency, mix, process.pid)
+            print_level(concurrency, results)
+            levels[str(concurrency)] = results
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", help="Local mongod to test against; in-memory mongomock when omitted")
+    parser.add_argument("--database", default=f"briefly_load_{uuid.uuid4().hex[:8]}", help="Scratch database name")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch database afterwards")
+    parser.add_argument("--concurrency", type=lambda text: [int(level) for level in text.split(",")], default=[1, 8, 32],
+                        help="Comma-separated concurrency levels, run in turn")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run each concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--users", type=int, default=20, help="Users to register")
+    parser.add_argument("--seed-summaries", type=int, default=3, help="Summaries created per user before the run")
+    parser.add_argument("--text-words", type=int, default=300, help="Words of text per created summary")
+    parser.add_argument("--file-kb", type=int, default=64, help="Size of uploaded files")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, help="Random seed")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    fake_mistral, mistral_url = start_fake_mistral(args)
+    port = free_port()
+    env = {
+        "DATABASE_URL": args.mongo_url or "mongodb://127.0.0.1:27017",
+        "DATABASE_NAME": args.database,
+        "SECRET_KEY": os.getenv("SECRET_KEY", "load-test-secret"),
+        "MISTRAL_API_KEY": "load-test",
+        "MISTRAL_SERVER_URL": mistral_url,
+        # Quota is the fake server's concern; keep the app's own limiter out of the measurements
+        "MISTRAL_RPM": "1000000",
+        "MISTRAL_TPM": "1000000000",
+        "MISTRAL_RATE_LIMIT_BACKEND": "local",
+    }
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve_app, args=(port, env, args.mongo_url is None), daemon=True
+    )
+    process.start()
+    try:
+        levels = asyncio.run(drive(args, f"http://127.0.0.1:{port}", process))
+    finally:
+        process.terminate()
+        process.join(10)
+        fake_mistral.should_exit = True
+        if args.mongo_url and not args.keep:
+            from pymongo import MongoClient
+            with MongoClient(args.mongo_url) as mongo:
+                mongo.drop_database(args.database)
+
+    if args.output:
+        report = {
+            "backend": "mongod" if args.mongo_url else "mongomock",
+            "duration_seconds": args.duration,
+            "mix": parse_mix(args.mix),
+            "llm_profile": vars(profile_from_arguments(args)),
+            "levels": levels,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""
+Microbenchmarks of the text extraction, chat response parsing and serialisation hot paths.
+
+Times extract_text_from_file (plain text and DOCX), PDF extraction (the work
+one extraction worker does for a document, run in this process),
+parse_chat_response / handle_json_decode_error and the schema serialisers on
+generated inputs. Each case is warmed up, then called repeatedly (at least
+--min-rounds times and for --min-time seconds); the median and minimum time
+per call are reported together with the peak memory allocated by one call,
+measured separately with tracemalloc.
+
+Results are compared with the stored baseline and the run exits with status 1
+when a case is slower, or allocates more, than the baseline by more than the
+threshold. Speed is compared on the fastest call, which other load on the
+machine disturbs far less than the median. Timings depend on the machine, so
+the baseline is not committed: the first run records one locally, and
+--update-baseline refreshes it. Against a baseline recorded on a different
+machine, regressions are reported but only fail the run with --strict.
+
+Documents are generated from a fixed seed and cached, so every run measures
+the same input. Sizes are of the extracted text; pass larger ones to measure
+big uploads, e.g. --sizes 1KB,1MB,100MB.
+
+Usage (from the backend directory):
+    python -m benchmarks.microbenchmarks
+    python -m benchmarks.microbenchmarks --filter pdf --sizes 1MB,10MB
+    python -m benchmarks.microbenchmarks --update-baseline
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from io import BytesIO
+from types import SimpleNamespace
+from typing import Callable
+from docx import Document
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from schema.schema import (
+    summary_list_serialiser, summary_preview_serialiser, shared_summary_serialiser, user_list_serialiser, job_serialiser,
+)
+import services.pdf_extraction as pdf_extraction
+from services.utils import extract_text_from_file, parse_chat_response, handle_json_decode_error, StoredUploadFile
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "microbenchmarks.json")
+# Bump when the generated documents change, so cached copies are not reused
+GENERATOR_VERSION = 1
+DEFAULT_SIZES = "1KB,64KB,1MB"
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+WORDS = ("summary model request response document section result method input output value record "
+         "service query index cache token worker parser stream buffer page chunk batch error retry "
+         "the a of to and in for with on by from").split()
+
+
+@dataclass
+class Case:
+    """
+    One benchmarked call. make_input runs before each call, outside the timed region.
+    """
+    name: str
+    function: Callable
+    make_input: Callable
+
+
+def parse_size(text: str) -> int:
+    """Parses sizes such as '64KB' or '100MB' into bytes."""
+    text = text.strip().upper()
+    for unit, factor in UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def size_label(size: int) -> str:
+    """Formats a size in bytes as the largest whole unit, e.g. 1048576 -> '1MB'."""
+    for unit, factor in reversed(UNITS.items()):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return f"{size}B"
+
+
+def text_lines(size: int, rng: random.Random, width: int = 80):
+    """Yields lines of filler text totalling `size` characters, newlines included."""
+    remaining = size
+    while remaining > 0:
+        words = []
+        length = 0
+        while length < width - 12:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        line = " ".join(words)[:remaining - 1]
+        remaining -= len(line) + 1
+        yield line
+
+
+def write_text(path: str, size: int, rng: random.Random):
+    with open(path, "w", encoding="utf-8") as output:
+        for line in text_lines(size, rng):
+            output.write(line + "\n")
+
+
+def write_pdf(path: str, size: int, rng: random.Random):
+    """Writes a compressed A4 PDF with 60 lines of text per page."""
+    pdf = canvas.Canvas(path, pagesize=A4, pageCompression=1)
+    for index, line in enumerate(text_lines(size, rng)):
+        if index and index % 60 == 0:
+            pdf.showPage()
+        pdf.drawString(40, 800 - (index % 60) * 13, line)
+    pdf.save()
+
+
+def write_docx(path: str, size: int, rng: random.Random):
+    """Writes a DOCX with paragraphs of ten lines."""
+    document = Document()
+    paragraph = []
+    for line in text_lines(size, rng):
+        paragraph.append(line)
+        if len(paragraph) == 10:
+            document.add_paragraph(" ".join(paragraph))
+            paragraph = []
+    if paragraph:
+        document.add_paragraph(" ".join(paragraph))
+    document.save(path)
+
+
+WRITERS = {"txt": write_text, "pdf": write_pdf, "docx": write_docx}
+
+
+def generated_document_path(kind: str, size: int, seed: int, cache_dir: str) -> str:
+    """
+    Returns the path of a generated document, creating and caching it on first use.
+
+    Args:
+        kind (str): 'txt', 'pdf' or 'docx'
+        size (int): Characters of text in the document
+        seed (int): Random seed of the text
+        cache_dir (str): Directory the generated documents are kept in
+
+    Returns:
+        str: Path of the document
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"v{GENERATOR_VERSION}-{seed}-{size}.{kind}")
+    if not os.path.exists(path):
+        partial = path + ".partial"
+        WRITERS[kind](partial, size, random.Random(f"{seed}-{kind}-{size}"))
+        os.replace(partial, path)
+    return path
+
+
+def generated_document(kind: str, size: int, seed: int, cache_dir: str) -> bytes:
+    """Returns the contents of a generated document (see generated_document_path)."""
+    with open(generated_document_path(kind, size, seed, cache_dir), "rb") as document:
+        return document.read()
+
+
+def extract_pdf_in_process(path: str) -> str:
+    """Does the work of extract_pdf_text's worker tasks for one document, in this process."""
+    deadline = time.time() + pdf_extraction.PDF_EXTRACT_TIMEOUT_SECONDS
+    pages = pdf_extraction.extract_page_range(path, 0, pdf_extraction.count_pages(path, deadline), deadline)
+    return "".join(text for text, _ in pages)
+
+
+def uncached_pdf(path: str) -> str:
+    """Forgets the worker's cached reader, so the timed call parses the document again."""
+    pdf_extraction._worker_reader.clear()
+    return path
+
+
+def summary_document(rng: random.Random, output_size: int = 2048, input_size: int = 8192) -> dict:
+    """Builds a summaries document as stored in MongoDB."""
+    document = {
+        "_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "userId": str(uuid.UUID(int=rng.getrandbits(128))),
+        "type": rng.choice(["code", "research", "documentation"]),
+        "uploadType": rng.choice(["text", "file"]),
+        "title": " ".join(rng.choice(WORDS) for _ in range(5)),
+        "initialData": "\n".join(text_lines(input_size, rng)),
+        "outputData": "\n".join(text_lines(output_size, rng)),
+        "createdAt": datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=rng.randrange(10 ** 7)),
+    }
+    document["preview"] = document["outputData"][:200]
+    if document["uploadType"] == "file":
+        document["filedata"] = {"filename": "report.pdf", "file_id": f"{rng.getrandbits(96):024x}"}
+    return document
+
+
+def user_document(rng: random.Random) -> dict:
+    """Builds a users document as stored in MongoDB."""
+    created = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=rng.randrange(10 ** 7))
+    return {
+        "_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "firstName": "Bench", "lastName": f"User{rng.randrange(10 ** 6)}", "phone": None,
+        "email": f"user{rng.randrange(10 ** 9)}@example.com", "password": "x" * 60,
+        "createdAt": created, "lastLoggedInAt": created,
+    }
+
+
+def job_document(rng: random.Random) -> dict:
+    """Builds a finished jobs document as stored in MongoDB."""
+    created = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=rng.randrange(10 ** 7))
+    return {
+        "_id": str(uuid.UUID(int=rng.getrandbits(128))), "type": "summary_upload", "status": "completed",
+        "stage": "done", "attempts": 1,
+        "timings": {"queued": 0.2, "extracting": 1.4, "summarising": 6.1, "saving": 0.01},
+        "result": {"summary_id": str(uuid.UUID(int=rng.getrandbits(128))), "file_id": f"{rng.getrandbits(96):024x}"},
+        "error": None, "createdAt": created, "startedAt": created, "finishedAt": created,
+    }
+
+
+def chat_response(content: str):
+    """Builds an object shaped like a Mistral chat completion response."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def build_cases(sizes: list, seed: int, cache_dir: str) -> list:
+    """Builds every benchmark case, generating its inputs."""
+    cases = []
+    for size in sizes:
+        label = size_label(size)
+        text = generated_document("txt", size, seed, cache_dir)
+        pdf = generated_document_path("pdf", size, seed, cache_dir)
+        docx = generated_document("docx", size, seed, cache_dir)
+        cases += [
+            Case(f"extract_text_from_file[txt-{label}]",
+                 lambda file: extract_text_from_file(file),
+                 lambda text=text: StoredUploadFile("document.txt", BytesIO(text))),
+            Case(f"extract_text_from_file[docx-{label}]",
+                 lambda file: extract_text_from_file(file),
+                 lambda docx=docx: StoredUploadFile("document.docx", BytesIO(docx))),
+            Case(f"extract_pdf_text[{label}]",
+                 extract_pdf_in_process,
+                 lambda pdf=pdf: uncached_pdf(pdf)),
+        ]
+
+    rng = random.Random(seed)
+    for label, size in (("2KB", 2048), ("64KB", 65536)):
+        summary = "\n".join(text_lines(size, rng))
+        well_formed = chat_response(json.dumps({"Title": "Generated summary", "Summary": summary}))
+        malformed = f'{{"Title": "Generated summary", "Summary": "{summary}'
+        cases += [
+            Case(f"parse_chat_response[json-{label}]", parse_chat_response, lambda response=well_formed: response),
+            Case(f"parse_chat_response[malformed-{label}]", parse_chat_response,
+                 lambda content=malformed: chat_response(content)),
+            Case(f"handle_json_decode_error[{label}]", handle_json_decode_error, lambda content=malformed: content),
+        ]
+
+    for count in (20, 1000):
+        summaries = [summary_document(rng) for _ in range(count)]
+        users = [user_document(rng) for _ in range(count)]
+        jobs = [job_document(rng) for _ in range(count)]
+        shared = [({"shared_at": summary["createdAt"]}, summary, users[index]) for index, summary in enumerate(summaries)]
+        cases += [
+            Case(f"summary_list_serialiser[{count}]", summary_list_serialiser, lambda documents=summaries: documents),
+            Case(f"summary_preview_serialiser[{count}]",
+                 lambda documents: [summary_preview_serialiser(document) for document in documents],
+                 lambda documents=summaries: documents),
+            Case(f"shared_summary_serialiser[{count}]",
+                 lambda records: [shared_summary_serialiser(*record) for record in records],
+                 lambda records=shared: records),
+            Case(f"user_list_serialiser[{count}]", user_list_serialiser, lambda documents=users: documents),
+            Case(f"job_serialiser[{count}]",
+                 lambda documents: [job_serialiser(document) for document in documents],
+                 lambda documents=jobs: documents),
+        ]
+    return cases
+
+
+def measure(case: Case, min_rounds: int, max_rounds: int, min_time: float) -> dict:
+    """
+    Times repeated calls of a case, then measures the memory one call allocates.
+
+    Returns:
+        dict: median_ms, min_ms, rounds and peak_alloc_kb (peak memory traced during one call)
+    """
+    case.function(case.make_input())
+    timings = []
+    # As in timeit, collections triggered by earlier rounds would otherwise land in random later ones
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        while len(timings) < min_rounds or (time.perf_counter() - started < min_time and len(timings) < max_rounds):
+            argument = case.make_input()
+            call_started = time.perf_counter()
+            case.function(argument)
+            timings.append(time.perf_counter() - call_started)
+    finally:
+        gc.enable()
+
+    argument = case.make_input()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.function(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "min_ms": round(min(timings) * 1000, 4),
+        "rounds": len(timings),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, alloc_threshold: float, noise_ms: float) -> list:
+    """
+    Compares results with the baseline. A slowdown must also exceed noise_ms, so
+    cases that take microseconds do not fail on timer jitter.
+
+    Returns:
+        list: (case name, description) of every regression beyond the thresholds
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result["min_ms"] > max(expected["min_ms"] * (1 + threshold), expected["min_ms"] + noise_ms):
+            regressions.append((name, f"fastest call {result['min_ms']} ms vs {expected['min_ms']} ms"))
+        if result["peak_alloc_kb"] > expected["peak_alloc_kb"] * (1 + alloc_threshold) + 1:
+            regressions.append((name, f"peak allocation {result['peak_alloc_kb']} KB vs {expected['peak_alloc_kb']} KB"))
+    return regressions
+
+
+def change(value: float, expected: float) -> str:
+    """Formats the relative change of a value against its baseline."""
+    if not expected:
+        return "-"
+    return f"{(value / expected - 1) * 100:+.0f}%"
+
+
+def print_results(results: dict, baseline: dict):
+    print(f"{'case':<44}{'median ms':>12}{'min ms':>12}{'vs base':>9}{'rounds':>8}{'peak KB':>12}{'vs base':>9}")
+    for name, result in results.items():
+        expected = baseline.get(name)
+        time_change = change(result["min_ms"], expected["min_ms"]) if expected else "new"
+        alloc_change = change(result["peak_alloc_kb"], expected["peak_alloc_kb"]) if expected else "new"
+        print(f"{name:<44}{result['median_ms']:>12}{result['min_ms']:>12}{time_change:>9}{result['rounds']:>8}"
+              f"{result['peak_alloc_kb']:>12}{alloc_change:>9}")
+
+
+def environment() -> dict:
+    """Describes the machine the benchmarks ran on, stored with the baseline."""
+    return {"python": platform.python_version(), "machine": platform.machine(), "platform": platform.platform(),
+            "cpus": os.cpu_count()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated document sizes, e.g. 1KB,1MB,100MB")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--min-rounds", type=int, default=5, help="Minimum calls timed per case")
+    parser.add_argument("--max-rounds", type=int, default=10000, help="Maximum calls timed per case")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds to keep timing each case for")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--noise-ms", type=float, default=0.05, help="Slowdowns smaller than this never fail the run")
+    parser.add_argument("--alloc-threshold", type=float, default=0.1, help="Allowed growth of the peak allocation")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--strict", action="store_true",
+                        help="Fail on regressions even against a baseline recorded on a different machine")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of the generated inputs")
+    parser.add_argument("--cache-dir", default=os.path.join(tempfile.gettempdir(), "briefly-microbenchmarks"),
+                        help="Where generated documents are kept between runs")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    cases = [case for case in build_cases(sizes, args.seed, args.cache_dir)
+             if not args.filter or args.filter in case.name]
+
+    stored = {"environment": None, "cases": {}}
+    first_run = not os.path.exists(args.baseline)
+    if not first_run:
+        with open(args.baseline) as baseline_file:
+            stored = json.load(baseline_file)
+    baseline = stored["cases"]
+    same_machine = stored["environment"] in (None, environment())
+    if not same_machine and not args.update_baseline:
+        print(f"Warning: the baseline was recorded on {stored['environment']}; timings may not be comparable")
+
+    results = {case.name: measure(case, args.min_rounds, args.max_rounds, args.min_time) for case in cases}
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"environment": environment(), "cases": results}, output, indent=2)
+
+    if args.update_baseline or first_run:
+        # Cases that were not run keep their stored baseline
+        stored = {"environment": environment(), "cases": {**baseline, **results}}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(stored, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"\nStored {len(results)} results in {args.baseline}")
+        if first_run:
+            print("No baseline existed, so these results are the baseline for later runs")
+        return
+
+    regressions = compare(results, baseline, args.threshold, args.alloc_threshold, args.noise_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond the thresholds:")
+        for name, description in regressions:
+            print(f"  {name}: {description}")
+        if same_machine or args.strict:
+            sys.exit(1)
+        print("Not failing the run: the baseline is from a different machine (--strict to fail anyway, "
+              "--update-baseline to record one here)")
+        return
+    print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
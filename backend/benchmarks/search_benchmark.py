@@ -0,0 +1,157 @@
+"""
+Benchmarks summary search against a synthetic corpus.
+
+Seeds a separate database with synthetic summaries spread over many users,
+builds the same indexes the application uses, then times search requests
+(the shared-summary lookup plus the search aggregation, as the service runs
+them) for random users and terms, and reports latency percentiles.
+
+Usage (from the backend directory, with DATABASE_URL pointing at a MongoDB server):
+    python -m benchmarks.search_benchmark --summaries 100000 --queries 500
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import statistics
+import time
+import uuid
+from config.database import client, summaries_collection_name, shared_summaries_collection_name
+from services.indexes import EXPECTED_INDEXES
+from services.service import summary_search_pipeline, SEARCH_PAGE_SIZE
+from benchmarks.stats import percentile
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "so", "ta", "ru", "vi", "de", "po", "xa", "ze", "qui", "bra", "sto", "fen"]
+
+
+def build_vocabulary(size: int, rng: random.Random) -> list:
+    """
+    Generates distinct pseudo-words for the synthetic corpus.
+
+    Returns:
+        list: Words, most frequent first when sampled with zipf_weights()
+    """
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def zipf_weights(size: int) -> list:
+    """Gives word sampling weights following Zipf's law, as in natural text."""
+    return [1 / rank for rank in range(1, size + 1)]
+
+
+async def seed(db, args, rng: random.Random) -> tuple:
+    """
+    Fills the benchmark database with synthetic users' summaries and shares.
+
+    Returns:
+        tuple: (user IDs, vocabulary, word sampling weights)
+    """
+    vocabulary = build_vocabulary(args.vocabulary, rng)
+    weights = zipf_weights(len(vocabulary))
+    users = [str(uuid.uuid4()) for _ in range(args.users)]
+    summaries = db[summaries_collection_name.name]
+    shared = db[shared_summaries_collection_name.name]
+    await summaries.drop()
+    await shared.drop()
+
+    created_at = datetime.datetime(2024, 1, 1)
+    summary_ids = []
+    batch = []
+    for index in range(args.summaries):
+        summary_id = str(uuid.uuid4())
+        summary_ids.append(summary_id)
+        batch.append({
+            "_id": summary_id,
+            "userId": users[index % len(users)],
+            "type": "documentation",
+            "uploadType": "text",
+            "title": " ".join(rng.choices(vocabulary, weights, k=4)),
+            "initialData": " ".join(rng.choices(vocabulary, weights, k=60)),
+            "outputData": " ".join(rng.choices(vocabulary, weights, k=120)),
+            "createdAt": created_at + datetime.timedelta(seconds=index),
+        })
+        if len(batch) == 5000:
+            await summaries.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await summaries.insert_many(batch, ordered=False)
+
+    shares = [
+        {"_id": str(uuid.uuid4()), "summary_id": summary_id, "sender_id": "benchmark",
+         "recipient_id": recipient_id, "shared_at": created_at}
+        for recipient_id in users
+        for summary_id in rng.sample(summary_ids, min(args.shares_per_user, len(summary_ids)))
+    ]
+    if shares:
+        await shared.insert_many(shares, ordered=False)
+
+    for collection, keys, options in EXPECTED_INDEXES:
+        if collection.name in (summaries.name, shared.name):
+            await db[collection.name].create_index(keys, **options)
+    return users, vocabulary, weights
+
+
+async def search(db, user_id: str, query: str, cursor: str = None) -> list:
+    """Runs one search page the way service_search_summaries does."""
+    shared_ids = await db[shared_summaries_collection_name.name].distinct("summary_id", {"recipient_id": user_id})
+    return await db[summaries_collection_name.name].aggregate(
+        summary_search_pipeline(query, user_id, shared_ids, SEARCH_PAGE_SIZE, cursor)
+    ).to_list(length=None)
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    db = client[args.database]
+    started = time.perf_counter()
+    users, vocabulary, weights = await seed(db, args, rng)
+    seed_seconds = time.perf_counter() - started
+
+    # Warm the cache and connection pool so start-up is not part of the measurement
+    for _ in range(min(20, args.queries)):
+        await search(db, rng.choice(users), rng.choice(vocabulary))
+
+    latencies = []
+    hits = []
+    for _ in range(args.queries):
+        query = " ".join(rng.choices(vocabulary, weights, k=rng.randint(1, 2)))
+        started = time.perf_counter()
+        results = await search(db, rng.choice(users), query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits.append(len(results))
+
+    report = {
+        "summaries": args.summaries,
+        "users": args.users,
+        "queries": args.queries,
+        "seed_seconds": round(seed_seconds, 1),
+        "mean_results": round(statistics.mean(hits), 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if not args.keep:
+        await client.drop_database(args.database)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--summaries", type=int, default=100000, help="Synthetic summaries to seed")
+    parser.add_argument("--users", type=int, default=1000, help="Users owning the summaries")
+    parser.add_argument("--shares-per-user", type=int, default=20, help="Summaries shared with each user")
+    parser.add_argument("--vocabulary", type=int, default=20000, help="Distinct words in the corpus")
+    parser.add_argument("--queries", type=int, default=500, help="Timed searches")
+    parser.add_argument("--database", default="briefly_benchmark", help="Database to seed (dropped afterwards)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database")
+    asyncio.run(main(parser.parse_args()))
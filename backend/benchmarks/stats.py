@@ -0,0 +1,16 @@
+"""Summary statistics shared by the benchmark scripts."""
+
+
+def percentile(samples: list, fraction: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples.
+
+    Args:
+        samples (list): Measurements, in any order
+        fraction (float): e.g. 0.95 for the 95th percentile
+
+    Returns:
+        float: The smallest sample that at least `fraction` of the samples do not exceed
+    """
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))]
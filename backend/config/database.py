@@ -1,9 +1,9 @@
 import os
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 from pymongo.server_api import ServerApi
-from gridfs import GridFS
 import certifi
+from services.query_profiler import query_profiler, MONGO_PROFILER_ENABLED
 
 # Load environment variables
 load_dotenv()
@@ -14,18 +14,25 @@ uri = os.getenv('DATABASE_URL')
 if not uri:
     raise ValueError("Missing required environment variables. Please check your .env file.")
 
-# Initialize MongoDB client with TLS certificate and API version
+# Initialize async MongoDB client with TLS certificate and API version
 # - tlsCAFile: Required for secure connection using certifi's SSL certificate
 # - server_api: Uses MongoDB API version 1 for compatibility
-client = MongoClient(uri, tlsCAFile=certifi.where(), server_api=ServerApi('1'))
+# The client is bound lazily to the running event loop on first use, so all
+# service-layer queries must be awaited from within the application's loop.
+# - event_listeners: times every command by query shape (see services/query_profiler.py)
+client = AsyncIOMotorClient(
+    uri, tlsCAFile=certifi.where(), server_api=ServerApi('1'),
+    event_listeners=[query_profiler] if MONGO_PROFILER_ENABLED else [],
+)
 
-# Get reference to the main database
-db = client.internaldb
+# Get reference to the main database (overridable so load tests can use a scratch database)
+db = client[os.getenv('DATABASE_NAME', 'internaldb')]
 
 # Define collection references for different data types
 users_collection_name = db["users"]           # Collection for user data
 summaries_collection_name = db["summaries"]   # Collection for summary documents
 shared_summaries_collection_name = db["shared_summaries"]  # Collection for shared summary records
+jobs_collection_name = db["jobs"]             # Collection for background processing jobs
 
-# Initialize GridFS for storing large files
-grid_fs = GridFS(db)
+# Initialize async GridFS bucket for storing large files
+grid_fs = AsyncIOMotorGridFSBucket(db)
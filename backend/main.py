@@ -1,12 +1,59 @@
+import logging
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routes.routes import router
 from fastapi.middleware.cors import CORSMiddleware
+from services.calls_to_ai import open_mistral_client, close_mistral_client, connection_stats, mistral_connection_reuses
+from services.indexes import ensure_indexes
+from services.jobs import job_queue
+from services.pdf_extraction import shutdown_pdf_pool
+from services.token_cache import token_cache_stats, token_cache_hit_rate
+from services.summary_cache import cache_stats
+from services.metrics import MetricsMiddleware, register_stats
+from services.query_profiler import query_profiler, MONGO_PROFILER_ENABLED
+from config.database import client
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan: opens shared resources on startup and releases them on shutdown.
+    """
+    # One pooled Mistral client for the whole app, so connections and TLS sessions are reused
+    app.state.mistral_client = open_mistral_client()
+    # Explain slow database commands in the background as the profiler reports them
+    if MONGO_PROFILER_ENABLED:
+        query_profiler.start(client)
+    # Create and verify indexes before serving; fails fast in production if any are missing
+    await ensure_indexes()
+    # Background workers for queued uploads; jobs left over from a previous run are resumed
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    logger.info(
+        "Mistral client served %d requests, %d over reused connections",
+        connection_stats["requests"], mistral_connection_reuses()
+    )
+    logger.info(
+        "Token cache served %d of %d verifications (%.0f%%)",
+        token_cache_stats["hits"], token_cache_stats["hits"] + token_cache_stats["misses"], token_cache_hit_rate() * 100
+    )
+    await close_mistral_client()
+    await query_profiler.stop()
+    shutdown_pdf_pool()
 
 # Initialize FastAPI application and router
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.include_router(router)
 
+# Export the in-process stats counters alongside the request and LLM metrics on /metrics
+register_stats("briefly_mistral_connections", "Mistral HTTP requests and the new connections they opened", connection_stats)
+register_stats("briefly_summary_cache", "Summary cache hits, misses and evictions", cache_stats)
+register_stats("briefly_token_cache", "Token cache hits, misses and evictions", token_cache_stats)
+
 # Configure CORS for local development
 origins = [
     "http://localhost:3000",
@@ -21,6 +68,9 @@ app.add_middleware(
     allow_headers=['*']
 )
 
+# Record request counts, latency and concurrency for every route
+app.add_middleware(MetricsMiddleware)
+
 # Development server configuration
 if __name__ == "__main__":
     uvicorn.run(
@@ -1,28 +1,40 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Security, Body,  Form, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, Security, Body,  Form, UploadFile, File, Query, Header
+from typing import Optional, List, Literal
 from services.service import *
 from models.models import User, Summary
 from exceptions import *
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import jwt
-from fastapi.responses import StreamingResponse
+import hmac
+from fastapi.responses import StreamingResponse, Response
+from services.token_cache import decode_token
+from services.metrics import latest_metrics
 
 router = APIRouter()
 security = HTTPBearer()
 
 # JWT token verification middleware
-def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)):
+async def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)):
     """
     Middleware to verify JWT token
     Input: HTTPAuthorizationCredentials object containing the JWT token
-    Output: None if valid, raises HTTPException if invalid
+    Output: Decoded token claims if valid, raises HTTPException if invalid
+    Note: Verified tokens are cached until they expire, so repeat requests skip decoding
     """
     token = credentials.credentials
     try:
-        jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        return
+        return decode_token(token, SECRET_KEY)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def current_user_id(claims: dict = Depends(verify_token)) -> str:
+    """
+    Dependency giving routes the authenticated caller's user ID
+    Input: Claims from verify_token (decoded once per request)
+    Output: userId claim of the token
+    """
+    return claims["userId"]
+
 # User Management Routes
 @router.post("/user/create", status_code=status.HTTP_201_CREATED)
 async def create_new_user(obj: User):
@@ -33,7 +45,7 @@ async def create_new_user(obj: User):
     Raises: HTTPException if user creation fails
     """
     try:
-        res = service_create_new_user(obj)
+        res = await service_create_new_user(obj)
         return {"status": "OK", "result": res}
     except ServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
@@ -47,24 +59,104 @@ async def verify_user(obj: User):
     Raises: HTTPException if authentication fails
     """
     try:
-        res = service_verify_user(obj)
+        res = await service_verify_user(obj)
         return {"status": "OK", "result": res}
     except NotFoundError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
 
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Exposes application metrics for Prometheus to scrape
+    Input: None
+    Output: Request, LLM, GridFS, job and cache metrics in the Prometheus text format
+    """
+    body, content_type = latest_metrics()
+    return Response(content=body, media_type=content_type)
+
+def verify_admin(x_admin_key: Optional[str] = Header(None)):
+    """
+    Dependency guarding the /admin routes with the ADMIN_API_KEY
+    Input: X-Admin-Key header
+    Raises: HTTPException (404) if admin routes are disabled, (403) if the key is wrong
+    """
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, ADMIN_API_KEY):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+@router.get("/admin/slow-queries", status_code=status.HTTP_200_OK)
+async def slow_queries(
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    order_by: Literal["total_ms", "max_ms", "mean_ms", "count", "documents", "bytes"] = "total_ms",
+    _ = Depends(verify_admin)
+):
+    """
+    Lists the most expensive database query shapes seen by this process
+    Input: 
+        - limit (int): Number of query shapes
+        - order_by (str): Ranking, total time by default
+        - X-Admin-Key header
+    Output: Dict containing status and per-shape count, durations, documents and bytes
+    """
+    return {"status": "OK", "result": service_slow_queries(limit, order_by)}
+
+@router.delete("/admin/slow-queries", status_code=status.HTTP_200_OK)
+async def reset_slow_queries(_ = Depends(verify_admin)):
+    """
+    Clears the recorded query shapes, e.g. after adding an index
+    Input: X-Admin-Key header
+    Output: Dict containing status
+    """
+    query_profiler.reset()
+    return {"status": "OK", "result": {"message": "Query statistics cleared"}}
+
 # Summary Management Routes
 @router.get("/summaries/{userId}", status_code=status.HTTP_200_OK)
-async def user_summaries(userId: str, _ = Depends(verify_token)):
+async def user_summaries(
+    userId: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    _ = Depends(verify_token)
+):
     """
-    Retrieves all summaries for a given user
-    Input: userId (str), JWT token
-    Output: Dict containing status and list of summaries
-    Raises: HTTPException if user not found or unauthorized
+    Retrieves summaries for a given user, newest first
+    Input: 
+        - userId (str)
+        - limit (int, optional): Page size; paged entries carry a short preview instead of the full text
+        - cursor (str, optional): next_cursor from the previous page
+        - JWT token
+    Output: Dict containing status, list of summaries and next_cursor (None on the last page)
+    Raises: HTTPException if the cursor is invalid, user not found or unauthorized
     """
     try:
-        res = service_user_summaries(userId)
-        return {"status": "OK", "result": res}
-    except NotFoundError as e:
+        res = await service_user_summaries(userId, limit, cursor)
+        return {"status": "OK", "result": res["summaries"], "next_cursor": res["next_cursor"]}
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.get("/search/summaries", status_code=status.HTTP_200_OK)
+async def search_summaries(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    userId: str = Depends(current_user_id)
+):
+    """
+    Searches the summaries the caller owns or has been shared, best match first
+    Input: 
+        - q (str): Search terms; "quoted phrases" and -exclusions are supported
+        - limit (int): Page size
+        - cursor (str, optional): next_cursor from the previous page
+        - JWT token
+    Output: Dict containing status, the matching summaries (with a preview and a
+            relevance score) and next_cursor
+    Raises: HTTPException if the query or cursor is invalid
+    """
+    try:
+        res = await service_search_summaries(userId, q, limit, cursor)
+        return {"status": "OK", "result": res["summaries"], "next_cursor": res["next_cursor"]}
+    except ServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 @router.post("/summary/create", status_code=status.HTTP_201_CREATED)
@@ -76,12 +168,41 @@ async def create_summary(obj: Summary = Body(...), _ = Depends(verify_token)):
     Raises: HTTPException if summary creation fails
     """
     try:
-        res = service_create_summary(obj)
+        res = await service_create_summary(obj)
         return {"status": "OK", "result": res}
     except ServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)    
 
-@router.post("/summary/upload", status_code=status.HTTP_201_CREATED)
+@router.post("/summary/create/batch", status_code=status.HTTP_200_OK)
+async def create_summaries_batch(obj: List[Summary] = Body(...), _ = Depends(verify_token)):
+    """
+    Creates several summaries from text input in one request
+    Input: List of Summary objects containing text and metadata, JWT token
+    Output: Dict containing status and a per-item result; items that fail are
+            reported individually and do not fail the rest of the batch
+    Raises: HTTPException if the batch is empty or too large
+    """
+    try:
+        res = await service_create_summaries_batch(obj)
+        return {"status": "OK", "result": res}
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+@router.post("/summary/create/stream", status_code=status.HTTP_200_OK)
+async def create_summary_stream(obj: Summary = Body(...), _ = Depends(verify_token)):
+    """
+    Creates a new summary from text input, streaming the output as it is generated
+    Input: Summary object containing text and metadata, JWT token
+    Output: text/event-stream of 'token' events, followed by a 'done' event with the
+            saved summary id (or an 'error' event)
+    """
+    return StreamingResponse(
+        service_stream_summary(obj),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/summary/upload", status_code=status.HTTP_202_ACCEPTED)
 async def create_summary_upload(
     userId: str = Form(...),
     type: str = Form(...),
@@ -90,15 +211,15 @@ async def create_summary_upload(
     _ = Depends(verify_token)
 ):
     """
-    Creates a new summary from uploaded file
+    Stores an uploaded file and queues a job to summarise it
     Input: 
         - userId (str): ID of the user
         - type (str): Type of summary
         - uploadType (str): Type of upload (e.g., 'pdf', 'doc')
         - file: Uploaded file
         - JWT token
-    Output: Dict containing status and created summary
-    Raises: HTTPException if file processing fails
+    Output: Dict containing status and the queued job ID (poll /jobs/{job_id})
+    Raises: HTTPException (413) if the file is too large, HTTPException if file processing fails
     """
     try:
         summary_data = Summary(
@@ -108,9 +229,58 @@ async def create_summary_upload(
         )
         res = await service_process_file(file, summary_data)
         return {"status": "OK", "result": res}
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/summary/upload/batch", status_code=status.HTTP_202_ACCEPTED)
+async def create_summary_upload_batch(
+    userId: str = Form(...),
+    type: str = Form(...),
+    uploadType: str = Form(...),
+    files: List[UploadFile] = File(...),
+    _ = Depends(verify_token)
+):
+    """
+    Stores several uploaded files and queues a summarisation job for each
+    Input: 
+        - userId (str): ID of the user
+        - type (str): Type of summary
+        - uploadType (str): Type of upload (e.g., 'pdf', 'doc')
+        - files: Uploaded files
+        - JWT token
+    Output: Dict containing status and a per-file result with the queued job ID
+            (poll /jobs/{job_id}); files that fail are reported individually
+    Raises: HTTPException if the batch is empty or too large
+    """
+    try:
+        summary_data = Summary(
+            userId=userId,
+            type=type,
+            uploadType=uploadType,
+        )
+        res = await service_process_files_batch(files, summary_data)
+        return {"status": "OK", "result": res}
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/jobs/{job_id}", status_code=status.HTTP_200_OK)
+async def get_job(job_id: str, _ = Depends(verify_token)):
+    """
+    Retrieves the status of a background job
+    Input: job_id (str), JWT token
+    Output: Dict containing status and job status, stage, timings and result
+    Raises: HTTPException if job not found
+    """
+    try:
+        res = await service_get_job(job_id)
+        return {"status": "OK", "result": res}
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
 # Summary Operations Routes    
 @router.delete("/summary/{summary_id}", status_code=status.HTTP_201_CREATED)
 async def delete_summary(summary_id: str, _ = Depends(verify_token)):
@@ -121,7 +291,7 @@ async def delete_summary(summary_id: str, _ = Depends(verify_token)):
     Raises: HTTPException if deletion fails
     """
     try:
-        res = service_delete_summary(summary_id)
+        res = await service_delete_summary(summary_id)
         return {"status": "OK", "result": res}
     except ServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
@@ -142,23 +312,33 @@ async def regenerate_summary(
     Raises: HTTPException if regeneration fails
     """
     try:
-        res = service_regenrate_summary(summary_id, feedback)
+        res = await service_regenrate_summary(summary_id, feedback)
         return {"status": "OK", "result": res}
     except ServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 # File Operations Routes
 @router.get("/download/{file_id}")
-async def download_file(file_id: str):
+async def download_file(
+    file_id: str,
+    range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None)
+):
     """
     Streams the original file for download
-    Input: file_id (str)
-    Output: StreamingResponse containing the file
+    Input: 
+        - file_id (str)
+        - Range, If-None-Match and If-Range request headers (optional)
+    Output: StreamingResponse containing the file or the requested byte ranges (206),
+            or an empty 304 if the client's copy is current
     Raises: HTTPException if file not found or download fails
     """
     try:
-        res = service_download_file(file_id)
+        res = await service_download_file(file_id, range, if_none_match, if_range)
         return res
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -175,23 +355,51 @@ async def share_summary(summary_id: str = Body(...), recipient: str = Body(...),
     Raises: HTTPException if sharing fails
     """
     try:
-        res = service_share_summary(summary_id, recipient)
-        print(res)
+        res = await service_share_summary(summary_id, recipient)
         return {"status": "OK", "result": res}
     except ServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
     
+@router.post("/summary/share/bulk", status_code=status.HTTP_200_OK)
+async def share_summary_bulk(summary_id: str = Body(...), recipients: List[str] = Body(...), _ = Depends(verify_token)):
+    """
+    Shares a summary with several users via email in one request
+    Input: 
+        - summary_id (str): ID of summary to share
+        - recipients (List[str]): Emails of the recipients
+        - JWT token
+    Output: Dict containing status and the outcome for each recipient
+            ('shared', 'already_shared', 'not_found' or 'self')
+    Raises: HTTPException if the summary doesn't exist or sharing fails
+    """
+    try:
+        res = await service_share_summary_bulk(summary_id, recipients)
+        return {"status": "OK", "result": res}
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
 @router.get("/user/{user_id}/shared-summaries", status_code=status.HTTP_200_OK)
-async def get_shared_summaries(user_id: str, _ = Depends(verify_token)):
+async def get_shared_summaries(
+    user_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    _ = Depends(verify_token)
+):
     """
-    Retrieves all summaries shared with the user
-    Input: user_id (str), JWT token
-    Output: Dict containing status and list of shared summaries
-    Raises: HTTPException if fetch fails
+    Retrieves summaries shared with the user, newest first
+    Input: 
+        - user_id (str)
+        - limit (int, optional): Page size; all shared summaries are returned when omitted
+        - cursor (str, optional): next_cursor from the previous page
+        - JWT token
+    Output: Dict containing status, list of shared summaries and next_cursor (None on the last page)
+    Raises: HTTPException if the cursor is invalid or fetch fails
     """
     try:
-        summaries = service_get_shared_summaries(user_id)
-        return {"status": "OK", "result": summaries}
+        res = await service_get_shared_summaries(user_id, limit, cursor)
+        return {"status": "OK", "result": res["summaries"], "next_cursor": res["next_cursor"]}
+    except ServiceError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch shared summaries")
     
@@ -204,7 +412,7 @@ async def get_summary(summary_id: str, _ = Depends(verify_token)):
     Raises: HTTPException if summary not found
     """
     try:
-        res = service_get_summary(summary_id)
+        res = await service_get_summary(summary_id)
         return {"status": "OK", "result": res}
     except ServiceError as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
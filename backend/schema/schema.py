@@ -49,6 +49,30 @@ def summary_serialiser(object) -> dict:
     
     return serialized_data
 
+def summary_preview_serialiser(object) -> dict:
+    """
+    Serializes a summary list entry (projected without its full text) to a dictionary
+    Input: MongoDB summary document with a 'preview' of the output
+    Output: Dictionary containing summary metadata and the preview
+            Includes optional file data if present
+    """
+    serialized_data = {
+        "id": str(object["_id"]),
+        "userId": str(object["userId"]),
+        "type": str(object["type"]),
+        "uploadType": str(object["uploadType"]),
+        "title": str(object.get("title")),
+        "createdAt": str(object["createdAt"]),
+        "preview": object.get("preview", "")
+    }
+
+    # Add file-related fields if filedata exists
+    if "filedata" in object and object["filedata"]:
+        serialized_data["fileName"] = object["filedata"].get("filename", None)
+        serialized_data["fileId"] = object["filedata"].get("file_id", None)
+
+    return serialized_data
+
 def summary_list_serialiser(objects) -> list:
     """
     Serializes a list of summary objects
@@ -87,4 +111,25 @@ def shared_summary_serialiser(record: dict, summary: dict, sender: dict) -> dict
     if "filedata" in summary and summary["filedata"]:
         serialized_data["fileName"] = summary["filedata"].get("filename", None)
         serialized_data["fileId"] = summary["filedata"].get("file_id", None)
-    return serialized_data
\ No newline at end of file
+    return serialized_data
+
+def job_serialiser(object) -> dict:
+    """
+    Serializes a background job document from MongoDB to a dictionary
+    Input: MongoDB job document
+    Output: Dictionary containing job status, current stage, per-stage timings (seconds)
+            and the result or error once the job has finished
+    """
+    return {
+        "id": str(object["_id"]),
+        "type": object["type"],
+        "status": object["status"],
+        "stage": object.get("stage"),
+        "attempts": object.get("attempts", 0),
+        "timings": object.get("timings", {}),
+        "result": object.get("result"),
+        "error": object.get("error"),
+        "createdAt": str(object["createdAt"]),
+        "startedAt": str(object["startedAt"]) if object.get("startedAt") else None,
+        "finishedAt": str(object["finishedAt"]) if object.get("finishedAt") else None,
+    }
@@ -1,8 +1,41 @@
-import time
+import asyncio
 from mistralai import Mistral
 import os
+import httpx
+import time
+from services.rate_limiter import rate_limiter, estimate_tokens
+from services.metrics import llm_request_duration, llm_requests_in_progress, llm_tokens, llm_rate_limit_wait, summary_duration
 api_key = os.getenv('MISTRAL_API_KEY')
 
+# Bump whenever the prompts or message layout change, so cached summaries from older prompts are not reused
+PROMPT_VERSION = 1
+
+# Examples used when the input is not code (or its language has no examples): they only show the output format
+DEFAULT_EXAMPLE_LANGUAGE = 'java'
+
+# Inputs estimated above this many tokens are summarised chunk by chunk (map-reduce)
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv('SUMMARY_MAX_INPUT_TOKENS', '24000'))
+SUMMARY_CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', '8000'))
+SUMMARY_CHUNK_OVERLAP_TOKENS = int(os.getenv('SUMMARY_CHUNK_OVERLAP_TOKENS', '200'))
+SUMMARY_CHUNK_CONCURRENCY = int(os.getenv('SUMMARY_CHUNK_CONCURRENCY', '4'))
+# Upper bound on reduce rounds for extremely long documents
+SUMMARY_MAX_REDUCE_ROUNDS = 3
+
+# Alternative API endpoint, e.g. a proxy or the fake server used by the load tests; the public API when unset
+MISTRAL_SERVER_URL = os.getenv('MISTRAL_SERVER_URL') or None
+# Connection pool and timeout settings for the shared Mistral HTTP client
+MISTRAL_MAX_CONNECTIONS = int(os.getenv('MISTRAL_MAX_CONNECTIONS', '20'))
+MISTRAL_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('MISTRAL_MAX_KEEPALIVE_CONNECTIONS', '10'))
+MISTRAL_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv('MISTRAL_KEEPALIVE_EXPIRY_SECONDS', '120'))
+MISTRAL_CONNECT_TIMEOUT_SECONDS = float(os.getenv('MISTRAL_CONNECT_TIMEOUT_SECONDS', '10'))
+MISTRAL_READ_TIMEOUT_SECONDS = float(os.getenv('MISTRAL_READ_TIMEOUT_SECONDS', '120'))
+
+# Application-scoped client, opened and closed by the FastAPI lifespan in main.py
+_mistral_client = None
+
+# Counts outgoing requests and how many of them had to open a new connection
+connection_stats = {"requests": 0, "new_connections": 0}
+
 # Simple base prompts for different types of content summarization
 prompts = {
     'code': "You are a code summarisation tool. Understand the given code and output the detailed summary of the code.",
@@ -12,9 +45,168 @@ prompts = {
 
 
 
-def complete_chat(client, model, prompts, inputType, example_code_summaries, inputData):
+async def _trace_connection(event_name, info):
+    """httpcore trace hook: a TCP connect only happens when no pooled connection was reusable."""
+    if event_name == "connection.connect_tcp.started":
+        connection_stats["new_connections"] += 1
+
+async def _on_request(request):
+    """httpx request hook that attaches the connection tracer to every Mistral request."""
+    connection_stats["requests"] += 1
+    request.extensions["trace"] = _trace_connection
+
+def mistral_connection_reuses() -> int:
+    """
+    Returns how many Mistral requests were served over an already open connection.
+
+    Returns:
+        int: Number of requests that skipped the TCP/TLS handshake
+    """
+    return connection_stats["requests"] - connection_stats["new_connections"]
+
+def open_mistral_client():
+    """
+    Creates the application-wide Mistral client backed by a keep-alive connection pool.
+
+    Returns:
+        Mistral: Client shared by every AI helper for the lifetime of the app
+    """
+    global _mistral_client
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=MISTRAL_MAX_CONNECTIONS,
+            max_keepalive_connections=MISTRAL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=MISTRAL_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(MISTRAL_READ_TIMEOUT_SECONDS, connect=MISTRAL_CONNECT_TIMEOUT_SECONDS),
+        event_hooks={"request": [_on_request]},
+    )
+    _mistral_client = Mistral(
+        api_key=api_key,
+        server_url=MISTRAL_SERVER_URL,
+        async_client=http_client,
+        timeout_ms=int(MISTRAL_READ_TIMEOUT_SECONDS * 1000),
+    )
+    return _mistral_client
+
+async def close_mistral_client():
+    """Closes the shared Mistral client and its pooled connections."""
+    global _mistral_client
+    if _mistral_client is not None:
+        await _mistral_client.sdk_configuration.async_client.aclose()
+        _mistral_client = None
+
+def get_mistral_client():
+    """
+    Returns the shared Mistral client, creating it on first use outside the app lifespan.
+
+    Returns:
+        Mistral: The application-scoped Mistral client
+    """
+    if _mistral_client is None:
+        return open_mistral_client()
+    return _mistral_client
+
+def record_usage(model, usage):
+    """Adds the token usage reported for a chat completion to the metrics."""
+    llm_tokens.labels(model, "prompt").inc(usage.prompt_tokens or 0)
+    llm_tokens.labels(model, "completion").inc(usage.completion_tokens or 0)
+
+async def acquire_quota(model, estimated_tokens):
+    """
+    Waits for rate limit quota, recording how long the wait took.
+
+    Returns:
+        The limiter's reference to the admitting window, to be passed back to settle()
+    """
+    started = time.perf_counter()
+    window = await rate_limiter.acquire(model, estimated_tokens)
+    llm_rate_limit_wait.labels(model).observe(time.perf_counter() - started)
+    return window
+
+async def settle_quota(model, estimated_tokens, usage, window):
+    """
+    Replaces the tokens reserved by acquire_quota with the usage the API reported.
+
+    Notes:
+        Failed requests and responses without usage settle to 0 tokens, so errors
+        do not leave their estimate charged and starve the limiter.
+    """
+    actual_tokens = 0
+    if usage is not None:
+        record_usage(model, usage)
+        actual_tokens = usage.total_tokens
+    await rate_limiter.settle(model, estimated_tokens, actual_tokens, window)
+
+async def chat_completion(client, model, messages, response_format, operation="summarise"):
     """
-    Completes a chat interaction using the Mistral client.
+    Sends a chat completion through the shared Mistral rate limiter.
+
+    Args:
+        client (Mistral): The Mistral API client.
+        model (str): The model to use for the chat.
+        messages (list): Chat messages to send.
+        response_format (dict): Requested response format.
+        operation (str): What the completion is for, used to label its metrics.
+
+    Returns:
+        The chat response from the Mistral API.
+    """
+    estimated_tokens = estimate_tokens(messages)
+    window = await acquire_quota(model, estimated_tokens)
+    outcome = "error"
+    started = time.perf_counter()
+    llm_requests_in_progress.labels(model).inc()
+    chat_response = None
+    try:
+        chat_response = await client.chat.complete_async(
+            model=model,
+            messages=messages,
+            response_format=response_format
+        )
+        outcome = "success"
+    finally:
+        llm_requests_in_progress.labels(model).dec()
+        llm_request_duration.labels(model, operation, outcome).observe(time.perf_counter() - started)
+        # Replace the estimate with the real usage so the token budget stays accurate
+        await settle_quota(model, estimated_tokens, getattr(chat_response, "usage", None), window)
+    return chat_response
+
+def build_summary_messages(prompts, inputType, example_code_summaries, inputData):
+    """
+    Builds the chat messages for a summarisation request.
+
+    Args:
+        prompts (dict): Dictionary of prompts for different input types.
+        inputType (str): The type of input (e.g., 'code', 'research').
+        example_code_summaries (list): List of example summaries for the input type.
+        inputData (str): The actual content to summarize.
+
+    Returns:
+        list: Messages asking for a JSON object with Title and Summary.
+    """
+    return [
+        {
+            "role": "system",
+            "content": prompts[inputType],
+        },
+        {
+            "role": "system",
+            "content": example_code_summaries[0],
+        },
+        {
+            "role": "user",
+            "content": inputData,
+        },
+        {
+            "role": "system",
+            "content": "Return the Title and Summary in short json object.",
+        }
+    ]
+
+async def complete_chat(client, model, prompts, inputType, example_code_summaries, inputData):
+    """
+    Completes a chat interaction using the Mistral client's async API.
 
     Args:
         client (Mistral): The Mistral API client.
@@ -27,61 +219,233 @@ def complete_chat(client, model, prompts, inputType, example_code_summaries, inp
     Returns:
         The chat response from the Mistral API.
     """
-    return client.chat.complete(
+    return await chat_completion(
+        client,
         model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": prompts[inputType],
-            },
-            {
-                "role": "system",
-                "content": example_code_summaries[0],
-            },
-            {
-                "role": "user",
-                "content": inputData,
-            },
-            {
-                "role": "system",
-                "content": "Return the Title and Summary in short json object.",
-            }
-        ],
+        messages=build_summary_messages(prompts, inputType, example_code_summaries, inputData),
         response_format={
             "type": "json_object",
         }
     )
 
-def call_to_AI(input_type, initial_data):
-    """Processes input through Mistral AI for summarization"""
+async def stream_chat(client, model, messages, response_format):
+    """
+    Streams a chat completion through the shared Mistral rate limiter.
+
+    Args:
+        client (Mistral): The Mistral API client.
+        model (str): The model to use for the chat.
+        messages (list): Chat messages to send.
+        response_format (dict): Requested response format.
+
+    Yields:
+        str: Content deltas as the model produces them.
+    """
+    estimated_tokens = estimate_tokens(messages)
+    window = await acquire_quota(model, estimated_tokens)
+    outcome = "error"
+    started = time.perf_counter()
+    llm_requests_in_progress.labels(model).inc()
+    usage = None
+    try:
+        stream = await client.chat.stream_async(
+            model=model,
+            messages=messages,
+            response_format=response_format
+        )
+        async for event in stream:
+            if event.data.usage is not None:
+                usage = event.data.usage
+            if event.data.choices and event.data.choices[0].delta.content:
+                yield event.data.choices[0].delta.content
+        outcome = "success"
+    finally:
+        llm_requests_in_progress.labels(model).dec()
+        llm_request_duration.labels(model, "stream", outcome).observe(time.perf_counter() - started)
+        await settle_quota(model, estimated_tokens, usage, window)
+
+async def stream_summary(input_type, initial_data, client=None, examples=None):
+    """
+    Streams a summary for the input, token by token.
+
+    Args:
+        input_type (str): The type of input (e.g., 'code', 'research').
+        initial_data (str): The content to summarize.
+        client (Mistral, optional): Mistral client to use, defaults to the shared pooled client.
+        examples (list, optional): Example summaries already picked by select_examples().
+
+    Yields:
+        str: Content deltas of the JSON object holding Title and Summary.
+    """
+    model = select_model(input_type)
+    client = client or get_mistral_client()
+    example_code_summaries = examples if examples is not None else select_examples(input_type, initial_data)
+    initial_data = await condense_long_input(client, model, input_type, initial_data)
+
+    async for delta in stream_chat(
+        client,
+        model=model,
+        messages=build_summary_messages(prompts, input_type, example_code_summaries, initial_data),
+        response_format={
+            "type": "json_object",
+        }
+    ):
+        yield delta
+
+async def summarise_chunks(client, model, input_type, text):
+    """
+    Map step: summarises token-bounded chunks of a long text concurrently.
+
+    Args:
+        client (Mistral): The Mistral API client.
+        model (str): The model to use for the chat.
+        input_type (str): The type of input (e.g., 'code', 'research').
+        text (str): The long content to condense.
+
+    Returns:
+        str: The partial summaries joined in document order.
+    """
     # Import inside the function to avoid circular import issues
-    from services.utils import detect_language, get_all_examples_for_language, parse_chat_response
+    from services.utils import split_into_chunks
 
-    # Select appropriate model based on content type
-    model = "open-mistral-nemo"
+    chunks = split_into_chunks(text, SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_OVERLAP_TOKENS)
+    semaphore = asyncio.Semaphore(SUMMARY_CHUNK_CONCURRENCY)
+
+    async def summarise_chunk(index, chunk):
+        async with semaphore:
+            chat_response = await chat_completion(
+                client,
+                model=model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": prompts[input_type],
+                    },
+                    {
+                        "role": "system",
+                        "content": f"The input is part {index + 1} of {len(chunks)} of a longer document. Summarise only this part, keeping every important detail, in plain text.",
+                    },
+                    {
+                        "role": "user",
+                        "content": chunk,
+                    }
+                ],
+                response_format={
+                    "type": "text",
+                },
+                operation="summarise_chunk"
+            )
+        return chat_response.choices[0].message.content
+
+    partial_summaries = await asyncio.gather(
+        *(summarise_chunk(index, chunk) for index, chunk in enumerate(chunks))
+    )
+    return "\n\n".join(
+        f"Part {index + 1}:\n{summary}" for index, summary in enumerate(partial_summaries)
+    )
+
+async def condense_long_input(client, model, input_type, initial_data):
+    """
+    Shrinks input that does not fit the model context by summarising it in chunks.
+
+    Args:
+        client (Mistral): The Mistral API client.
+        model (str): The model to use for the chat.
+        input_type (str): The type of input (e.g., 'code', 'research').
+        initial_data (str): The content to summarize.
+
+    Returns:
+        str: The input itself if it is short enough, otherwise the combined partial summaries.
+    """
+    rounds = 0
+    while estimate_tokens(initial_data) > SUMMARY_MAX_INPUT_TOKENS and rounds < SUMMARY_MAX_REDUCE_ROUNDS:
+        initial_data = (
+            "The following are summaries of consecutive parts of one long document.\n\n"
+            + await summarise_chunks(client, model, input_type, initial_data)
+        )
+        rounds += 1
+    return initial_data
+
+def select_model(input_type):
+    """
+    Selects the Mistral model used for a content type.
+
+    Args:
+        input_type (str): The type of input (e.g., 'code', 'research').
+
+    Returns:
+        str: Model name
+    """
     if input_type == "code":
-        model = "open-codestral-mamba"
+        return "open-codestral-mamba"
+    return "open-mistral-nemo"
+
+def select_examples(input_type, initial_data):
+    """
+    Picks the example summaries sent alongside the input.
 
-    # Initialize API client
-    client = Mistral(api_key=api_key)
-    
-    # Use the detect_language function to determine the language of the input
-    language = detect_language(client, initial_data)
+    Args:
+        input_type (str): The type of input (e.g., 'code', 'research').
+        initial_data (str): The content to summarize.
+
+    Returns:
+        list: Example summary strings
+    """
+    # Import inside the function to avoid circular import issues
+    from services.utils import detect_language, get_all_examples_for_language
 
-    # Temp  fix to
-    time.sleep(2)
-    # Fetch all examples for the given input type
-    example_code_summaries = get_all_examples_for_language(language)
+    # Only code needs a language; the local classifier answers without an extra LLM call
+    language = DEFAULT_EXAMPLE_LANGUAGE
+    if input_type == "code":
+        language = detect_language(initial_data)
 
-    # Use the new complete_chat function
-    chat_response = complete_chat(client, model, prompts, input_type, example_code_summaries, initial_data)
+    # Fetch all examples for the given language, falling back to the default formatting examples
+    return get_all_examples_for_language(language) or get_all_examples_for_language(DEFAULT_EXAMPLE_LANGUAGE)
 
-    # Extract and parse response using the new function
-    outputData = parse_chat_response(chat_response)
+async def call_to_AI(input_type, initial_data, client=None, examples=None):
+    """
+    Processes input through Mistral AI for summarization, using the shared client unless one is given.
+
+    Args:
+        input_type (str): The type of input (e.g., 'code', 'research').
+        initial_data (str): The content to summarize.
+        client (Mistral, optional): Mistral client to use, defaults to the shared pooled client.
+        examples (list, optional): Example summaries already picked by select_examples(),
+                                   so callers that needed them first do not detect the language again.
+
+    Returns:
+        dict: Parsed 'Title'/'Summary' output
+    """
+    # Import inside the function to avoid circular import issues
+    from services.utils import parse_chat_response
+
+    # Select appropriate model based on content type
+    model = select_model(input_type)
+
+    # Reuse the pooled application client
+    client = client or get_mistral_client()
+
+    outcome = "error"
+    started = time.perf_counter()
+    try:
+        example_code_summaries = examples if examples is not None else select_examples(input_type, initial_data)
+
+        # Long documents are summarised chunk by chunk first; the reduce step below returns the usual JSON
+        initial_data = await condense_long_input(client, model, input_type, initial_data)
+
+        # Use the new complete_chat function
+        chat_response = await complete_chat(client, model, prompts, input_type, example_code_summaries, initial_data)
+
+        # Extract and parse response using the new function
+        outputData = parse_chat_response(chat_response)
+        outcome = "success"
+    finally:
+        # Unknown types fail on the prompt lookup; group them so arbitrary input cannot add series
+        summary_duration.labels(input_type if input_type in prompts else "other", outcome).observe(time.perf_counter() - started)
 
     return outputData
 
-def regenerate_chat_response(client, model, prompts, input_type, example_code_summaries, initial_data, summary_data, feedback):
+async def regenerate_chat_response(client, model, prompts, input_type, example_code_summaries, initial_data, summary_data, feedback):
     """
     Generates a chat response using the Mistral client for regenerating summaries.
 
@@ -97,12 +461,13 @@ def regenerate_chat_response(client, model, prompts, input_type, example_code_su
 
     Returns:
         The chat response from the Mistral API.
-    """
-    # Import inside the function to avoid circular import issues
-    from services.utils import parse_chat_response
 
-    # ... existing code ...
-    chat_response = client.chat.complete(
+    Notes:
+        Input over SUMMARY_MAX_INPUT_TOKENS is condensed chunk by chunk first, as in call_to_AI.
+    """
+    initial_data = await condense_long_input(client, model, input_type, initial_data)
+    return await chat_completion(
+        client,
         model=model,
         messages=[
             {
@@ -120,9 +485,6 @@ def regenerate_chat_response(client, model, prompts, input_type, example_code_su
         ],
         response_format={
             "type": "text"
-        }
+        },
+        operation="regenerate"
     )
-    outputData = parse_chat_response(chat_response)
-    # ... existing code ...
-
-    return outputData
\ No newline at end of file
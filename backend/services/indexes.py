@@ -0,0 +1,178 @@
+import logging
+import os
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+from config.database import users_collection_name, summaries_collection_name, shared_summaries_collection_name, jobs_collection_name
+from services.summary_cache import summary_cache_collection_name
+
+logger = logging.getLogger(__name__)
+
+# Deployment environment; in production a missing index stops the app from starting
+APP_ENV = os.getenv('APP_ENV', 'development')
+# Whether startup creates missing indexes (disable where indexes are managed by migrations)
+INDEX_AUTO_CREATE = os.getenv('INDEX_AUTO_CREATE', 'true').lower() == 'true'
+
+# (collection, keys, options) for every index the application relies on
+EXPECTED_INDEXES = [
+    # Login and share lookups by email; one account per email address
+    (users_collection_name, [("email", ASCENDING)],
+     {"name": "email_unique", "unique": True, "partialFilterExpression": {"email": {"$type": "string"}}}),
+    # A user's summaries, newest first, paged by (createdAt, _id)
+    (summaries_collection_name, [("userId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)],
+     {"name": "userId_createdAt_id"}),
+    # Full-text search over summaries; titles rank above summary text, which ranks above the input
+    (summaries_collection_name, [("title", TEXT), ("outputData", TEXT), ("initialData", TEXT)],
+     {"name": "summary_text", "weights": {"title": 10, "outputData": 5, "initialData": 1}}),
+    # A user's shared inbox, newest first, paged by (shared_at, _id)
+    (shared_summaries_collection_name, [("recipient_id", ASCENDING), ("shared_at", DESCENDING), ("_id", DESCENDING)],
+     {"name": "recipient_sharedAt_id"}),
+    # A summary is shared with each recipient at most once
+    (shared_summaries_collection_name, [("summary_id", ASCENDING), ("recipient_id", ASCENDING)],
+     {"name": "summary_recipient_unique", "unique": True}),
+    # Summary cache expiry and least-recently-used eviction
+    (summary_cache_collection_name, [("expiresAt", ASCENDING)],
+     {"name": "expiresAt_ttl", "expireAfterSeconds": 0}),
+    (summary_cache_collection_name, [("lastAccessedAt", ASCENDING)],
+     {"name": "lastAccessedAt"}),
+    # Workers claiming the oldest queued job
+    (jobs_collection_name, [("status", ASCENDING), ("createdAt", ASCENDING)],
+     {"name": "status_createdAt"}),
+]
+
+# (description, collection, filter, sort) for the hot queries whose plans are checked at startup
+HOT_QUERIES = [
+    ("user by email", users_collection_name, {"email": ""}, None),
+    ("summaries by user", summaries_collection_name, {"userId": ""}, [("createdAt", DESCENDING), ("_id", DESCENDING)]),
+    ("shared inbox", shared_summaries_collection_name, {"recipient_id": ""}, [("shared_at", DESCENDING), ("_id", DESCENDING)]),
+    ("duplicate share", shared_summaries_collection_name, {"summary_id": "", "recipient_id": ""}, None),
+    ("summary search", summaries_collection_name, {"$text": {"$search": "summary"}}, None),
+]
+
+
+async def create_indexes():
+    """
+    Creates the expected indexes that do not exist yet.
+
+    Notes:
+        Index creation is idempotent. Failures (e.g. duplicate emails blocking a
+        unique index) are logged and left for missing_indexes() to report.
+    """
+    for collection, keys, options in EXPECTED_INDEXES:
+        try:
+            await collection.create_index(keys, **options)
+        except OperationFailure as e:
+            logger.error("Could not create index %s on %s: %s", options["name"], collection.name, e)
+            if e.code == 11000:
+                logger.error(
+                    "Existing documents in %s hold duplicate values for %s; merge or remove them "
+                    "before the index can be built (see 'Upgrading' in the README)", collection.name, keys
+                )
+
+
+def index_key(keys: list) -> list:
+    """
+    Gives the key of an index as reported by index_information().
+
+    Args:
+        keys (list): (field, direction) pairs as passed to create_index
+
+    Returns:
+        list: (field, direction) pairs; the fields of a text index are replaced
+              by the '_fts'/'_ftsx' pair MongoDB stores in their place
+    """
+    key = []
+    for field, direction in keys:
+        if direction != TEXT:
+            key.append((field, direction))
+        elif ("_fts", "text") not in key:
+            key.extend([("_fts", "text"), ("_ftsx", 1)])
+    return key
+
+
+async def missing_indexes() -> list:
+    """
+    Compares the expected indexes with those that exist.
+
+    Returns:
+        list: 'collection.index_name' for every expected index that is missing,
+              or exists without the required unique/TTL options or text fields
+    """
+    missing = []
+    existing_by_collection = {}
+    for collection, keys, options in EXPECTED_INDEXES:
+        if collection.name not in existing_by_collection:
+            existing_by_collection[collection.name] = list((await collection.index_information()).values())
+        text_fields = {field for field, direction in keys if direction == TEXT}
+        found = any(
+            [tuple(field) for field in index["key"]] == index_key(keys)
+            and bool(index.get("unique")) == bool(options.get("unique"))
+            and index.get("expireAfterSeconds") == options.get("expireAfterSeconds")
+            and set(index.get("weights", {})) == text_fields
+            for index in existing_by_collection[collection.name]
+        )
+        if not found:
+            missing.append(f"{collection.name}.{options['name']}")
+    return missing
+
+
+def winning_plan_stages(plan: dict) -> list:
+    """
+    Lists the stage names of a query plan, outermost first.
+
+    Args:
+        plan (dict): winningPlan section of an explain result
+
+    Returns:
+        list: Stage names, e.g. ['FETCH', 'IXSCAN']
+    """
+    stages = []
+    while plan:
+        # Plans from the slot-based engine nest the classic plan under queryPlan
+        plan = plan.get("queryPlan", plan)
+        stages.append(plan.get("stage"))
+        plan = plan.get("inputStage") or next(iter(plan.get("inputStages", [])), None)
+    return stages
+
+
+async def collection_scans() -> list:
+    """
+    Explains the hot queries and reports any that fall back to a collection scan.
+
+    Returns:
+        list: Descriptions of the hot queries planned as COLLSCAN
+    """
+    scans = []
+    for description, collection, query, sort in HOT_QUERIES:
+        cursor = collection.find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explanation = await cursor.explain()
+        except Exception as e:
+            # The check is diagnostic only; e.g. restricted database users may not run explain
+            logger.warning("Could not explain %s query: %s", description, e)
+            continue
+        stages = winning_plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages:
+            logger.warning("The %s query on %s uses a collection scan: %s", description, collection.name, stages)
+            scans.append(description)
+    return scans
+
+
+async def ensure_indexes():
+    """
+    Creates and verifies the application's indexes at startup.
+
+    Raises:
+        RuntimeError: In production, if an expected index is missing or a hot
+                      query is planned as a collection scan
+    """
+    if INDEX_AUTO_CREATE:
+        await create_indexes()
+
+    missing = await missing_indexes()
+    scans = await collection_scans()
+    if missing:
+        logger.error("Missing indexes: %s", ", ".join(missing))
+    if APP_ENV == 'production' and (missing or scans):
+        raise RuntimeError(f"Index check failed; missing indexes: {missing}, collection scans: {scans}")
@@ -0,0 +1,312 @@
+import asyncio
+import datetime
+import logging
+import os
+import time
+import uuid
+from pymongo import ReturnDocument
+from config.database import jobs_collection_name
+from exceptions import ServiceError
+from services.metrics import jobs_finished, job_stage_duration, jobs_in_progress
+
+logger = logging.getLogger(__name__)
+
+# Number of jobs processed concurrently by each application process
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+# How long a running job may go without a heartbeat before another worker takes it over
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '300'))
+# How often a running job's lease is renewed while its handler works, whatever the stage
+JOB_HEARTBEAT_SECONDS = float(os.getenv('JOB_HEARTBEAT_SECONDS', str(JOB_LEASE_SECONDS / 3)))
+# How often idle workers look for jobs queued by other processes
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv('JOB_POLL_INTERVAL_SECONDS', '2'))
+# Attempts per job, counting attempts whose worker died; the job fails after the last one
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class JobContext:
+    """
+    Handed to job handlers so they can report progress.
+    Each stage change is persisted along with the time spent in the previous stage,
+    and renews the job's lease; the queue also renews it periodically via renew_lease().
+    """
+
+    def __init__(self, collection, job: dict, worker_id: str):
+        self.collection = collection
+        self.job = job
+        self.worker_id = worker_id
+        self.stage = job.get("stage")
+        self.stage_started = time.monotonic()
+        if self.stage == "queued" and job.get("queuedAt"):
+            # Charge the time spent waiting for a worker to the queued stage
+            queued_at = job["queuedAt"].replace(tzinfo=datetime.timezone.utc)
+            self.stage_started -= max(0.0, (_now() - queued_at).total_seconds())
+
+    async def set_stage(self, stage: str):
+        """
+        Moves the job to a new processing stage.
+
+        Args:
+            stage (str): Name of the stage that is starting
+        """
+        elapsed = round(time.monotonic() - self.stage_started, 3)
+        if self.stage:
+            job_stage_duration.labels(self.job["type"], self.stage).observe(elapsed)
+        update = {
+            "stage": stage,
+            "updatedAt": _now(),
+            "leaseExpiresAt": _now() + datetime.timedelta(seconds=JOB_LEASE_SECONDS),
+        }
+        if self.stage:
+            update[f"timings.{self.stage}"] = elapsed
+        await self.collection.update_one(
+            {"_id": self.job["_id"], "workerId": self.worker_id},
+            {"$set": update},
+        )
+        self.stage = stage
+        self.stage_started = time.monotonic()
+
+    async def renew_lease(self):
+        """Extends the lease of the job while this worker still owns it."""
+        await self.collection.update_one(
+            {"_id": self.job["_id"], "workerId": self.worker_id, "status": "running"},
+            {"$set": {"leaseExpiresAt": _now() + datetime.timedelta(seconds=JOB_LEASE_SECONDS)}},
+        )
+
+    def stage_timing(self) -> dict:
+        """Returns the timing entry for the stage currently in progress."""
+        if not self.stage:
+            return {}
+        return {f"timings.{self.stage}": round(time.monotonic() - self.stage_started, 3)}
+
+
+class JobQueue:
+    """
+    MongoDB-backed job queue with an in-process pool of asyncio workers.
+
+    Jobs are persisted before they are acknowledged, claimed atomically by workers,
+    and kept alive with a lease renewed by a heartbeat; jobs whose worker died (e.g.
+    the app restarted) are picked up again once their lease expires, until they
+    run out of attempts.
+    """
+
+    def __init__(self, collection, workers: int = JOB_WORKERS):
+        self.collection = collection
+        self.workers = workers
+        self.handlers = {}
+        self.failure_handlers = {}
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self._worker_prefix = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    def register(self, job_type: str, handler, on_failure=None):
+        """
+        Registers the coroutine that processes jobs of a given type.
+
+        Args:
+            job_type (str): Job type name
+            handler: async callable(job: dict, context: JobContext) -> dict result
+            on_failure (optional): async callable(job: dict) run once the job has failed
+                                   for good, e.g. to delete files it no longer needs
+        """
+        self.handlers[job_type] = handler
+        if on_failure is not None:
+            self.failure_handlers[job_type] = on_failure
+
+    async def enqueue(self, job_type: str, payload: dict) -> dict:
+        """
+        Persists a new job and wakes an idle worker.
+
+        Args:
+            job_type (str): Registered job type
+            payload (dict): Data the handler needs, stored with the job
+
+        Returns:
+            dict: The stored job document
+        """
+        now = _now()
+        job = {
+            "_id": str(uuid.uuid4()),
+            "type": job_type,
+            "status": "queued",
+            "stage": "queued",
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "timings": {},
+            "createdAt": now,
+            "updatedAt": now,
+            "queuedAt": now,
+        }
+        await self.collection.insert_one(job)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str):
+        """
+        Fetches a job by ID.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            dict | None: The job document
+        """
+        return await self.collection.find_one({"_id": job_id})
+
+    async def _claim(self, worker_id: str):
+        """Atomically takes the oldest queued job, or a running job whose lease has expired."""
+        now = _now()
+        return await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued"},
+                    {"status": "running", "leaseExpiresAt": {"$lt": now}, "attempts": {"$lt": JOB_MAX_ATTEMPTS}},
+                ],
+                "type": {"$in": list(self.handlers)},
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "workerId": worker_id,
+                    "updatedAt": now,
+                    "leaseExpiresAt": now + datetime.timedelta(seconds=JOB_LEASE_SECONDS),
+                },
+                "$min": {"startedAt": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("createdAt", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _fail_abandoned(self):
+        """
+        Fails one running job whose lease expired on its last attempt, i.e. whose worker kept dying.
+
+        Returns:
+            dict | None: The failed job
+        """
+        now = _now()
+        job = await self.collection.find_one_and_update(
+            {
+                "status": "running",
+                "leaseExpiresAt": {"$lt": now},
+                "attempts": {"$gte": JOB_MAX_ATTEMPTS},
+                "type": {"$in": list(self.handlers)},
+            },
+            {
+                "$set": {
+                    "status": "failed",
+                    "error": f"Worker stopped on each of {JOB_MAX_ATTEMPTS} attempts",
+                    "updatedAt": now,
+                    "finishedAt": now,
+                },
+                "$unset": {"leaseExpiresAt": ""},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is not None:
+            logger.error("Job %s failed: %s", job["_id"], job["error"])
+            jobs_finished.labels(job["type"], "failed").inc()
+            await self._on_failure(job)
+        return job
+
+    async def _on_failure(self, job: dict):
+        """Runs the failure handler of a job that will not be retried."""
+        on_failure = self.failure_handlers.get(job["type"])
+        if on_failure is None:
+            return
+        try:
+            await on_failure(job)
+        except Exception:
+            logger.exception("Failure handler of job %s failed", job["_id"])
+
+    async def _heartbeat(self, context: JobContext):
+        """Renews the job's lease until cancelled, so long stages are not taken over."""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                await context.renew_lease()
+            except Exception:
+                logger.exception("Failed to renew the lease of job %s", context.job["_id"])
+
+    async def _run(self, job: dict, worker_id: str):
+        context = JobContext(self.collection, job, worker_id)
+        jobs_in_progress.labels(job["type"]).inc()
+        heartbeat = asyncio.create_task(self._heartbeat(context))
+        try:
+            result = await self.handlers[job["type"]](job, context)
+            update = {"status": "completed", "stage": "done", "result": result, "error": None}
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back so the next start picks it up straight away
+            await self.collection.update_one(
+                {"_id": job["_id"], "workerId": worker_id},
+                {"$set": {"status": "queued", "stage": "queued", "updatedAt": _now(), "queuedAt": _now()},
+                 "$unset": {"leaseExpiresAt": ""}},
+            )
+            raise
+        except ServiceError as e:
+            # Invalid input: retrying would fail the same way
+            update = {"status": "failed", "error": e.detail}
+        except Exception as e:
+            logger.exception("Job %s failed on attempt %d", job["_id"], job["attempts"])
+            if job["attempts"] < JOB_MAX_ATTEMPTS:
+                update = {"status": "queued", "stage": "queued", "queuedAt": _now(), "error": str(e)}
+            else:
+                update = {"status": "failed", "error": str(e)}
+        finally:
+            heartbeat.cancel()
+            jobs_in_progress.labels(job["type"]).dec()
+        now = _now()
+        if update["status"] != "queued":
+            update["finishedAt"] = now
+        update["updatedAt"] = now
+        timing = context.stage_timing()
+        if context.stage:
+            job_stage_duration.labels(job["type"], context.stage).observe(timing[f"timings.{context.stage}"])
+        jobs_finished.labels(job["type"], "retried" if update["status"] == "queued" else update["status"]).inc()
+        await self.collection.update_one(
+            {"_id": job["_id"], "workerId": worker_id},
+            {"$set": {**update, **timing}, "$unset": {"leaseExpiresAt": ""}},
+        )
+        if update["status"] == "failed":
+            await self._on_failure(job)
+
+    async def _worker(self, index: int):
+        worker_id = f"{self._worker_prefix}-{index}"
+        while True:
+            try:
+                # Jobs out of attempts are failed first, so they are not left running forever
+                while await self._fail_abandoned() is not None:
+                    pass
+                job = await self._claim(worker_id)
+            except Exception:
+                logger.exception("Failed to claim a job")
+                job = None
+            if job is None:
+                # Sleep until a local enqueue wakes us, or poll for jobs queued elsewhere
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job, worker_id)
+
+    async def start(self):
+        """Starts the worker pool; queued and orphaned jobs from earlier runs are resumed."""
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+
+    async def stop(self):
+        """Stops the worker pool. Interrupted jobs are resumed after their lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+job_queue = JobQueue(jobs_collection_name)
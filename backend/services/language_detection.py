@@ -0,0 +1,147 @@
+import re
+from collections import Counter
+
+# Languages we have summary examples for; everything else is reported as 'other'
+LANGUAGES = ['python', 'java', 'c', 'other']
+
+# Only the head of the input is inspected, which is plenty to recognise a language
+MAX_SAMPLE_CHARS = 4000
+
+# Minimum score a language needs before we trust the guess over 'other'
+MIN_SCORE = 3.0
+
+# Syntax patterns that are strong evidence for one language, with their weights
+SYNTAX_RULES = {
+    'python': [
+        (r'^\s*def \w+\s*\(.*\)\s*(->\s*[\w\[\], .]+)?:\s*$', 3.0),
+        (r'^\s*class \w+(\(.*\))?:\s*$', 3.0),
+        (r'^\s*(from [\w.]+ )?import [\w., ]+$', 1.5),
+        (r'^\s*(if|elif|while|for|with|try|except|else|finally)\b.*:\s*$', 1.5),
+        (r'\bself\.\w+', 1.5),
+        (r'\bprint\(', 1.0),
+        (r'\b(None|True|False)\b', 0.5),
+        (r'__\w+__', 1.5),
+        (r'^\s*@\w+', 0.5),
+        (r'\bf"[^"\n]*\{', 1.0),
+    ],
+    'java': [
+        (r'\b(public|private|protected)\s+(static\s+)?(final\s+)?(class|interface|enum)\s+\w+', 4.0),
+        (r'\bpublic\s+static\s+void\s+main\s*\(\s*String', 5.0),
+        (r'\bSystem\.(out|err)\.print(ln|f)?\s*\(', 4.0),
+        (r'^\s*import\s+java(x)?\.[\w.*]+;', 4.0),
+        (r'^\s*package\s+[\w.]+;', 3.0),
+        (r'^\s*@(Override|Deprecated|FunctionalInterface|SuppressWarnings)\b', 3.0),
+        (r'\b(public|private|protected)\s+[\w<>\[\], ]+\s+\w+\s*\(', 2.0),
+        (r'\b(extends|implements)\s+\w+', 1.5),
+        (r'\b(String|Integer|ArrayList|HashMap|List|Map)\s*(<[^>]*>)?\s*\w+\s*=', 1.5),
+        (r'\bnew\s+\w+(<[^>]*>)?\s*\(', 1.0),
+        (r'\bthrows\s+\w+', 2.0),
+        (r'\b(int|long|double|char|boolean|String)\[\]\s*\w+', 2.0),
+        (r'\.length\b(?!\s*\()', 1.0),
+        (r'>>>=?', 1.5),
+    ],
+    'c': [
+        (r'^\s*#\s*include\s*[<"][\w./]+[>"]', 4.0),
+        (r'^\s*#\s*(define|ifndef|ifdef|endif|pragma)\b', 2.5),
+        (r'\bint\s+main\s*\(', 3.0),
+        (r'\b(printf|scanf|fprintf|malloc|calloc|free|memcpy|strlen)\s*\(', 2.0),
+        (r'\bstd::\w+', 3.0),
+        (r'\b(cout|cin|cerr)\s*(<<|>>)', 3.0),
+        (r'\busing\s+namespace\s+\w+;', 3.0),
+        (r'(?<=[\w)\]])->[A-Za-z_]', 1.0),
+        (r'\bstruct\s+\w+\s*\{', 1.5),
+        (r'\b(unsigned|size_t|nullptr|sizeof)\b', 1.0),
+        (r'\btemplate\s*<', 2.5),
+        (r'\b(char|int|void|float|double)\s*\*+\s*\w+', 1.5),
+    ],
+    'other': [
+        (r'\bfunction\s+\w*\s*\(', 2.5),
+        (r'\b(const|let|var)\s+\w+\s*=', 2.0),
+        (r'=>\s*[{(\w]', 1.5),
+        (r'\bconsole\.log\s*\(', 3.0),
+        (r'^\s*package\s+main\b', 4.0),
+        (r'\bfunc\s+\w+\s*\(', 3.0),
+        (r'(?<=[\w ]):=', 2.0),
+        (r'\bfn\s+\w+\s*\(', 3.0),
+        (r'\blet\s+mut\b', 3.0),
+        (r'^\s*(SELECT|INSERT|UPDATE|DELETE|CREATE TABLE)\b', 3.0),
+        (r'<(html|div|body|head|span)\b', 3.0),
+        (r'^\s*(puts|end|module|require)\b', 1.0),
+        (r'\$\w+\s*=', 1.5),
+    ],
+}
+
+# Reserved words mostly unique to one language; frequency adds soft evidence
+KEYWORDS = {
+    'python': {'def', 'elif', 'self', 'None', 'True', 'False', 'lambda', 'yield', 'pass', 'nonlocal', 'async', 'await', 'print', 'range', 'len', 'import', 'from', 'as', 'in', 'is', 'not', 'and', 'or'},
+    'java': {'public', 'private', 'protected', 'static', 'final', 'void', 'class', 'extends', 'implements', 'new', 'String', 'boolean', 'throws', 'interface', 'package', 'null', 'this', 'super', 'instanceof'},
+    'c': {'int', 'char', 'void', 'struct', 'unsigned', 'sizeof', 'typedef', 'include', 'define', 'printf', 'malloc', 'free', 'NULL', 'std', 'cout', 'endl', 'namespace', 'template', 'nullptr', 'auto'},
+    'other': {'function', 'const', 'let', 'var', 'console', 'undefined', 'func', 'fn', 'mut', 'impl', 'puts', 'end', 'SELECT', 'FROM', 'WHERE', 'echo', 'require', 'module', 'export'},
+}
+
+_COMPILED_RULES = {
+    language: [(re.compile(pattern, re.MULTILINE), weight) for pattern, weight in rules]
+    for language, rules in SYNTAX_RULES.items()
+}
+_TOKEN_PATTERN = re.compile(r'[A-Za-z_]\w*')
+
+# Each rule contributes at most this many matches, so one repeated line can't dominate
+_MAX_RULE_HITS = 4
+
+
+def language_scores(text: str) -> dict:
+    """
+    Scores how strongly the text looks like each supported language.
+
+    Args:
+        text (str): Source code (or any text) to analyse
+
+    Returns:
+        dict: Mapping of language name to a non-negative score
+    """
+    sample = (text or '')[:MAX_SAMPLE_CHARS]
+    scores = dict.fromkeys(LANGUAGES, 0.0)
+
+    # Syntax heuristics
+    for language, rules in _COMPILED_RULES.items():
+        for pattern, weight in rules:
+            hits = 0
+            for _ in pattern.finditer(sample):
+                hits += 1
+                if hits == _MAX_RULE_HITS:
+                    break
+            scores[language] += weight * hits
+
+    # Keyword frequency, normalised by the number of tokens in the sample
+    tokens = Counter(_TOKEN_PATTERN.findall(sample))
+    total = sum(tokens.values())
+    if total:
+        for language, keywords in KEYWORDS.items():
+            hits = sum(count for token, count in tokens.items() if token in keywords)
+            scores[language] += 10.0 * hits / total
+
+    # Semicolon-terminated lines point away from Python
+    lines = [line for line in sample.splitlines() if line.strip()]
+    if lines:
+        semicolon_ratio = sum(1 for line in lines if line.rstrip().endswith((';', '{', '}'))) / len(lines)
+        scores['python'] -= 4.0 * semicolon_ratio
+        scores['python'] = max(scores['python'], 0.0)
+
+    return scores
+
+
+def detect_language(text: str) -> str:
+    """
+    Determines the programming language of the given code without calling an LLM.
+
+    Args:
+        text (str): The code input to analyse
+
+    Returns:
+        str: One of 'python', 'java', 'c' or 'other'
+    """
+    scores = language_scores(text)
+    language = max(scores, key=scores.get)
+    if scores[language] < MIN_SCORE:
+        return 'other'
+    return language
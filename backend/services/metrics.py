@@ -0,0 +1,174 @@
+import time
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily
+from starlette.routing import Match
+
+# Registry served by /metrics; kept separate from the library default so only application metrics are exported
+registry = CollectorRegistry()
+
+# Latency buckets (seconds) for calls to the LLM, which take from under a second to minutes
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+# Latency buckets (seconds) for in-process work such as language detection
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+# HTTP requests, labelled by route template so IDs in paths do not create new series
+http_requests = Counter(
+    "briefly_http_requests_total", "HTTP requests handled",
+    ["method", "route", "status"], registry=registry,
+)
+http_request_duration = Histogram(
+    "briefly_http_request_duration_seconds", "Time to handle an HTTP request, until the response body is sent",
+    ["method", "route"], registry=registry,
+)
+http_requests_in_progress = Gauge(
+    "briefly_http_requests_in_progress", "HTTP requests being handled",
+    ["method", "route"], registry=registry,
+)
+
+# Mistral chat completions
+llm_request_duration = Histogram(
+    "briefly_llm_request_duration_seconds", "Time spent waiting for a Mistral chat completion",
+    ["model", "operation", "outcome"], buckets=LLM_BUCKETS, registry=registry,
+)
+llm_requests_in_progress = Gauge(
+    "briefly_llm_requests_in_progress", "Mistral chat completions in flight",
+    ["model"], registry=registry,
+)
+llm_tokens = Counter(
+    "briefly_llm_tokens_total", "Tokens used by Mistral chat completions, as reported by the API",
+    ["model", "kind"], registry=registry,
+)
+llm_rate_limit_wait = Histogram(
+    "briefly_llm_rate_limit_wait_seconds", "Time a Mistral request waited for rate limit quota",
+    ["model"], buckets=(0, 0.1, 0.5, 1, 5, 15, 30, 60), registry=registry,
+)
+summary_duration = Histogram(
+    "briefly_summary_duration_seconds", "Time to produce a summary, including chunked summarisation of long input",
+    ["input_type", "outcome"], buckets=LLM_BUCKETS, registry=registry,
+)
+
+# Local language classifier
+language_detection_duration = Histogram(
+    "briefly_language_detection_duration_seconds", "Time to classify the language of code input",
+    ["language"], buckets=FAST_BUCKETS, registry=registry,
+)
+
+# GridFS transfers
+gridfs_operation_duration = Histogram(
+    "briefly_gridfs_operation_duration_seconds", "Time to store or read a file in GridFS",
+    ["operation"], registry=registry,
+)
+gridfs_bytes = Counter(
+    "briefly_gridfs_bytes_total", "Bytes written to or read from GridFS",
+    ["operation"], registry=registry,
+)
+
+# Database commands, recorded by the query profiler
+mongo_command_duration = Histogram(
+    "briefly_mongo_command_duration_seconds", "Time to run a MongoDB command",
+    ["command", "collection"], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5), registry=registry,
+)
+
+# Background jobs
+jobs_finished = Counter(
+    "briefly_jobs_total", "Background jobs that finished, were retried or failed",
+    ["kind", "outcome"], registry=registry,
+)
+job_stage_duration = Histogram(
+    "briefly_job_stage_duration_seconds", "Time background jobs spend in each stage, including time queued",
+    ["kind", "stage"], buckets=LLM_BUCKETS, registry=registry,
+)
+jobs_in_progress = Gauge(
+    "briefly_jobs_in_progress", "Background jobs being run by this process",
+    ["kind"], registry=registry,
+)
+
+
+class StatsCollector:
+    """
+    Exports an existing in-process stats dict (e.g. cache_stats) as a counter,
+    one series per key, read at scrape time.
+    """
+
+    def __init__(self, name: str, documentation: str, stats: dict):
+        self.name = name
+        self.documentation = documentation
+        self.stats = stats
+
+    def collect(self):
+        counter = CounterMetricFamily(self.name, self.documentation, labels=["event"])
+        for event, value in self.stats.items():
+            counter.add_metric([event], value)
+        yield counter
+
+
+def register_stats(name: str, documentation: str, stats: dict):
+    """
+    Adds an in-process stats dict to the exported metrics.
+
+    Args:
+        name (str): Metric name, exported with a '_total' suffix
+        documentation (str): Help text
+        stats (dict): Counters keyed by event name
+    """
+    registry.register(StatsCollector(name, documentation, stats))
+
+
+def latest_metrics() -> tuple:
+    """
+    Renders every registered metric in the Prometheus text format.
+
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def route_template(app, scope) -> str:
+    """
+    Finds the path template of the route a request will be handled by.
+
+    Returns:
+        str: e.g. '/summary/{summary_id}', or 'unmatched' when no route matches
+    """
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the count, latency and concurrency of HTTP requests.
+    Latency runs until the last body chunk is sent, so streamed responses
+    (downloads, server-sent events) are measured in full.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope["app"], scope)
+        response_status = 500
+
+        async def send_with_status(message):
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+            await send(message)
+
+        in_progress = http_requests_in_progress.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.labels(method, route).observe(time.perf_counter() - started)
+            http_requests.labels(method, route, str(response_status)).inc()
+            in_progress.dec()
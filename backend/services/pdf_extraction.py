@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from PyPDF2 import PdfReader
+from PyPDF2.errors import PdfReadError
+from exceptions import ServiceError
+
+logger = logging.getLogger(__name__)
+
+# Worker processes used for PDF text extraction
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', str(os.cpu_count() or 2)))
+# Pages handed to a worker per task; smaller ranges spread work more evenly, larger ones cut per-task overhead
+PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', '16'))
+# Per-document limits: documents over the page limit are rejected, extraction past the time limit is
+# stopped, in the worker processes as well, so slow documents cannot hold on to the pool
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', '1000'))
+PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv('PDF_EXTRACT_TIMEOUT_SECONDS', '120'))
+
+_pdf_pool = None
+# Reader for the document a worker process handled last, so consecutive ranges skip re-parsing it
+_worker_reader = {}
+
+
+class ExtractionTimeout(Exception):
+    """Raised in a worker process when a document's extraction deadline has passed."""
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+@contextmanager
+def time_limit(deadline: float):
+    """
+    Interrupts the enclosed work once the wall-clock deadline passes.
+
+    Args:
+        deadline (float): time.time() by which the work must finish
+
+    Raises:
+        ExtractionTimeout: If the deadline has passed, or passes before the work is done
+
+    Notes:
+        Uses SIGALRM, so the work is only interrupted mid-way in the main thread of a
+        process on Unix, as in the pool's workers. Elsewhere the deadline is checked
+        before the work starts and between pages.
+    """
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise ExtractionTimeout()
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def open_reader(path: str) -> PdfReader:
+    """
+    Opens a PDF in a worker process, reusing the reader of the previous task for the same file.
+
+    Args:
+        path (str): Path of the PDF file
+
+    Returns:
+        PdfReader: Reader for the document
+    """
+    key = (path, os.stat(path).st_mtime_ns)
+    if _worker_reader.get("key") != key:
+        _worker_reader.clear()
+        _worker_reader.update(key=key, reader=PdfReader(path))
+    return _worker_reader["reader"]
+
+
+def count_pages(path: str, deadline: float) -> int:
+    """
+    Counts the pages of a PDF. Runs in a worker process.
+
+    Args:
+        path (str): Path of the PDF file
+        deadline (float): time.time() by which the document must be extracted
+
+    Returns:
+        int: Number of pages
+
+    Raises:
+        ExtractionTimeout: If the deadline passes first
+    """
+    with time_limit(deadline):
+        return len(open_reader(path).pages)
+
+
+def extract_page_range(path: str, start: int, end: int, deadline: float) -> list:
+    """
+    Extracts the text of a range of pages. Runs in a worker process.
+
+    Args:
+        path (str): Path of the PDF file
+        start (int): First page index (inclusive)
+        end (int): Last page index (exclusive)
+        deadline (float): time.time() by which the document must be extracted
+
+    Returns:
+        list: (text, seconds) for each page in the range, in order
+
+    Raises:
+        ExtractionTimeout: If the deadline passes first
+    """
+    pages = []
+    with time_limit(deadline):
+        pdf_reader = open_reader(path)
+        for page_num in range(start, end):
+            if time.time() > deadline:
+                raise ExtractionTimeout()
+            page_started = time.perf_counter()
+            text = pdf_reader.pages[page_num].extract_text()
+            pages.append((text, round(time.perf_counter() - page_started, 4)))
+    return pages
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """
+    Returns the shared extraction process pool, creating it on first use.
+
+    Notes:
+        Workers are spawned rather than forked so they do not inherit the
+        event loop, database client threads or open sockets of the app.
+    """
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=PDF_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool():
+    """Stops the extraction worker processes, abandoning queued work."""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+async def extract_pdf_text(path: str) -> dict:
+    """
+    Extracts the text of a PDF by fanning page ranges out to the process pool.
+
+    Args:
+        path (str): Path of the PDF file
+
+    Returns:
+        dict: 'text' (pages joined in order), 'pages' (page count),
+              'page_timings' (seconds per page) and 'seconds' (wall time)
+
+    Raises:
+        ServiceError: If the PDF cannot be read, has more than PDF_MAX_PAGES pages,
+                      or takes longer than PDF_EXTRACT_TIMEOUT_SECONDS to extract
+
+    Notes:
+        The time limit is enforced inside the workers: tasks still running at the
+        deadline are interrupted and tasks starting after it return at once, so a
+        slow document frees the pool when its request gives up on it.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pdf_pool()
+    started = time.perf_counter()
+    deadline = time.time() + PDF_EXTRACT_TIMEOUT_SECONDS
+    timed_out = ServiceError(f"PDF extraction took longer than {PDF_EXTRACT_TIMEOUT_SECONDS:g} seconds", status_code=422)
+    futures = []
+    try:
+        page_count = await loop.run_in_executor(pool, count_pages, path, deadline)
+        if page_count > PDF_MAX_PAGES:
+            raise ServiceError(f"PDF has {page_count} pages; the limit is {PDF_MAX_PAGES}", status_code=413)
+
+        ranges = [
+            (start, min(start + PDF_PAGES_PER_TASK, page_count))
+            for start in range(0, page_count, PDF_PAGES_PER_TASK)
+        ]
+        futures = [loop.run_in_executor(pool, extract_page_range, path, start, end, deadline) for start, end in ranges]
+        # The workers stop at the deadline themselves; the margin covers handing their results back
+        results = await asyncio.wait_for(asyncio.gather(*futures), timeout=max(0.0, deadline - time.time()) + 5)
+    except (ExtractionTimeout, asyncio.TimeoutError):
+        raise timed_out
+    except PdfReadError as e:
+        raise ServiceError(f"Unable to read PDF: {e}", status_code=400)
+    finally:
+        # Drop the ranges no worker has picked up yet, e.g. after another range failed
+        for future in futures:
+            future.cancel()
+
+    pages = [page for result in results for page in result]
+    extraction = {
+        "text": "".join(text for text, _ in pages),
+        "pages": page_count,
+        "page_timings": [seconds for _, seconds in pages],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logger.info("Extracted %d PDF pages in %.3fs", page_count, extraction["seconds"])
+    return extraction
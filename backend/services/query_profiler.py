@@ -0,0 +1,277 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import bson
+from pymongo import monitoring
+from services.metrics import mongo_command_duration
+
+logger = logging.getLogger(__name__)
+
+# Whether database commands are profiled at all; off by default, as the listener runs on every command
+MONGO_PROFILER_ENABLED = os.getenv('MONGO_PROFILER_ENABLED', 'false').lower() == 'true'
+# Commands slower than this are logged along with their query plan and their reply size measured
+MONGO_SLOW_QUERY_MS = float(os.getenv('MONGO_SLOW_QUERY_MS', '100'))
+# Each slow query shape is explained at most once per interval, so a slow hot query does not flood the server
+MONGO_SLOW_EXPLAIN_INTERVAL_SECONDS = float(os.getenv('MONGO_SLOW_EXPLAIN_INTERVAL_SECONDS', '300'))
+# Distinct query shapes tracked; commands of further shapes are only counted as untracked
+MONGO_PROFILER_MAX_SHAPES = int(os.getenv('MONGO_PROFILER_MAX_SHAPES', '1000'))
+
+# Commands that are not application queries, including the profiler's own explains
+IGNORED_COMMANDS = {
+    "explain", "hello", "ismaster", "isMaster", "ping", "buildInfo", "endSessions",
+    "saslStart", "saslContinue", "authenticate", "killCursors", "listIndexes", "createIndexes",
+}
+# Commands the server can explain
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Fields added to commands by the driver that must not be passed back inside an explain
+DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "autocommit",
+                 "startTransaction", "apiVersion", "apiStrict", "apiDeprecationErrors"}
+
+
+def shape_of(value):
+    """
+    Replaces the values of a query document by '?', keeping its field and operator structure.
+
+    Args:
+        value: Query document, or a value inside one
+
+    Returns:
+        The document's shape, e.g. {'userId': '?', 'createdAt': {'$lt': '?'}}
+    """
+    if isinstance(value, dict):
+        return {key: shape_of(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)) and value and all(isinstance(item, dict) for item in value):
+        return [shape_of(item) for item in value]
+    return "?"
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    """Returns the name of the collection a command runs against."""
+    collection = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return collection if isinstance(collection, str) else "-"
+
+
+def query_shape(command_name: str, command: dict) -> str:
+    """
+    Describes a command with its literal values removed, so repeated runs of a query group together.
+
+    Args:
+        command_name (str): e.g. 'find'
+        command (dict): The command document sent to the server
+
+    Returns:
+        str: e.g. 'find summaries {"userId": "?"} sort {"createdAt": -1, "_id": -1}'
+    """
+    parts = [command_name, command_collection(command_name, command)]
+    if command_name == "aggregate":
+        stages = []
+        for stage in command.get("pipeline", []):
+            name = next(iter(stage), "")
+            stages.append(f"{name} {json.dumps(shape_of(stage[name]))}" if name == "$match" else name)
+        parts.append("[" + ", ".join(stages) + "]")
+    else:
+        query = {
+            "find": lambda: command.get("filter"),
+            "count": lambda: command.get("query"),
+            "distinct": lambda: command.get("query"),
+            "findAndModify": lambda: command.get("query"),
+            "update": lambda: (command.get("updates") or [{}])[0].get("q"),
+            "delete": lambda: (command.get("deletes") or [{}])[0].get("q"),
+        }.get(command_name, lambda: None)()
+        if query is not None:
+            parts.append(json.dumps(shape_of(query)))
+        if command.get("sort"):
+            parts.append("sort " + json.dumps(dict(command["sort"])))
+    return " ".join(parts)
+
+
+def returned_documents(reply: dict) -> int:
+    """Counts the documents a command returned or affected."""
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if "value" in reply:
+        return 0 if reply["value"] is None else 1
+    if "values" in reply:
+        return len(reply["values"])
+    return reply.get("n", 0)
+
+
+def plan_summary(explanation: dict) -> list:
+    """
+    Lists the winning plan stages of a find or aggregate explain result.
+
+    Returns:
+        list: Stage names, e.g. ['FETCH', 'IXSCAN']
+    """
+    # Import inside the function to avoid circular import issues
+    from services.indexes import winning_plan_stages
+
+    planner = explanation.get("queryPlanner")
+    if planner is None and explanation.get("stages"):
+        planner = explanation["stages"][0].get("$cursor", {}).get("queryPlanner")
+    return winning_plan_stages((planner or {}).get("winningPlan", {}))
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """
+    Command listener timing every database command by query shape.
+
+    Records the count, total and maximum duration and documents of each shape,
+    and the reply bytes of its slow commands. Commands slower than
+    MONGO_SLOW_QUERY_MS are logged, and
+    once the profiler is started on the application's event loop they are
+    explained there in the background so the log shows which plan was used.
+    """
+
+    def __init__(self, max_shapes: int = MONGO_PROFILER_MAX_SHAPES):
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._shapes = {}
+        self._explained_at = {}
+        self.untracked = 0
+        self._client = None
+        self._loop = None
+        self._queue = None
+        self._task = None
+
+    # Listener callbacks run on the driver's threads and must not block
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        shape = query_shape(event.command_name, event.command)
+        # Only explainable commands keep their document, in case they turn out slow
+        command = event.command if event.command_name in EXPLAINABLE_COMMANDS else None
+        collection = command_collection(event.command_name, event.command)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (shape, collection, event.database_name, command)
+
+    def succeeded(self, event):
+        # The driver only hands over the decoded reply; re-encoding it to size it is only worth it for slow commands
+        slow = event.duration_micros >= MONGO_SLOW_QUERY_MS * 1000
+        self._finish(event, returned_documents(event.reply), len(bson.encode(event.reply)) if slow else 0)
+
+    def failed(self, event):
+        self._finish(event, 0, 0)
+
+    def _finish(self, event, documents: int, size: int):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+            if pending is None:
+                return
+            shape, collection, database_name, command = pending
+            milliseconds = event.duration_micros / 1000
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    self.untracked += 1
+                    return
+                stats = self._shapes[shape] = {
+                    "shape": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "documents": 0, "bytes": 0, "slow": 0,
+                }
+            stats["count"] += 1
+            stats["total_ms"] += milliseconds
+            stats["max_ms"] = max(stats["max_ms"], milliseconds)
+            stats["documents"] += documents
+            stats["bytes"] += size
+            slow = milliseconds >= MONGO_SLOW_QUERY_MS
+            if slow:
+                stats["slow"] += 1
+        mongo_command_duration.labels(event.command_name, collection).observe(milliseconds / 1000)
+
+        if slow:
+            logger.warning("Slow %s took %.1f ms (%d documents, %d bytes)", shape, milliseconds, documents, size)
+            if command is not None and self._explain_due(shape):
+                self._schedule_explain(shape, database_name, command, milliseconds)
+
+    def _explain_due(self, shape: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(shape)
+            if last is not None and now - last < MONGO_SLOW_EXPLAIN_INTERVAL_SECONDS:
+                return False
+            self._explained_at[shape] = now
+        return True
+
+    def _schedule_explain(self, shape, database_name, command, milliseconds):
+        if self._loop is None or self._loop.is_closed():
+            return
+        item = (shape, database_name, command, milliseconds)
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, item)
+        except RuntimeError:
+            # The loop shut down in the meantime
+            pass
+
+    def _enqueue(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            logger.debug("Dropping explain of %s; the explain queue is full", item[0])
+
+    async def _explain_worker(self):
+        while True:
+            shape, database_name, command, milliseconds = await self._queue.get()
+            explain = {key: value for key, value in command.items() if key not in DRIVER_FIELDS}
+            try:
+                explanation = await self._client[database_name].command(
+                    {"explain": explain, "verbosity": "queryPlanner"}
+                )
+                logger.warning("Plan of slow %s (%.1f ms): %s", shape, milliseconds, plan_summary(explanation))
+            except Exception as e:
+                logger.warning("Could not explain slow %s: %s", shape, e)
+
+    def start(self, client):
+        """
+        Starts explaining slow commands in the background on the running event loop.
+
+        Args:
+            client (AsyncIOMotorClient): Client used to run the explain commands
+        """
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=100)
+        self._task = asyncio.create_task(self._explain_worker())
+
+    async def stop(self):
+        """Stops explaining slow commands; timing continues."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._loop = None
+
+    def top(self, limit: int = 10, order_by: str = "total_ms") -> list:
+        """
+        Returns the most expensive query shapes seen so far.
+
+        Args:
+            limit (int): Number of shapes to return
+            order_by (str): 'total_ms', 'max_ms', 'mean_ms', 'count', 'documents' or 'bytes'
+
+        Returns:
+            list: Stats of each shape, including its mean duration, most expensive first
+        """
+        with self._lock:
+            shapes = [
+                {**stats, "total_ms": round(stats["total_ms"], 3), "max_ms": round(stats["max_ms"], 3),
+                 "mean_ms": round(stats["total_ms"] / stats["count"], 3)}
+                for stats in self._shapes.values()
+            ]
+        return sorted(shapes, key=lambda stats: stats[order_by], reverse=True)[:limit]
+
+    def reset(self):
+        """Forgets every recorded query shape."""
+        with self._lock:
+            self._shapes.clear()
+            self._explained_at.clear()
+            self.untracked = 0
+
+
+query_profiler = QueryProfiler()
@@ -0,0 +1,224 @@
+import asyncio
+import datetime
+import os
+import time
+from pymongo.errors import DuplicateKeyError
+
+# Default Mistral quotas (requests and tokens per minute) applied to every model
+# unless overridden, e.g. MISTRAL_RPM_OPEN_CODESTRAL_MAMBA=30
+DEFAULT_REQUESTS_PER_MINUTE = int(os.getenv('MISTRAL_RPM', '60'))
+DEFAULT_TOKENS_PER_MINUTE = int(os.getenv('MISTRAL_TPM', '500000'))
+
+# 'local' limits each worker process on its own, 'mongo' shares the quota across workers
+RATE_LIMIT_BACKEND = os.getenv('MISTRAL_RATE_LIMIT_BACKEND', 'local').lower()
+
+
+def estimate_tokens(text) -> int:
+    """
+    Estimates the number of tokens in a piece of text or a list of chat messages.
+
+    Args:
+        text (str | list): Raw text, or chat messages with a 'content' field
+
+    Returns:
+        int: Approximate token count (roughly four characters per token)
+    """
+    if isinstance(text, list):
+        text = "".join(message.get("content") or "" for message in text)
+    return max(1, len(text or "") // 4)
+
+
+def model_limits(model: str) -> tuple:
+    """
+    Resolves the requests/min and tokens/min quota configured for a model.
+
+    Args:
+        model (str): Mistral model name (e.g. 'open-mistral-nemo')
+
+    Returns:
+        tuple: (requests_per_minute, tokens_per_minute)
+    """
+    suffix = model.upper().replace('-', '_')
+    rpm = int(os.getenv(f'MISTRAL_RPM_{suffix}', DEFAULT_REQUESTS_PER_MINUTE))
+    tpm = int(os.getenv(f'MISTRAL_TPM_{suffix}', DEFAULT_TOKENS_PER_MINUTE))
+    return rpm, tpm
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens and refills continuously
+    at `capacity` tokens per `period` seconds.
+    """
+
+    def __init__(self, capacity: int, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Returns how many seconds to wait before `amount` tokens are available."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """Removes tokens from the bucket. The balance may go negative to record overuse."""
+        self._refill()
+        self.tokens -= amount
+
+
+class LocalRateLimiter:
+    """
+    Process-wide limiter keeping one request bucket and one token bucket per model.
+    Callers only sleep for as long as the buckets actually require.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._locks = {}
+
+    def _get(self, model: str):
+        if model not in self._buckets:
+            rpm, tpm = model_limits(model)
+            self._buckets[model] = (TokenBucket(rpm), TokenBucket(tpm))
+            self._locks[model] = asyncio.Lock()
+        return self._buckets[model], self._locks[model]
+
+    async def acquire(self, model: str, tokens: int):
+        """
+        Waits until the model has quota for one more request of `tokens` tokens, then claims it.
+
+        Args:
+            model (str): Mistral model the request is sent to
+            tokens (int): Estimated tokens the request will use
+
+        Returns:
+            None: The buckets need no reference to settle against
+        """
+        (requests, token_bucket), lock = self._get(model)
+        # Serialise waiters per model so requests are released in arrival order
+        async with lock:
+            while True:
+                wait = max(requests.wait_time(1), token_bucket.wait_time(tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            requests.consume(1)
+            token_bucket.consume(tokens)
+
+    async def settle(self, model: str, estimated: int, actual: int, window=None):
+        """
+        Corrects the token bucket once the real usage of a request is known.
+
+        Args:
+            model (str): Mistral model the request was sent to
+            estimated (int): Tokens claimed in acquire()
+            actual (int): Tokens reported by the API
+            window: Value returned by acquire(); unused by the local buckets
+        """
+        (_, token_bucket), _ = self._get(model)
+        token_bucket.consume(actual - estimated)
+
+
+class MongoRateLimiter:
+    """
+    Cross-worker limiter backed by per-minute counter documents in MongoDB.
+    A request is admitted by atomically incrementing the current window's counters
+    only while they stay within quota; a full window makes callers wait for the next.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._index_ready = False
+
+    async def _ensure_index(self):
+        if not self._index_ready:
+            # Let MongoDB drop finished windows on its own
+            await self.collection.create_index("expiresAt", expireAfterSeconds=0)
+            self._index_ready = True
+
+    async def _increment(self, model: str, window: int, tokens: int, rpm: int, tpm: int) -> bool:
+        try:
+            await self.collection.update_one(
+                {
+                    "_id": f"{model}:{window}",
+                    "requests": {"$lte": rpm - 1},
+                    "tokens": {"$lte": max(0, tpm - tokens)},
+                },
+                {
+                    "$inc": {"requests": 1, "tokens": tokens},
+                    "$setOnInsert": {
+                        "expiresAt": datetime.datetime.fromtimestamp((window + 2) * 60, datetime.timezone.utc),
+                    },
+                },
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            # The window document exists but the quota filter did not match: window is full
+            return False
+
+    async def acquire(self, model: str, tokens: int):
+        """
+        Waits until the shared quota for the model admits one more request, then claims it.
+
+        Args:
+            model (str): Mistral model the request is sent to
+            tokens (int): Estimated tokens the request will use
+
+        Returns:
+            int: The minute window that admitted the request, to be passed to settle()
+        """
+        await self._ensure_index()
+        rpm, tpm = model_limits(model)
+        tokens = min(tokens, tpm)
+        while True:
+            now = time.time()
+            window = int(now // 60)
+            if await self._increment(model, window, tokens, rpm, tpm):
+                return window
+            await asyncio.sleep((window + 1) * 60 - now)
+
+    async def settle(self, model: str, estimated: int, actual: int, window: int):
+        """
+        Records the difference between estimated and real token usage in the window that admitted the request.
+
+        Args:
+            model (str): Mistral model the request was sent to
+            estimated (int): Tokens claimed in acquire()
+            actual (int): Tokens reported by the API
+            window (int): Window returned by acquire()
+
+        Notes:
+            The correction is charged to the admitting window even after the minute has
+            rolled over, so a long request cannot shift its usage onto a later window.
+            Windows that have already expired are left alone.
+        """
+        await self.collection.update_one(
+            {"_id": f"{model}:{window}"},
+            {"$inc": {"tokens": actual - estimated}},
+        )
+
+
+def create_rate_limiter():
+    """
+    Builds the limiter selected by MISTRAL_RATE_LIMIT_BACKEND.
+
+    Returns:
+        LocalRateLimiter | MongoRateLimiter: Limiter shared by every AI call in this process
+    """
+    if RATE_LIMIT_BACKEND == 'mongo':
+        from config.database import db
+        return MongoRateLimiter(db["rate_limits"])
+    return LocalRateLimiter()
+
+
+rate_limiter = create_rate_limiter()
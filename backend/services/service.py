@@ -5,7 +5,7 @@ from models.models import User, Summary
 from config.database import users_collection_name, summaries_collection_name, grid_fs, shared_summaries_collection_name
 from schema.schema import *
 from exceptions import ServiceError, NotFoundError, ValidationError
-from gridfs import GridFS
+from gridfs.errors import NoFile
 from PyPDF2 import PdfReader
 import json
 import datetime
@@ -13,7 +13,8 @@ import jwt
 from fastapi import HTTPException, UploadFile
 import re
 from fastapi import UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response
+import email.utils
 from bson import ObjectId
 from mistralai import Mistral
 from config.database import grid_fs
@@ -21,18 +22,66 @@ from bson import ObjectId
 from io import BytesIO
 from docx import Document
 import examples.code_summary_examples as code_examples
-from services.utils import extract_text_from_pdf, clean, get_all_examples_for_language, regenerate_feedback, extract_text_from_file
+from services.utils import clean, get_all_examples_for_language, regenerate_feedback, extract_text_from_file, grid_out_content_type
 from services.calls_to_ai import complete_chat, call_to_AI, regenerate_chat_response, prompts
+from services.summary_cache import cached_call_to_AI, cache_examples, summary_cache_key, get_cached_summary, store_cached_summary, SUMMARY_CACHE_MAX_ENTRIES
+from services.calls_to_ai import stream_summary
+from services.utils import parse_chat_content, extract_text_from_stored_file, store_extracted_text, encode_cursor, keyset_filter
+from services.utils import parse_range_header, etag_matches, read_range
+from services.jobs import job_queue, JobContext
+from services.metrics import gridfs_operation_duration, gridfs_bytes
+from services.query_profiler import query_profiler, MONGO_SLOW_QUERY_MS
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+import asyncio
+import time
 # Load environment variables
 load_dotenv()
 
 # Replace hardcoded values with environment variables
 SECRET_KEY = os.getenv('SECRET_KEY')
 api_key = os.getenv('MISTRAL_API_KEY')
+# Key required by the /admin endpoints; they are disabled when unset
+ADMIN_API_KEY = os.getenv('ADMIN_API_KEY')
 
 if not SECRET_KEY or not api_key:
     raise ValueError("Missing required environment variables. Please check your .env file.")
 
+# Job type for summarising uploaded files in the background
+SUMMARY_UPLOAD_JOB = "summary_upload"
+
+# Fields of a joined share record used by shared_summary_serialiser
+SHARED_SUMMARY_PROJECTION = {
+    "shared_at": 1,
+    "summary._id": 1, "summary.title": 1, "summary.type": 1, "summary.uploadType": 1,
+    "summary.outputData": 1, "summary.initialData": 1, "summary.createdAt": 1,
+    "summary.filedata.filename": 1, "summary.filedata.file_id": 1,
+    "sender.email": 1,
+}
+# Fields of a summary list entry; the full text is left to service_get_summary()
+SUMMARY_PREVIEW_CHARS = 200
+SUMMARY_LIST_PROJECTION = {
+    "userId": 1, "type": 1, "uploadType": 1, "title": 1, "createdAt": 1,
+    "filedata.filename": 1, "filedata.file_id": 1,
+    "preview": {"$substrCP": [{"$ifNull": ["$outputData", ""]}, 0, SUMMARY_PREVIEW_CHARS]},
+}
+# Largest number of items accepted by batch endpoints, and how many are summarised at once
+SUMMARY_BATCH_MAX_ITEMS = int(os.getenv('SUMMARY_BATCH_MAX_ITEMS', '50'))
+SUMMARY_BATCH_CONCURRENCY = int(os.getenv('SUMMARY_BATCH_CONCURRENCY', '4'))
+# Most recipients accepted by a single bulk share
+SHARE_BULK_MAX_RECIPIENTS = int(os.getenv('SHARE_BULK_MAX_RECIPIENTS', '100'))
+# Largest page size accepted by paginated list endpoints
+MAX_PAGE_SIZE = 100
+# Default page size for search results
+SEARCH_PAGE_SIZE = 20
+
+# Bytes read from GridFS per block when serving downloads
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('DOWNLOAD_CHUNK_SIZE', str(1024 * 1024)))
+
+# Largest accepted upload, and how much of it is read from the request at a time
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(50 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(1024 * 1024)))
+
 # Authentication functions
 def create_access_token(data: dict, expires_delta: datetime.timedelta):
     """
@@ -52,9 +101,9 @@ def create_access_token(data: dict, expires_delta: datetime.timedelta):
     return encoded_jwt
 
 # User management functions
-def service_create_new_user(user: User):
+async def service_create_new_user(user: User):
     """
-    Creates a new user if email and phone are unique.
+    Creates a new user if the email is not registered yet.
     
     Args:
         user (User): User object containing email, phone, and other details
@@ -63,23 +112,27 @@ def service_create_new_user(user: User):
         dict: Message and userId of created user
     
     Raises:
-        ServiceError: If user already exists
+        ServiceError: If a user with this email already exists (409)
     """
-    # Check for existing user to prevent duplicates
-    existing_user = users_collection_name.find_one({'email': user.email, 'phone': user.phone})
+    # Check for existing user to prevent duplicates; one account per email, as enforced by the email_unique index
+    existing_user = await users_collection_name.find_one({'email': user.email}, {'_id': 1})
     if existing_user:
         raise ServiceError("User Already Exists", status_code=409)
 
     # Generate unique ID and insert user
     user_data = dict(user)
     user_data['_id'] = str(uuid.uuid4())
-    users_collection_name.insert_one(user_data)
+    try:
+        await users_collection_name.insert_one(user_data)
+    except DuplicateKeyError:
+        # A concurrent signup with the same email won the race
+        raise ServiceError("User Already Exists", status_code=409)
     return {"message": "User created successfully", "userId": user_data['_id']}
 
-def service_verify_user(obj: User) -> dict:
+async def service_verify_user(obj: User) -> dict:
     """Verifies user credentials and returns auth token"""
     # Find user by email
-    user = users_collection_name.find_one({'email': obj.email})
+    user = await users_collection_name.find_one({'email': obj.email})
     if user is None:
         raise NotFoundError("Account Does Not Exist")
     
@@ -93,44 +146,270 @@ def service_verify_user(obj: User) -> dict:
     return {'auth_token': token, 'user': user_dict}  
 
 # Summary management functions
-def service_user_summaries(userId: str) -> list:
-    """Retrieves all summaries for a user, sorted by creation date"""
-    # Query and sort summaries
-    summaries = summaries_collection_name.find({'userId': userId}).sort("createdAt", -1)
-    summary_list = summary_list_serialiser(summaries)
-    if not summary_list:
-        return []
-    return summary_list
-
-def service_create_summary(summary: Summary):
+async def service_user_summaries(userId: str, limit: int = None, cursor: str = None) -> dict:
+    """
+    Retrieves a user's summaries, newest first.
+    
+    Args:
+        userId (str): ID of the user
+        limit (int, optional): Page size; when given, pages hold list entries with a
+                               short preview instead of the full input and output text
+        cursor (str, optional): next_cursor from the previous page
+    
+    Returns:
+        dict: 'summaries' and 'next_cursor' (None on the last page)
+    
+    Raises:
+        ValidationError: If the cursor is malformed
+    """
+    if not limit:
+        # Unpaged: every summary with its full text
+        summaries = await summaries_collection_name.find({'userId': userId}).sort("createdAt", -1).to_list(length=None)
+        return {"summaries": summary_list_serialiser(summaries), "next_cursor": None}
+
+    # Keyset pagination on (createdAt, _id), served by the userId_createdAt_id index
+    query = {'userId': userId}
+    if cursor:
+        query.update(keyset_filter("createdAt", cursor))
+    summaries = await summaries_collection_name.find(query, SUMMARY_LIST_PROJECTION) \
+        .sort([("createdAt", -1), ("_id", -1)]) \
+        .limit(limit + 1) \
+        .to_list(length=None)
+
+    next_cursor = None
+    if len(summaries) > limit:
+        summaries = summaries[:limit]
+        next_cursor = encode_cursor(summaries[-1]["createdAt"], summaries[-1]["_id"])
+    return {"summaries": [summary_preview_serialiser(summary) for summary in summaries], "next_cursor": next_cursor}
+
+def summary_search_pipeline(query: str, user_id: str, shared_ids: list, limit: int, cursor: str = None) -> list:
+    """
+    Builds the aggregation pipeline for one page of summary search results.
+    
+    Args:
+        query (str): Search terms, in MongoDB $text syntax ("phrases" and -exclusions allowed)
+        user_id (str): ID of the searching user
+        shared_ids (list): IDs of the summaries shared with the user
+        limit (int): Page size; one extra result is fetched to detect further pages
+        cursor (str, optional): next_cursor from the previous page
+    
+    Returns:
+        list: Pipeline for the summaries collection, best match first
+    """
+    pipeline = [
+        # $text must lead the pipeline; it is served by the summary_text index
+        {"$match": {
+            "$text": {"$search": query},
+            "$or": [{"userId": user_id}, {"_id": {"$in": shared_ids}}],
+        }},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if cursor:
+        pipeline.append({"$match": keyset_filter("score", cursor)})
+    pipeline += [
+        {"$sort": {"score": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": {**SUMMARY_LIST_PROJECTION, "score": 1}},
+    ]
+    return pipeline
+
+async def service_search_summaries(user_id: str, query: str, limit: int = SEARCH_PAGE_SIZE, cursor: str = None) -> dict:
+    """
+    Searches the titles and text of the summaries a user owns or has been shared.
+    
+    Args:
+        user_id (str): ID of the searching user
+        query (str): Search terms
+        limit (int, optional): Page size
+        cursor (str, optional): next_cursor from the previous page
+    
+    Returns:
+        dict: 'summaries' (list entries with a preview, a relevance 'score' and
+              whether the summary was 'shared' with the user), best match first,
+              and 'next_cursor' (None on the last page)
+    
+    Raises:
+        ValidationError: If the query is empty or the cursor is malformed
+    """
+    query = query.strip()
+    if not query:
+        raise ValidationError("A search query is required")
+
+    shared_ids = await shared_summaries_collection_name.distinct("summary_id", {"recipient_id": user_id})
+    summaries = await summaries_collection_name.aggregate(
+        summary_search_pipeline(query, user_id, shared_ids, limit, cursor)
+    ).to_list(length=None)
+
+    next_cursor = None
+    if len(summaries) > limit:
+        summaries = summaries[:limit]
+        next_cursor = encode_cursor(summaries[-1]["score"], summaries[-1]["_id"])
+    results = [
+        {**summary_preview_serialiser(summary), "score": round(summary["score"], 4), "shared": summary["userId"] != user_id}
+        for summary in summaries
+    ]
+    return {"summaries": results, "next_cursor": next_cursor}
+
+async def service_create_summary(summary: Summary):
     """Creates a new summary using AI processing"""
     summary_data = dict(summary)
-    # Process through AI
-    outputData = call_to_AI(summary_data['type'],summary_data['initialData'])
+    # Process through AI (repeated inputs are served from the summary cache)
+    outputData = await cached_call_to_AI(summary_data['type'],summary_data['initialData'])
     summary_data['outputData'] = outputData['Summary']
     summary_data['title'] = outputData['Title']   
     
     # Save to database
     summary_data['_id'] = str(uuid.uuid4())
-    summaries_collection_name.insert_one(summary_data)
+    await summaries_collection_name.insert_one(summary_data)
     return {"message": "Summary created successfully", "summary_id": summary_data['_id']}
 
+async def service_create_summaries_batch(summaries: list):
+    """
+    Creates several summaries from text input in one call.
+    
+    Args:
+        summaries (list): Summary objects containing the text to summarise
+    
+    Returns:
+        dict: Message, created/failed counts and a per-item result list in request
+              order ('index', 'status' and either 'summary_id' or 'error')
+    
+    Raises:
+        ValidationError: If the batch is empty or larger than SUMMARY_BATCH_MAX_ITEMS
+    
+    Notes:
+        Items are summarised concurrently (at most SUMMARY_BATCH_CONCURRENCY at a
+        time) and all successful summaries are saved with a single insert_many.
+        A failing item does not fail the rest of the batch.
+    """
+    if not summaries:
+        raise ValidationError("The batch is empty")
+    if len(summaries) > SUMMARY_BATCH_MAX_ITEMS:
+        raise ValidationError(f"A batch can hold at most {SUMMARY_BATCH_MAX_ITEMS} summaries")
+
+    semaphore = asyncio.Semaphore(SUMMARY_BATCH_CONCURRENCY)
+
+    async def summarise(index, summary):
+        summary_data = dict(summary)
+        if not summary_data.get('initialData'):
+            return {"index": index, "status": "failed", "error": "initialData is required"}
+        try:
+            async with semaphore:
+                # Process through AI (repeated inputs are served from the summary cache)
+                outputData = await cached_call_to_AI(summary_data['type'], summary_data['initialData'])
+            summary_data['outputData'] = outputData['Summary']
+            summary_data['title'] = outputData['Title']
+        except Exception as e:
+            return {"index": index, "status": "failed", "error": f"Failed to create summary: {str(e)}"}
+        summary_data['_id'] = str(uuid.uuid4())
+        return {"index": index, "status": "created", "summary_id": summary_data['_id'], "document": summary_data}
+
+    results = await asyncio.gather(*(summarise(index, summary) for index, summary in enumerate(summaries)))
+
+    # Save every successful summary in one round trip
+    documents = [result.pop("document") for result in results if result["status"] == "created"]
+    if documents:
+        try:
+            await summaries_collection_name.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed_ids = {documents[error["index"]]["_id"] for error in e.details["writeErrors"]}
+            for result in results:
+                if result.get("summary_id") in failed_ids:
+                    result.update(status="failed", error="Failed to save summary")
+                    del result["summary_id"]
+
+    created = sum(1 for result in results if result["status"] == "created")
+    return {
+        "message": f"{created} of {len(results)} summaries created",
+        "created": created,
+        "failed": len(results) - created,
+        "results": results,
+    }
+
+def sse_event(event: str, data) -> str:
+    """
+    Formats one server-sent event.
+    
+    Args:
+        event (str): Event name
+        data: JSON-serialisable payload
+    
+    Returns:
+        str: Event in text/event-stream wire format
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def service_stream_summary(summary: Summary):
+    """
+    Creates a new summary while streaming the model output as server-sent events.
+    
+    Args:
+        summary (Summary): Summary object containing the text to summarise
+    
+    Yields:
+        str: 'token' events carrying output deltas, then a 'done' event with the
+             saved summary, or an 'error' event if generation fails
+    
+    Notes:
+        The summary is only saved once the stream has completed.
+    """
+    summary_data = dict(summary)
+    try:
+        # Repeated inputs are answered from the summary cache in one event
+        cache_key = None
+        examples = None
+        outputData = None
+        if SUMMARY_CACHE_MAX_ENTRIES > 0:
+            examples = cache_examples(summary_data['type'], summary_data['initialData'])
+            cache_key = summary_cache_key(summary_data['type'], summary_data['initialData'], examples)
+            outputData = await get_cached_summary(cache_key)
+
+        if outputData is None:
+            content = []
+            async for delta in stream_summary(summary_data['type'], summary_data['initialData'], examples=examples):
+                content.append(delta)
+                yield sse_event("token", {"delta": delta})
+            outputData = parse_chat_content("".join(content))
+            if cache_key and "Title" in outputData and "Summary" in outputData:
+                await store_cached_summary(cache_key, outputData)
+        else:
+            yield sse_event("token", {"delta": json.dumps(outputData)})
+
+        summary_data['outputData'] = outputData['Summary']
+        summary_data['title'] = outputData.get('Title')
+        summary_data['_id'] = str(uuid.uuid4())
+        await summaries_collection_name.insert_one(summary_data)
+        yield sse_event("done", {
+            "message": "Summary created successfully",
+            "summary_id": summary_data['_id'],
+            "title": summary_data['title'],
+            "outputData": summary_data['outputData'],
+        })
+    except Exception as e:
+        yield sse_event("error", {"detail": f"Failed to create summary: {str(e)}"})
+
 async def service_process_file(file: UploadFile, summary: Summary):
     """
-    Processes uploaded file, stores it in GridFS, and generates summary.
+    Stores an uploaded file in GridFS and queues its summarisation.
     
     Args:
         file (UploadFile): The uploaded file object
         summary (Summary): Summary object containing metadata
     
     Returns:
-        dict: Contains message, summary_id, and file_id
+        dict: Contains message, job_id, and the summary_id and file_id the job will produce
     
     Raises:
-        ServiceError: If file processing fails
+        ServiceError: If the file is larger than MAX_UPLOAD_BYTES
+    
+    Notes:
+        The upload is streamed into GridFS in UPLOAD_CHUNK_SIZE pieces, so memory
+        use does not grow with file size. Text extraction and summarisation run
+        in the background job pool; poll service_get_job() for progress.
     """
-    # Read file contents into memory
-    file_contents = await file.read()
+    # Reject oversized uploads up front when the size is already known
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise ServiceError(f"File exceeds the {MAX_UPLOAD_BYTES} byte upload limit", status_code=413)
 
     # Store file metadata for later retrieval
     metadata = {
@@ -138,63 +417,215 @@ async def service_process_file(file: UploadFile, summary: Summary):
         "content_type": file.content_type,
     }
 
-    # Store file in GridFS with metadata
-    file_id = grid_fs.put(
-        file_contents,
-        filename=metadata["filename"],
-        content_type=metadata["content_type"]
+    # Stream the file into GridFS with metadata, enforcing the size limit as bytes arrive
+    grid_in = grid_fs.open_upload_stream(
+        metadata["filename"],
+        metadata={"contentType": metadata["content_type"]}
     )
+    size = 0
+    started = time.perf_counter()
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise ServiceError(f"File exceeds the {MAX_UPLOAD_BYTES} byte upload limit", status_code=413)
+            await grid_in.write(chunk)
+    except BaseException:
+        # Drop the chunks written so far
+        await grid_in.abort()
+        raise
+    await grid_in.close()
+    gridfs_operation_duration.labels("upload").observe(time.perf_counter() - started)
+    gridfs_bytes.labels("upload").inc(size)
+    file_id = grid_in._id
 
     # Update metadata with GridFS ID
     metadata["file_id"] = str(file_id)
     summary.filedata = metadata
 
-    # Extract text and generate summary
-    initialData = extract_text_from_file(file, file_contents)
+    # Reserve the summary ID up front so retried jobs cannot create duplicates
     summary_data = dict(summary)
-    outputData = call_to_AI(summary_data['type'], initialData)
+    summary_data['_id'] = str(uuid.uuid4())
+    job = await job_queue.enqueue(SUMMARY_UPLOAD_JOB, {"summary": summary_data})
+
+    return {
+        "message": "Summary queued",
+        "job_id": job["_id"],
+        "summary_id": summary_data['_id'],
+        "file_id": str(file_id),
+    }
+
+async def service_process_files_batch(files: list, summary: Summary):
+    """
+    Stores several uploaded files and queues a summarisation job for each.
+    
+    Args:
+        files (list): Uploaded file objects
+        summary (Summary): Summary metadata shared by every file
+    
+    Returns:
+        dict: Message and a per-file result list in request order ('index',
+              'filename', 'status' and either the job_id, summary_id and file_id
+              or an 'error')
+    
+    Raises:
+        ValidationError: If no files, or more than SUMMARY_BATCH_MAX_ITEMS, are sent
+    """
+    if not files:
+        raise ValidationError("The batch is empty")
+    if len(files) > SUMMARY_BATCH_MAX_ITEMS:
+        raise ValidationError(f"A batch can hold at most {SUMMARY_BATCH_MAX_ITEMS} files")
+
+    results = []
+    for index, file in enumerate(files):
+        try:
+            queued = await service_process_file(file, summary.model_copy())
+            results.append({"index": index, "filename": file.filename, "status": "queued",
+                            "job_id": queued["job_id"], "summary_id": queued["summary_id"], "file_id": queued["file_id"]})
+        except ServiceError as e:
+            results.append({"index": index, "filename": file.filename, "status": "failed", "error": e.detail})
+
+    queued_count = sum(1 for result in results if result["status"] == "queued")
+    return {"message": f"{queued_count} of {len(results)} files queued", "results": results}
+
+async def run_summary_upload_job(job: dict, context: JobContext):
+    """
+    Job handler that summarises a file stored by service_process_file().
+    
+    Args:
+        job (dict): Job document whose payload holds the pending summary
+        context (JobContext): Used to report the current stage
+    
+    Returns:
+        dict: Contains summary_id and file_id of the saved summary, plus PDF
+              page count and per-page extraction timings when available
+    """
+    summary_data = job["payload"]["summary"]
+    filedata = summary_data['filedata']
+
+    # A previous attempt may have saved the summary before its worker stopped
+    if await summaries_collection_name.find_one({"_id": summary_data['_id']}, {"_id": 1}):
+        return {"summary_id": summary_data['_id'], "file_id": filedata['file_id']}
+
+    # Extract text and generate summary
+    await context.set_stage("extracting")
+    extraction = {}
+    initialData = await extract_text_from_stored_file(filedata['file_id'], filedata['filename'], stats=extraction)
+
+    # Keep the extracted text so regenerations skip downloading and parsing the file again
+    filedata['text_file_id'] = await store_extracted_text(initialData, filedata['filename'], filedata['file_id'])
+
+    await context.set_stage("summarising")
+    outputData = await cached_call_to_AI(summary_data['type'], initialData)
     summary_data['outputData'] = outputData['Summary']
-    summary_data['title'] = outputData['Title']  
+    summary_data['title'] = outputData['Title']
 
-    # Generate unique ID and save summary
-    summary_data['_id'] = str(uuid.uuid4())
-    summaries_collection_name.insert_one(summary_data)
+    await context.set_stage("saving")
+    try:
+        await summaries_collection_name.insert_one(summary_data)
+    except DuplicateKeyError:
+        pass
+    result = {"summary_id": summary_data['_id'], "file_id": filedata['file_id']}
+    if extraction:
+        result['extraction'] = extraction
+    return result
+
+async def discard_summary_upload(job: dict):
+    """
+    Failure handler of summary upload jobs: deletes the uploaded file and any text
+    extracted from it, which nothing refers to once the job has failed for good.
+    
+    Args:
+        job (dict): Failed job document
+    """
+    summary_data = job["payload"]["summary"]
+    # An attempt whose worker died after saving left a summary that still uses the file
+    if await summaries_collection_name.find_one({"_id": summary_data['_id']}, {"_id": 1}):
+        return
+    file_id = summary_data['filedata']['file_id']
+    # Text extracted by earlier attempts points back at the upload
+    text_file_ids = [text_file._id async for text_file in grid_fs.find({"metadata.sourceFileId": file_id})]
+    for grid_id in [ObjectId(file_id), *text_file_ids]:
+        try:
+            await grid_fs.delete(grid_id)
+        except NoFile:
+            pass
+
+job_queue.register(SUMMARY_UPLOAD_JOB, run_summary_upload_job, on_failure=discard_summary_upload)
+
+async def service_get_job(job_id: str):
+    """
+    Retrieves the status of a background job.
+    
+    Args:
+        job_id (str): ID returned when the job was queued
+    
+    Returns:
+        dict: Serialized job with status, stage, timings and result
+    
+    Raises:
+        NotFoundError: If the job does not exist
+    """
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise NotFoundError("Job not found")
+    return job_serialiser(job)
 
-    return {"message": "Summary created successfully", "summary_id": summary_data['_id'], "file_id": str(file_id)}
+def service_slow_queries(limit: int = 10, order_by: str = "total_ms"):
+    """
+    Reports the most expensive database query shapes recorded by the query profiler.
+    
+    Args:
+        limit (int): Number of query shapes to return
+        order_by (str): Ranking: 'total_ms', 'max_ms', 'mean_ms', 'count', 'documents' or 'bytes'
+    
+    Returns:
+        dict: The slow query threshold, the number of commands whose shape was not
+              tracked, and per-shape count, durations, documents and reply bytes of slow commands
+    """
+    return {
+        "slow_query_ms": MONGO_SLOW_QUERY_MS,
+        "untracked": query_profiler.untracked,
+        "queries": query_profiler.top(limit, order_by),
+    }
 
-def service_delete_summary(summary_id: str):
-    """Deletes a summary and its associated file from GridFS"""
+async def service_delete_summary(summary_id: str):
+    """Deletes a summary and its associated file (and extracted text) from GridFS"""
     # Find summary
-    summary = summaries_collection_name.find_one({"_id": summary_id})
+    summary = await summaries_collection_name.find_one({"_id": summary_id})
     if not summary:
         raise ValueError("Summary not found")
 
-    # Delete associated file if exists
+    # Delete associated file and its extracted text if they exist
     if "filedata" in summary and summary["filedata"]:
-        file_id = summary["filedata"].get("file_id") 
-        if file_id:
-            grid_fs.delete(file_id)
+        for key in ("file_id", "text_file_id"):
+            file_id = summary["filedata"].get(key)
+            if file_id:
+                try:
+                    await grid_fs.delete(ObjectId(file_id))
+                except NoFile:
+                    pass
 
     # Delete summary
-    summaries_collection_name.delete_one({"_id": summary_id})
+    await summaries_collection_name.delete_one({"_id": summary_id})
     return {"message": "Summary deleted successfully"}
 
-def service_regenrate_summary(summary_id: str, feedback: str):
+async def service_regenrate_summary(summary_id: str, feedback: str):
     """Regenerates a summary based on user feedback"""
     # Find existing summary
-    summary = summaries_collection_name.find_one({"_id": summary_id})
+    summary = await summaries_collection_name.find_one({"_id": summary_id})
     if not summary:
         raise NotFoundError("Summary not found")
 
     # Process feedback and update
     summary_data = dict(summary)
-    outputData = regenerate_feedback(summary_data, feedback)
+    outputData = await regenerate_feedback(summary_data, feedback)
     summary_data['outputData'] = outputData['Summary']
     summary_data['title'] = outputData['Title']
-    summaries_collection_name.update_one({"_id": summary_id}, {"$set": summary_data})
+    await summaries_collection_name.update_one({"_id": summary_id}, {"$set": summary_data})
     return {"message": "Summary regenerated successfully"}
 
-def service_share_summary(summary_id: str, recipient: str):
+async def service_share_summary(summary_id: str, recipient: str):
     """
     Shares a summary with another user.
     
@@ -211,12 +642,12 @@ def service_share_summary(summary_id: str, recipient: str):
     """
     try:
         # Verify summary exists
-        summary = summaries_collection_name.find_one({"_id": summary_id})
+        summary = await summaries_collection_name.find_one({"_id": summary_id})
         if not summary:
             raise NotFoundError("Summary not found")
 
         # Verify recipient exists
-        recipient_user = users_collection_name.find_one({"email": recipient})
+        recipient_user = await users_collection_name.find_one({"email": recipient})
         if not recipient_user:
             raise NotFoundError("The recipient must be a registered user of Briefly.")
 
@@ -236,7 +667,7 @@ def service_share_summary(summary_id: str, recipient: str):
         # Save sharing record
         shared_summaries_collection = summaries_collection_name.database["shared_summaries"]
         # Check if the summary is already shared with the same recipient
-        existing_share = shared_summaries_collection.find_one({
+        existing_share = await shared_summaries_collection.find_one({
                      "summary_id": shared_record["summary_id"],
                  "recipient_id": shared_record["recipient_id"]})
 
@@ -244,7 +675,11 @@ def service_share_summary(summary_id: str, recipient: str):
             # If the summary is already shared with the recipient, return a message
             return {"message": f"Summary already shared with {recipient}"}
         
-        shared_summaries_collection.insert_one(shared_record)
+        try:
+            await shared_summaries_collection.insert_one(shared_record)
+        except DuplicateKeyError:
+            # A concurrent request shared it first (summary_id, recipient_id is unique)
+            return {"message": f"Summary already shared with {recipient}"}
 
         return {"message": f"Summary shared successfully with {recipient}"}
 
@@ -253,45 +688,152 @@ def service_share_summary(summary_id: str, recipient: str):
     except Exception as e:
         raise ServiceError(f"Failed to share summary: {str(e)}")
     
-def service_get_shared_summaries(user_id: str):
+async def service_share_summary_bulk(summary_id: str, recipients: list):
     """
-    Fetches all summaries shared with a specific user.
+    Shares a summary with several users at once.
     
     Args:
-        user_id (str): ID of the user to fetch shared summaries for
+        summary_id (str): ID of the summary to be shared
+        recipients (list): Email addresses of the recipients
     
     Returns:
-        list: List of shared summaries with sender information
+        dict: Message, number of new shares and a per-recipient result list with
+              a status of 'shared', 'already_shared', 'not_found' or 'self'
     
     Raises:
-        ServiceError: If fetching shared summaries fails
+        NotFoundError: If the summary doesn't exist
+        ValidationError: If no recipients, or more than SHARE_BULK_MAX_RECIPIENTS, are given
+        ServiceError: If sharing fails
+    
+    Notes:
+        Recipients are resolved with one $in query and new shares are written with
+        one unordered bulk_write of upserts on (summary_id, recipient_id), so the
+        number of round trips does not grow with the number of recipients.
     """
+    # Drop repeated addresses, keeping the caller's order
+    recipients = list(dict.fromkeys(recipients))
+    if not recipients:
+        raise ValidationError("At least one recipient is required")
+    if len(recipients) > SHARE_BULK_MAX_RECIPIENTS:
+        raise ValidationError(f"A summary can be shared with at most {SHARE_BULK_MAX_RECIPIENTS} recipients at once")
+
+    summary = await summaries_collection_name.find_one({"_id": summary_id}, {"userId": 1})
+    if not summary:
+        raise NotFoundError("Summary not found")
+
     try:
-        # Query shared summaries
-        shared_records = shared_summaries_collection_name.find({"recipient_id": user_id}).sort("shared_at", -1)
-        
-        result = []
-        for shared_record in shared_records:
-            # Get original summary
-            summary = summaries_collection_name.find_one({"_id": shared_record["summary_id"]})
-            if not summary:
-                continue
+        users_by_email = {
+            user["email"]: user["_id"]
+            async for user in users_collection_name.find({"email": {"$in": recipients}}, {"email": 1})
+        }
 
-            # Get sender info
-            sender = users_collection_name.find_one({"_id": shared_record["sender_id"]})
-            if not sender:
-                continue
+        results = []
+        operations = []
+        shared_at = datetime.datetime.now()
+        for recipient in recipients:
+            recipient_id = users_by_email.get(recipient)
+            if recipient_id is None:
+                results.append({"recipient": recipient, "status": "not_found"})
+            elif recipient_id == summary["userId"]:
+                results.append({"recipient": recipient, "status": "self"})
+            else:
+                results.append({"recipient": recipient, "status": None, "operation": len(operations)})
+                operations.append(UpdateOne(
+                    {"summary_id": summary_id, "recipient_id": recipient_id},
+                    {"$setOnInsert": {
+                        "_id": str(uuid.uuid4()),
+                        "sender_id": summary["userId"],
+                        "shared_at": shared_at,
+                    }},
+                    upsert=True,
+                ))
+
+        inserted = set()
+        if operations:
+            try:
+                write_result = await shared_summaries_collection_name.bulk_write(operations, ordered=False)
+                inserted = set(write_result.upserted_ids)
+            except BulkWriteError as e:
+                # Upserts racing a concurrent share hit the unique index; those recipients are already shared
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+                inserted = {upsert["index"] for upsert in e.details["upserted"]}
+
+        for result in results:
+            if "operation" in result:
+                result["status"] = "shared" if result.pop("operation") in inserted else "already_shared"
+    except Exception as e:
+        raise ServiceError(f"Failed to share summary: {str(e)}")
 
-            # Format data
-            shared_summary = shared_summary_serialiser(shared_record, summary, sender)
-            result.append(shared_summary)
+    shared = len(inserted)
+    return {
+        "message": f"Summary shared with {shared} of {len(recipients)} recipients",
+        "shared": shared,
+        "results": results,
+    }
 
-        return result
+async def service_get_shared_summaries(user_id: str, limit: int = None, cursor: str = None):
+    """
+    Fetches summaries shared with a specific user, newest first.
+    
+    Args:
+        user_id (str): ID of the user to fetch shared summaries for
+        limit (int, optional): Page size; all shared summaries are returned when omitted
+        cursor (str, optional): next_cursor from the previous page
+    
+    Returns:
+        dict: 'summaries' (shared summaries with sender information) and
+              'next_cursor' (None on the last page)
+    
+    Raises:
+        ValidationError: If the cursor is malformed
+        ServiceError: If fetching shared summaries fails
+    
+    Notes:
+        Summaries and senders are joined server-side in a single aggregation;
+        shares whose summary or sender no longer exists are skipped.
+    """
+    match = {"recipient_id": user_id}
+    if cursor:
+        match.update(keyset_filter("shared_at", cursor))
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"shared_at": -1, "_id": -1}},
+        {"$lookup": {
+            "from": summaries_collection_name.name,
+            "localField": "summary_id",
+            "foreignField": "_id",
+            "as": "summary",
+        }},
+        {"$unwind": "$summary"},
+        {"$lookup": {
+            "from": users_collection_name.name,
+            "localField": "sender_id",
+            "foreignField": "_id",
+            "as": "sender",
+        }},
+        {"$unwind": "$sender"},
+    ]
+    if limit:
+        # One extra record tells whether another page exists
+        pipeline.append({"$limit": limit + 1})
+    pipeline.append({"$project": SHARED_SUMMARY_PROJECTION})
 
+    try:
+        records = await shared_summaries_collection_name.aggregate(pipeline).to_list(length=None)
     except Exception as e:
         raise ServiceError(f"Failed to fetch shared summaries: {str(e)}")
 
-def service_get_summary(summary_id: str):
+    next_cursor = None
+    if limit and len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(records[-1]["shared_at"], records[-1]["_id"])
+    return {
+        "summaries": [shared_summary_serialiser(record, record["summary"], record["sender"]) for record in records],
+        "next_cursor": next_cursor,
+    }
+
+async def service_get_summary(summary_id: str):
     """
     Retrieves a specific summary by ID.
     
@@ -304,39 +846,104 @@ def service_get_summary(summary_id: str):
     Raises:
         ValueError: If summary not found
     """
-    summary = summaries_collection_name.find_one({"_id": summary_id})
+    summary = await summaries_collection_name.find_one({"_id": summary_id})
     if not summary:
         raise ValueError("Summary not found")
     summary = summary_serialiser(summary)
     return summary
 
-def service_download_file(file_id: str):
+async def service_download_file(file_id: str, range_header: str = None, if_none_match: str = None, if_range: str = None):
     """
     Streams file from GridFS for download.
     
     Args:
         file_id (str): GridFS ID of the file to download
+        range_header (str, optional): Range request header (single or multiple byte ranges)
+        if_none_match (str, optional): If-None-Match request header
+        if_range (str, optional): If-Range request header; ranges are only served if it matches
     
     Returns:
-        StreamingResponse: File stream with appropriate headers
+        Response: 200 with the whole file, 206 with the requested range(s)
+                  (multipart/byteranges for several), 304 if the client's copy
+                  is current, or 416 if no range is satisfiable
     
     Raises:
-        HTTPException: If file not found (404)
+        NotFoundError: If file not found (404)
+    
+    Notes:
+        Ranges are read by seeking the GridFS stream, so only the chunks
+        covering them are fetched. Reads are asynchronous, DOWNLOAD_CHUNK_SIZE
+        bytes at a time, with the next block read ahead while one is sent.
     """
     try:
         # Retrieve file from GridFS
-        grid_out = grid_fs.get(ObjectId(file_id))
+        grid_out = await grid_fs.open_download_stream(ObjectId(file_id))
     except Exception:
-        raise HTTPException(status_code=404, detail="File not found")
+        raise NotFoundError("File not found")
+
+    # Stored files never change, so the ID and length identify the content
+    size = grid_out.length
+    etag = f'"{grid_out._id}-{size}"'
+    headers = {
+        "Content-Disposition": f"attachment; filename={grid_out.filename}",
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": email.utils.format_datetime(
+            grid_out.upload_date.replace(tzinfo=datetime.timezone.utc), usegmt=True
+        ),
+    }
+    media_type = grid_out_content_type(grid_out)
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
 
-    # Create async generator for streaming file contents
-    async def file_iterator():
-        while chunk := grid_out.read(1024 * 1024):  # Read in 1MB chunks
-            yield chunk
+    # A Range conditioned on an outdated copy gets the whole file instead
+    if if_range and not etag_matches(if_range, etag):
+        range_header = None
+    try:
+        ranges = parse_range_header(range_header, size)
+    except ServiceError as e:
+        return Response(status_code=e.status_code, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    def range_iterator(start, end):
+        return read_range(grid_out, start, end, DOWNLOAD_CHUNK_SIZE)
+
+    if ranges is None:
+        return StreamingResponse(
+            range_iterator(0, size - 1),
+            media_type=media_type,
+            headers={**headers, "Content-Length": str(size)}
+        )
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        return StreamingResponse(
+            range_iterator(start, end),
+            status_code=206,
+            media_type=media_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)}
+        )
+
+    # Several ranges: one multipart/byteranges body
+    boundary = uuid.uuid4().hex
+    part_headers = [
+        f"--{boundary}\r\nContent-Type: {media_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n".encode()
+        for start, end in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode()
+    content_length = sum(len(part) + (end - start + 1) + 2 for part, (start, end) in zip(part_headers, ranges)) + len(closing)
+
+    async def multipart_iterator():
+        for part, (start, end) in zip(part_headers, ranges):
+            yield part
+            async for chunk in range_iterator(start, end):
+                yield chunk
+            yield b"\r\n"
+        yield closing
 
-    # Return streaming response with appropriate headers
     return StreamingResponse(
-        file_iterator(),
-        media_type=grid_out.content_type,
-        headers={"Content-Disposition": f"attachment; filename={grid_out.filename}"}
-    )
\ No newline at end of file
+        multipart_iterator(),
+        status_code=206,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+        headers={**headers, "Content-Length": str(content_length)}
+    )
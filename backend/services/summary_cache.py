@@ -0,0 +1,161 @@
+import datetime
+import hashlib
+import json
+import os
+import unicodedata
+from pymongo.errors import DuplicateKeyError
+from config.database import db
+from services.calls_to_ai import call_to_AI, select_model, select_examples, PROMPT_VERSION
+
+# How long a cached summary stays valid, and how many entries the cache may hold
+SUMMARY_CACHE_TTL_SECONDS = int(os.getenv('SUMMARY_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '10000'))
+
+summary_cache_collection_name = db["summary_cache"]
+
+# In-process counters for cache effectiveness
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def normalise_text(text: str) -> str:
+    """
+    Normalises input text so trivially different copies of the same content share a cache entry.
+
+    Args:
+        text (str): Raw input text
+
+    Returns:
+        str: Text with unified unicode form, line endings and trailing whitespace
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def cache_examples(input_type: str, initial_data: str) -> list:
+    """
+    Picks the example summaries for an input the way its cache key sees them, from the normalised text.
+
+    Args:
+        input_type (str): The type of input (e.g., 'code', 'research')
+        initial_data (str): The content to summarize
+
+    Returns:
+        list: Example summary strings, to pass to summary_cache_key() and the model call alike
+    """
+    return select_examples(input_type, normalise_text(initial_data))
+
+
+def summary_cache_key(input_type: str, initial_data: str, examples: list = None) -> str:
+    """
+    Builds the content address of a summarisation request.
+
+    Args:
+        input_type (str): The type of input (e.g., 'code', 'research')
+        initial_data (str): The content to summarize
+        examples (list, optional): Result of cache_examples(); picked here when omitted
+
+    Returns:
+        str: SHA-256 hex digest of type, model, prompt version, examples and normalised text
+    """
+    normalised = normalise_text(initial_data)
+    if examples is None:
+        examples = select_examples(input_type, normalised)
+    payload = json.dumps([
+        input_type,
+        select_model(input_type),
+        PROMPT_VERSION,
+        hashlib.sha256("".join(examples).encode("utf-8")).hexdigest(),
+        normalised,
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def get_cached_summary(key: str):
+    """
+    Looks up a cached summary and marks it as recently used.
+
+    Args:
+        key (str): Cache key from summary_cache_key()
+
+    Returns:
+        dict | None: Parsed 'Title'/'Summary' output, or None on a miss
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    entry = await summary_cache_collection_name.find_one_and_update(
+        {"_id": key, "expiresAt": {"$gt": now}},
+        {"$set": {"lastAccessedAt": now}, "$inc": {"hits": 1}},
+        projection={"output": 1},
+    )
+    if entry is None:
+        cache_stats["misses"] += 1
+        return None
+    cache_stats["hits"] += 1
+    return entry["output"]
+
+
+async def store_cached_summary(key: str, output: dict):
+    """
+    Saves a summary in the cache and evicts the least recently used entries beyond the size limit.
+
+    Args:
+        key (str): Cache key from summary_cache_key()
+        output (dict): Parsed 'Title'/'Summary' output to cache
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    try:
+        await summary_cache_collection_name.replace_one(
+            {"_id": key},
+            {
+                "output": output,
+                "createdAt": now,
+                "lastAccessedAt": now,
+                "expiresAt": now + datetime.timedelta(seconds=SUMMARY_CACHE_TTL_SECONDS),
+                "hits": 0,
+            },
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # A concurrent request cached the same input first
+        return
+    await evict_excess_entries()
+
+
+async def evict_excess_entries():
+    """Deletes the least recently used cache entries when the cache is over SUMMARY_CACHE_MAX_ENTRIES."""
+    excess = await summary_cache_collection_name.estimated_document_count() - SUMMARY_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    cursor = summary_cache_collection_name.find({}, {"_id": 1}).sort("lastAccessedAt", 1).limit(excess)
+    stale_ids = [entry["_id"] async for entry in cursor]
+    if stale_ids:
+        result = await summary_cache_collection_name.delete_many({"_id": {"$in": stale_ids}})
+        cache_stats["evictions"] += result.deleted_count
+
+
+async def cached_call_to_AI(input_type: str, initial_data: str):
+    """
+    Summarises input through call_to_AI, returning the cached result for repeated inputs.
+
+    Args:
+        input_type (str): The type of input (e.g., 'code', 'research')
+        initial_data (str): The content to summarize
+
+    Returns:
+        dict: Parsed 'Title'/'Summary' output
+    """
+    if SUMMARY_CACHE_MAX_ENTRIES <= 0:
+        return await call_to_AI(input_type, initial_data)
+
+    # Picked once: for code this runs language detection, which the key and the model call both need
+    examples = cache_examples(input_type, initial_data)
+    key = summary_cache_key(input_type, initial_data, examples)
+    cached = await get_cached_summary(key)
+    if cached is not None:
+        return cached
+
+    outputData = await call_to_AI(input_type, initial_data, examples=examples)
+    # Only complete outputs are worth replaying
+    if "Title" in outputData and "Summary" in outputData:
+        await store_cached_summary(key, outputData)
+    return outputData
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+import jwt
+
+# Most verified tokens kept in memory; 0 disables the cache
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', '10000'))
+
+# In-process counters for cache effectiveness
+token_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified JWT claims, keyed by the SHA-256 digest of the token.
+    Entries expire at the token's own 'exp' claim, so a cached token is never
+    accepted for longer than jwt.decode would accept it.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, digest: str):
+        """
+        Returns the cached claims for a token digest, or None if absent or expired.
+
+        Args:
+            digest (str): SHA-256 hex digest of the token
+        """
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            return None
+        self._entries.move_to_end(digest)
+        return claims
+
+    def put(self, digest: str, claims: dict, expires_at: float):
+        """
+        Caches verified claims until expires_at, evicting the least recently used entry when full.
+
+        Args:
+            digest (str): SHA-256 hex digest of the token
+            claims (dict): Decoded token claims
+            expires_at (float): Unix time at which the token expires
+        """
+        if self.max_entries <= 0:
+            return
+        self._entries[digest] = (claims, expires_at)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            token_cache_stats["evictions"] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = TokenCache()
+
+
+def decode_token(token: str, secret_key: str) -> dict:
+    """
+    Verifies an HS256 token, reusing the result of earlier verifications of the same token.
+
+    Args:
+        token (str): Encoded JWT
+        secret_key (str): Signing key
+
+    Returns:
+        dict: The token's claims
+
+    Raises:
+        jwt.InvalidTokenError: If the token is invalid or expired
+
+    Notes:
+        Tokens without an 'exp' claim are verified every time and never cached.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    claims = token_cache.get(digest)
+    if claims is not None:
+        token_cache_stats["hits"] += 1
+        return claims
+
+    token_cache_stats["misses"] += 1
+    claims = jwt.decode(token, secret_key, algorithms=["HS256"])
+    if "exp" in claims:
+        token_cache.put(digest, claims, float(claims["exp"]))
+    return claims
+
+
+def token_cache_hit_rate() -> float:
+    """Returns the share of token verifications served from the cache."""
+    lookups = token_cache_stats["hits"] + token_cache_stats["misses"]
+    return token_cache_stats["hits"] / lookups if lookups else 0.0
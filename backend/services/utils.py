@@ -1,71 +1,420 @@
-from PyPDF2 import PdfReader
 from io import BytesIO
+import asyncio
+import codecs
 import re
 import json
+import base64
+import datetime
 from bson import ObjectId
 from config.database import grid_fs
+from gridfs.errors import NoFile
 from docx import Document
 import examples.code_summary_examples as code_examples
 from mistralai import Mistral
 import os
+import tempfile
+import time
 from fastapi import UploadFile
 from exceptions import ServiceError, NotFoundError, ValidationError
-import time
-from services.calls_to_ai import regenerate_chat_response, prompts
+from services.calls_to_ai import regenerate_chat_response, get_mistral_client, select_model, prompts, DEFAULT_EXAMPLE_LANGUAGE
+from services.language_detection import detect_language as classify_language
+from services.pdf_extraction import extract_pdf_text
+from services.metrics import language_detection_duration, gridfs_operation_duration, gridfs_bytes
 # Load environment variables
 api_key = os.getenv('MISTRAL_API_KEY')
 
-
-def extract_text_from_pdf(uploaded_file):
-    """
-    Extracts text content specifically from PDF files.
-    
-    Args:
-        uploaded_file (UploadFile): PDF file to extract text from
-    
-    Returns:
-        str: Extracted text content from all pages
-    """
-    text = ""
-    pdf_reader = PdfReader(uploaded_file.file)
-    for page_num in range(len(pdf_reader.pages)):
-        page = pdf_reader.pages[page_num]
-        text += page.extract_text()
-    return text
+# Files read back for extraction are kept in memory up to this size, then spooled to disk
+EXTRACT_SPOOL_MAX_BYTES = int(os.getenv('EXTRACT_SPOOL_MAX_BYTES', str(5 * 1024 * 1024)))
+# Text files are decoded this many bytes at a time, so the raw bytes are never held in memory as a whole
+EXTRACT_DECODE_CHUNK_BYTES = int(os.getenv('EXTRACT_DECODE_CHUNK_BYTES', str(1024 * 1024)))
 
 
 # File processing functions
-def extract_text_from_file(file: UploadFile, contents: bytes) -> str:
+def extract_text_from_file(file: UploadFile, contents: bytes = None) -> str:
     """
     Extracts text content from various file types.
     
     Args:
         file (UploadFile): File object with filename and content type
-        contents (bytes): Raw file contents
+        contents (bytes, optional): Raw file contents; read from file.file when omitted
     
     Returns:
         str: Extracted text content
     
     Raises:
-        ServiceError: If file contents cannot be decoded
+        ServiceError: If file contents cannot be decoded, or the file is a PDF
     
     Notes:
-        Supports PDF, TXT, common code files, DOC/DOCX formats
+        Supports TXT, common code files, DOC/DOCX formats.
+        DOC/DOCX files are parsed straight from the file object.
+        Text read from file.file is decoded incrementally, EXTRACT_DECODE_CHUNK_BYTES at a time.
+        PDFs are rejected: they are extracted in the worker pool, through
+        extract_text_from_stored_file or services.pdf_extraction.extract_pdf_text.
+        Blocking: call it from an executor when on the event loop.
     """
+    if file.filename.endswith('.pdf'):
+        raise ServiceError("PDFs must go through extract_text_from_stored_file", status_code=400)
     try:
         # Handle different file types
-        if file.filename.endswith('.pdf'):
-            return extract_text_from_pdf(file)
-        elif file.filename.endswith(('.txt', '.py', '.js', '.html', '.css', '.json', '.md')):
-            return contents.decode('utf-8')
-        elif file.filename.endswith(('.doc', '.docx')):
-            doc = Document(BytesIO(contents))
+        if file.filename.endswith(('.doc', '.docx')):
+            doc = Document(BytesIO(contents) if contents is not None else file.file)
             return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
         else:
+            # Plain text and code files (.txt, .py, .js, .html, .css, .json, .md, ...)
+            if contents is None:
+                return decode_utf8_stream(file.file)
             return contents.decode('utf-8')
     except UnicodeDecodeError:
         raise ServiceError("Unable to decode file contents", status_code=400)
 
+def decode_utf8_stream(stream, chunk_size: int = None) -> str:
+    """
+    Decodes a binary file object as UTF-8 one chunk at a time.
+    
+    Args:
+        stream: Readable binary file object
+        chunk_size (int, optional): Bytes read per chunk; EXTRACT_DECODE_CHUNK_BYTES when omitted
+    
+    Returns:
+        str: Decoded text
+    
+    Raises:
+        UnicodeDecodeError: If the contents are not valid UTF-8
+    """
+    chunk_size = chunk_size or EXTRACT_DECODE_CHUNK_BYTES
+    # The incremental decoder carries characters split across chunk boundaries over to the next chunk
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    parts = []
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+class StoredUploadFile:
+    """
+    Minimal UploadFile-like wrapper (filename plus file-like object) for files read back from GridFS.
+    """
+    def __init__(self, filename, file):
+        self.filename = filename
+        self.file = file
+
+async def copy_grid_out(grid_out, target):
+    """
+    Copies a GridFS file into a local file object, one GridFS chunk at a time.
+    
+    Args:
+        grid_out: Open GridFS download stream
+        target: Writable binary file object
+    
+    Notes:
+        Writes, and the final flush, run in the default executor, as the target
+        may be a file on disk.
+    """
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    while chunk := await grid_out.readchunk():
+        await loop.run_in_executor(None, target.write, chunk)
+    await loop.run_in_executor(None, target.flush)
+    gridfs_operation_duration.labels("read").observe(time.perf_counter() - started)
+    gridfs_bytes.labels("read").inc(grid_out.length)
+
+async def extract_text_from_stored_file(file_id, filename, stats=None):
+    """
+    Extracts text content from a file stored in GridFS.
+    
+    Args:
+        file_id (str): GridFS ID of the file
+        filename (str): Original filename, used to pick the extractor
+        stats (dict, optional): Filled with the page count and per-page timings of PDFs
+    
+    Returns:
+        str: Extracted text content
+    
+    Notes:
+        The file is copied chunk by chunk into a temporary file, so large files
+        are never held in memory as a whole. PDFs are written to disk and parsed
+        in the PDF process pool; other files use a spooled temporary file that
+        moves to disk past EXTRACT_SPOOL_MAX_BYTES and are parsed or decoded in
+        the default executor, off the event loop.
+    """
+    grid_out = await grid_fs.open_download_stream(ObjectId(file_id))
+    if filename.endswith('.pdf'):
+        # Worker processes open the PDF by path
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as pdf_file:
+            await copy_grid_out(grid_out, pdf_file)
+            extraction = await extract_pdf_text(pdf_file.name)
+        if stats is not None:
+            stats.update(pages=extraction['pages'], seconds=extraction['seconds'], pageTimings=extraction['page_timings'])
+        return extraction['text']
+
+    with tempfile.SpooledTemporaryFile(max_size=EXTRACT_SPOOL_MAX_BYTES) as spool:
+        await copy_grid_out(grid_out, spool)
+        spool.seek(0)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, extract_text_from_file, StoredUploadFile(filename, spool))
+
+async def store_extracted_text(text, filename, source_file_id):
+    """
+    Saves the text extracted from an uploaded file as a GridFS blob.
+    
+    Args:
+        text (str): Extracted text content
+        filename (str): Original filename of the upload
+        source_file_id (str): GridFS ID of the uploaded file
+    
+    Returns:
+        str: GridFS ID of the stored text
+    """
+    data = text.encode('utf-8')
+    started = time.perf_counter()
+    text_file_id = await grid_fs.upload_from_stream(
+        f"{filename}.txt",
+        data,
+        metadata={"contentType": "text/plain; charset=utf-8", "sourceFileId": source_file_id}
+    )
+    gridfs_operation_duration.labels("write_text").observe(time.perf_counter() - started)
+    gridfs_bytes.labels("write_text").inc(len(data))
+    return str(text_file_id)
+
+async def load_extracted_text(text_file_id):
+    """
+    Reads text saved by store_extracted_text().
+    
+    Args:
+        text_file_id (str): GridFS ID of the stored text
+    
+    Returns:
+        str | None: The extracted text, or None if the blob no longer exists
+    """
+    try:
+        grid_out = await grid_fs.open_download_stream(ObjectId(text_file_id))
+    except NoFile:
+        return None
+    return (await grid_out.read()).decode('utf-8')
+
+def split_into_chunks(text, chunk_tokens, overlap_tokens):
+    """
+    Splits long text into token-bounded, overlapping chunks.
+    
+    Args:
+        text (str): Text to split
+        chunk_tokens (int): Maximum estimated tokens per chunk
+        overlap_tokens (int): Estimated tokens repeated at the start of the next chunk
+    
+    Returns:
+        list: Chunks in document order
+    
+    Notes:
+        Uses the same four-characters-per-token estimate as the rate limiter and
+        prefers to cut at paragraph, line or sentence boundaries.
+    """
+    chunk_chars = max(1, chunk_tokens * 4)
+    overlap_chars = min(overlap_tokens * 4, chunk_chars // 2)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            # Cut at the last natural boundary in the second half of the window
+            window_middle = start + chunk_chars // 2
+            for boundary in ("\n\n", "\n", ". ", " "):
+                cut = text.rfind(boundary, window_middle, end)
+                if cut != -1:
+                    end = cut + len(boundary)
+                    break
+        chunks.append(text[start:end])
+        if end >= len(text):
+            break
+        start = end - overlap_chars
+    return chunks
+
+def encode_cursor(sort_value, _id):
+    """
+    Builds an opaque pagination cursor pointing just after a document.
+    
+    Args:
+        sort_value (datetime.datetime | float): The document's value of the sort field
+        _id (str): The document's ID, used as a tie-breaker
+    
+    Returns:
+        str: URL-safe cursor string
+    """
+    if isinstance(sort_value, datetime.datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, _id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """
+    Reads a cursor built by encode_cursor().
+    
+    Args:
+        cursor (str): Cursor string from a previous page
+    
+    Returns:
+        tuple: (sort_value, _id) of the last document of the previous page
+    
+    Raises:
+        ValidationError: If the cursor is malformed
+    """
+    try:
+        sort_value, _id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if isinstance(sort_value, str):
+            return datetime.datetime.fromisoformat(sort_value), _id
+        if isinstance(sort_value, (int, float)) and not isinstance(sort_value, bool):
+            return float(sort_value), _id
+        raise ValidationError("Invalid cursor")
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor")
+
+def keyset_filter(field, cursor):
+    """
+    Builds the query condition selecting documents after a cursor in (field, _id) descending order.
+    
+    Args:
+        field (str): Sort field, e.g. 'createdAt'
+        cursor (str): Cursor string from a previous page
+    
+    Returns:
+        dict: MongoDB filter to combine with the page query
+    """
+    sort_value, _id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {"$lt": sort_value}},
+        {field: sort_value, "_id": {"$lt": _id}},
+    ]}
+
+def parse_range_header(range_header, size, max_ranges=16):
+    """
+    Parses an HTTP Range header against a file size.
+    
+    Args:
+        range_header (str): Value of the Range header, e.g. 'bytes=0-499,-500'
+        size (int): Size of the file in bytes
+        max_ranges (int): Largest number of ranges served; more are answered with the whole file
+    
+    Returns:
+        list | None: Inclusive (start, end) byte ranges in request order, or None
+                     when the whole file should be sent (no, malformed or non-byte header)
+    
+    Raises:
+        ServiceError: (416) If none of the requested ranges overlaps the file
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        start_text, separator, end_text = part.strip().partition("-")
+        if not separator:
+            return None
+        try:
+            if not start_text:
+                # Suffix range: the last N bytes
+                length = int(end_text)
+                if length <= 0 or size == 0:
+                    continue
+                ranges.append((max(0, size - length), size - 1))
+                continue
+            start = int(start_text)
+            end = int(end_text) if end_text else max(start, size - 1)
+        except ValueError:
+            return None
+        if end < start:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    if len(ranges) > max_ranges:
+        return None
+    if not ranges:
+        raise ServiceError("Requested range not satisfiable", status_code=416)
+    return ranges
+
+async def read_range(grid_out, start, end, chunk_size):
+    """
+    Streams a byte range of a GridFS file, reading the next block ahead.
+    
+    Args:
+        grid_out: Open GridFS download stream
+        start (int): First byte (inclusive)
+        end (int): Last byte (inclusive)
+        chunk_size (int): Bytes per read
+    
+    Yields:
+        bytes: Consecutive blocks of the range
+    
+    Notes:
+        While a block is being sent to the client the following one is already
+        being fetched, so the socket and the database work in parallel. At most
+        one read is in flight per download.
+    """
+    # Seek straight to the chunk holding the first byte
+    grid_out.seek(start)
+    remaining = end - start + 1
+
+    def next_read():
+        nonlocal remaining
+        size = min(chunk_size, remaining)
+        remaining -= size
+        return asyncio.ensure_future(grid_out.read(size)) if size > 0 else None
+
+    pending = next_read()
+    started = time.perf_counter()
+    try:
+        while pending is not None:
+            chunk = await pending
+            if not chunk:
+                break
+            pending = next_read()
+            gridfs_bytes.labels("download").inc(len(chunk))
+            yield chunk
+    finally:
+        # The client went away mid-download
+        if pending is not None:
+            pending.cancel()
+        gridfs_operation_duration.labels("download").observe(time.perf_counter() - started)
+
+def etag_matches(header_value, etag):
+    """
+    Checks an If-None-Match / If-Range header value against an entity tag.
+    
+    Args:
+        header_value (str): Header value, e.g. '"abc", W/"def"' or '*'
+        etag (str): Quoted entity tag of the current file
+    
+    Returns:
+        bool: True if any listed tag (compared weakly) or '*' matches
+    """
+    if not header_value:
+        return False
+    for candidate in header_value.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
+
+def grid_out_content_type(grid_out):
+    """
+    Resolves the content type of a stored GridFS file.
+    
+    Args:
+        grid_out: GridFS download stream for the file
+    
+    Returns:
+        str: Content type saved in the file metadata, falling back to the
+             legacy top-level contentType field written by older uploads
+    """
+    metadata = grid_out.metadata or {}
+    return metadata.get("contentType") or grid_out.content_type
+
 def clean(data):
     """
     Removes special characters from start and end of string.
@@ -119,34 +468,20 @@ def get_all_examples_for_language(language_prefix):
     
     return language_examples
 
-def detect_language(client, inputData):
+def detect_language(inputData):
     """
-    Determines the programming language of the given code using Mistral AI.
+    Determines the programming language of the given code with the local classifier.
     
     Args:
-        client (Mistral): The Mistral API client.
         inputData (str): The code input to analyze.
     
     Returns:
-        str: The detected programming language.
-    """
-    language_response = client.chat.complete(
-        model="open-mistral-nemo",
-        messages=[
-            {
-                "role": "system",
-                "content": "You are an expert programmer. You will be given a piece of code by the user. Determine which of the following programming languages the code is written in: Python, Java, CPlusPlus, other. Your output should only be one of [Python, Java, CPlusPlus, Other]."
-            },
-            {
-                "role": "user",
-                "content": inputData
-            }
-        ],
-        response_format={
-            "type": "text"
-        }
-    )
-    return language_response.choices[0].message.content.strip()
+        str: The detected programming language ('python', 'java', 'c' or 'other').
+    """
+    started = time.perf_counter()
+    language = classify_language(inputData)
+    language_detection_duration.labels(language).observe(time.perf_counter() - started)
+    return language
 
 def parse_chat_response(chat_response):
     """
@@ -158,7 +493,18 @@ def parse_chat_response(chat_response):
     Returns:
         dict: A dictionary containing the parsed JSON data.
     """
-    outputData_string = chat_response.choices[0].message.content
+    return parse_chat_content(chat_response.choices[0].message.content)
+
+def parse_chat_content(outputData_string):
+    """
+    Parses the text content of a chat response (complete or fully streamed) into JSON data.
+
+    Args:
+        outputData_string (str): The model output.
+
+    Returns:
+        dict: A dictionary containing the parsed JSON data.
+    """
     try:
         return json.loads(outputData_string, strict=False)
     except json.JSONDecodeError:
@@ -182,13 +528,14 @@ def handle_json_decode_error(outputData_string):
         outputData['Summary'] = clean(outputData_string)
     return outputData
 
-def regenerate_feedback(summary_data, feedback):
+async def regenerate_feedback(summary_data, feedback, client=None):
     """
     Regenerates summary based on user feedback using AI.
     
     Args:
         summary_data (dict): Original summary data containing type, initial data, and file info
         feedback (str): User feedback for regenerating the summary
+        client (Mistral, optional): Mistral client to use, defaults to the shared pooled client
     
     Returns:
         dict: Contains updated 'Title' and 'Summary' based on feedback
@@ -197,33 +544,28 @@ def regenerate_feedback(summary_data, feedback):
         - Uses same model selection logic as initial summarization
         - Maintains original title while updating summary
         - Can handle both direct text and file-based summaries
+        - File-based summaries reuse the text extracted at upload time; summaries
+          created before that was stored are extracted once and summary_data['filedata']
+          gains the new 'text_file_id', so saving summary_data keeps it for next time
     """
     # Select model based on content type
     inputType = summary_data['type']
-    model = "open-mistral-nemo"
-    if inputType == "code":
-        model = "open-codestral-mamba"
+    model = select_model(inputType)
 
     # Get initial data
     initialData = summary_data['initialData']
     if initialData is None and summary_data['filedata'] is not None:
         filedata = summary_data['filedata']
-        file = grid_fs.get(ObjectId(filedata['file_id']))
-        file_contents = file.read()
-        
-        # Create a temporary UploadFile-like object with a file-like interface
-        class TempUploadFile:
-            def __init__(self, filename, contents):
-                self.filename = filename
-                self.file = BytesIO(contents)
-                
-        temp_file = TempUploadFile(filedata['filename'], file_contents)
-        initialData = extract_text_from_file(temp_file, file_contents)
-
-    example_code_summaries = get_all_examples_for_language('java')  # Only need formatting, so using java example as default
+        if filedata.get('text_file_id'):
+            initialData = await load_extracted_text(filedata['text_file_id'])
+        if initialData is None:
+            initialData = await extract_text_from_stored_file(filedata['file_id'], filedata['filename'])
+            filedata['text_file_id'] = await store_extracted_text(initialData, filedata['filename'], filedata['file_id'])
+
+    example_code_summaries = get_all_examples_for_language(DEFAULT_EXAMPLE_LANGUAGE)  # Only need formatting, so using java example as default
     # Process through AI
-    client = Mistral(api_key=api_key)
-    chat_response = regenerate_chat_response(
+    client = client or get_mistral_client()
+    chat_response = await regenerate_chat_response(
         client, model, prompts, inputType, example_code_summaries, initialData, summary_data, feedback
     )
 
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import httpcore
+import pytest
+from types import SimpleNamespace
+import services.calls_to_ai as calls_to_ai
+from services.calls_to_ai import (
+    open_mistral_client, close_mistral_client, chat_completion, connection_stats, mistral_connection_reuses,
+    regenerate_chat_response, prompts,
+)
+from services.rate_limiter import estimate_tokens
+
+def chat_response_bytes(content):
+    """
+    Builds a raw HTTP/1.1 response carrying a Mistral chat completion.
+
+    Returns:
+        bytes: Status line, headers and JSON body
+    """
+    body = json.dumps({
+        "id": "cmpl-test", "object": "chat.completion", "model": "mistral-small-latest", "created": 0,
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    }).encode()
+    return (
+        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+
+@pytest.fixture
+def pooled_client(monkeypatch):
+    """
+    Opens the shared Mistral client with its network stubbed out: every connection it opens
+    replays the same two canned responses. Closes the client afterwards if a test did not.
+    """
+    monkeypatch.setattr(calls_to_ai, "api_key", "test-key")
+    for key in connection_stats:
+        monkeypatch.setitem(connection_stats, key, 0)
+    client = open_mistral_client()
+    http_client = client.sdk_configuration.async_client
+    # Below the pool, so the pool's connection handling and the trace hook run unchanged
+    http_client._transport._pool._network_backend = httpcore.AsyncMockBackend(
+        [chat_response_bytes("first"), chat_response_bytes("second")]
+    )
+    yield client
+    asyncio.run(close_mistral_client())
+
+def test_chat_completions_reuse_one_connection(pooled_client):
+    """
+    Test that consecutive chat completions go over the same pooled connection.
+
+    Expected Output:
+        - Both responses parsed
+        - Two requests, one new connection, one reuse
+    """
+    messages = [{"role": "user", "content": "Summarise this."}]
+
+    async def scenario():
+        first = await chat_completion(pooled_client, "mistral-small-latest", messages, {"type": "json_object"})
+        second = await chat_completion(pooled_client, "mistral-small-latest", messages, {"type": "json_object"})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first.choices[0].message.content == "first"
+    assert second.choices[0].message.content == "second"
+    assert connection_stats == {"requests": 2, "new_connections": 1}
+    assert mistral_connection_reuses() == 1
+
+def test_close_mistral_client_closes_pool(pooled_client):
+    """
+    Test that shutting the client down closes its HTTP client.
+
+    Expected Output:
+        - HTTP client closed and the shared client cleared
+    """
+    http_client = pooled_client.sdk_configuration.async_client
+    asyncio.run(close_mistral_client())
+    assert http_client.is_closed
+    assert calls_to_ai._mistral_client is None
+
+def test_regenerate_condenses_long_input(monkeypatch):
+    """
+    Test that regenerating a summary of a document over the input limit condenses it first.
+
+    Input:
+        - Document of about 500 tokens with a 100-token input limit
+    Expected Output:
+        - Chunk summaries requested before the regenerate call
+        - Regenerate call sent the condensed text, within the limit, and the feedback
+    """
+    monkeypatch.setattr(calls_to_ai, "SUMMARY_MAX_INPUT_TOKENS", 100)
+    monkeypatch.setattr(calls_to_ai, "SUMMARY_CHUNK_TOKENS", 60)
+    monkeypatch.setattr(calls_to_ai, "SUMMARY_CHUNK_OVERLAP_TOKENS", 0)
+    calls = []
+
+    async def fake_chat_completion(client, model, messages, response_format, operation="summarise"):
+        calls.append((operation, messages))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"summary {len(calls)}"))])
+
+    monkeypatch.setattr(calls_to_ai, "chat_completion", fake_chat_completion)
+    document = " ".join(f"sentence {index} of a long document." for index in range(60))
+    assert estimate_tokens(document) > calls_to_ai.SUMMARY_MAX_INPUT_TOKENS
+
+    asyncio.run(regenerate_chat_response(
+        None, "open-mistral-nemo", prompts, "documentation", [], document, {}, "Make it shorter"
+    ))
+
+    operations = [operation for operation, _ in calls]
+    assert operations[-1] == "regenerate"
+    assert operations[:-1] and set(operations[:-1]) == {"summarise_chunk"}
+    regenerate_messages = calls[-1][1]
+    assert document not in [message["content"] for message in regenerate_messages]
+    assert estimate_tokens(regenerate_messages[1]["content"]) <= calls_to_ai.SUMMARY_MAX_INPUT_TOKENS
+    assert regenerate_messages[-1]["content"] == "Make it shorter"
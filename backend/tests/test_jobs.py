@@ -0,0 +1,136 @@
+import asyncio
+import datetime
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+import services.jobs as jobs_module
+from services.jobs import JobQueue
+from exceptions import ServiceError
+
+@pytest.fixture
+def failures():
+    """
+    Records the jobs handed to the failure handler.
+    """
+    return []
+
+@pytest.fixture
+def make_queue(failures):
+    """
+    Builds a queue over an in-memory collection whose "test" jobs run the given handler.
+    """
+    def build(handler):
+        queue = JobQueue(AsyncMongoMockClient()["testdb"]["jobs"], workers=1)
+
+        async def on_failure(job):
+            failures.append(job["_id"])
+
+        queue.register("test", handler, on_failure=on_failure)
+        return queue
+    return build
+
+def test_heartbeat_renews_lease_within_a_stage(make_queue, monkeypatch):
+    """
+    Test that a handler working longer than the heartbeat interval keeps its lease without changing stage.
+
+    Expected Output:
+        - Lease expiry later during the handler than at claim time
+        - Job completed
+    """
+    monkeypatch.setattr(jobs_module, "JOB_HEARTBEAT_SECONDS", 0.05)
+    leases = []
+
+    async def handler(job, context):
+        await asyncio.sleep(0.3)
+        leases.append((await queue.get(job["_id"]))["leaseExpiresAt"])
+        return {}
+
+    queue = make_queue(handler)
+
+    async def scenario():
+        await queue.enqueue("test", {})
+        job = await queue._claim("worker")
+        await queue._run(job, "worker")
+        return job, await queue.get(job["_id"])
+
+    claimed, finished = asyncio.run(scenario())
+    assert leases[0] > claimed["leaseExpiresAt"].replace(tzinfo=None)
+    assert finished["status"] == "completed"
+
+def test_job_out_of_attempts_is_failed_not_reclaimed(make_queue, failures):
+    """
+    Test that a job whose worker died on its last attempt is failed instead of being claimed again.
+
+    Expected Output:
+        - Nothing to claim
+        - Job failed and handed to the failure handler once
+    """
+    queue = make_queue(lambda job, context: None)
+    expired = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+
+    async def scenario():
+        job = await queue.enqueue("test", {})
+        await queue.collection.update_one(
+            {"_id": job["_id"]},
+            {"$set": {"status": "running", "attempts": jobs_module.JOB_MAX_ATTEMPTS, "leaseExpiresAt": expired}},
+        )
+        claimed = await queue._claim("worker")
+        failed = await queue._fail_abandoned()
+        return job, claimed, failed, await queue._fail_abandoned(), await queue.get(job["_id"])
+
+    job, claimed, failed, again, stored = asyncio.run(scenario())
+    assert claimed is None
+    assert failed["_id"] == job["_id"]
+    assert again is None
+    assert stored["status"] == "failed"
+    assert failures == [job["_id"]]
+
+def test_failure_handler_runs_only_on_permanent_failure(make_queue, failures, monkeypatch):
+    """
+    Test that retried failures keep the job's files and the final failure releases them.
+
+    Expected Output:
+        - No failure handler call while attempts remain
+        - One call once the job fails for good
+    """
+    monkeypatch.setattr(jobs_module, "JOB_MAX_ATTEMPTS", 2)
+
+    async def handler(job, context):
+        raise RuntimeError("model unavailable")
+
+    queue = make_queue(handler)
+
+    async def scenario():
+        job = await queue.enqueue("test", {})
+        await queue._run(await queue._claim("worker"), "worker")
+        retried = await queue.get(job["_id"])
+        handled_before_last = list(failures)
+        await queue._run(await queue._claim("worker"), "worker")
+        return job, retried, handled_before_last, await queue.get(job["_id"])
+
+    job, retried, handled_before_last, stored = asyncio.run(scenario())
+    assert retried["status"] == "queued"
+    assert handled_before_last == []
+    assert stored["status"] == "failed"
+    assert failures == [job["_id"]]
+
+def test_invalid_input_fails_at_once(make_queue, failures):
+    """
+    Test that a ServiceError fails the job on its first attempt and runs the failure handler.
+
+    Expected Output:
+        - Job failed with the error's detail, failure handler called
+    """
+    async def handler(job, context):
+        raise ServiceError("Unable to decode file contents", status_code=400)
+
+    queue = make_queue(handler)
+
+    async def scenario():
+        job = await queue.enqueue("test", {})
+        await queue._run(await queue._claim("worker"), "worker")
+        return job, await queue.get(job["_id"])
+
+    job, stored = asyncio.run(scenario())
+    assert stored["status"] == "failed"
+    assert stored["error"] == "Unable to decode file contents"
+    assert failures == [job["_id"]]
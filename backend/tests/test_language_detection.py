@@ -0,0 +1,130 @@
+import os
+import time
+import pytest
+from services.language_detection import detect_language, LANGUAGES
+
+# Labelled snippets: tests/fixtures/language_corpus/<language>/<sample>.txt
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "language_corpus")
+# Held-out snippets in the same layout, written independently of the rules. Never tune the
+# rules against them: a sample that is worth fitting belongs in the corpus above instead
+HOLDOUT_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "language_holdout")
+
+# Minimum share of the corpus the classifier must label correctly
+MIN_ACCURACY = 0.9
+# Minimum accuracy on the held-out set overall, and per language (about six samples each)
+HOLDOUT_MIN_ACCURACY = 0.85
+HOLDOUT_MIN_LANGUAGE_ACCURACY = 0.75
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """
+    Loads a labelled language corpus.
+
+    Args:
+        corpus_dir (str): Directory with one sub-directory of samples per language
+
+    Returns:
+        list: (label, filename, text) tuples for every sample
+    """
+    samples = []
+    for label in sorted(os.listdir(corpus_dir)):
+        label_dir = os.path.join(corpus_dir, label)
+        for filename in sorted(os.listdir(label_dir)):
+            with open(os.path.join(label_dir, filename)) as f:
+                samples.append((label, filename, f.read()))
+    return samples
+
+def score_corpus(corpus_dir):
+    """
+    Runs the classifier over a labelled corpus.
+
+    Returns:
+        tuple: ({language: [correct, total]}, list of 'label/file -> predicted' misses)
+    """
+    results = {language: [0, 0] for language in LANGUAGES}
+    misses = []
+    for label, filename, text in load_corpus(corpus_dir):
+        predicted = detect_language(text)
+        results[label][1] += 1
+        if predicted == label:
+            results[label][0] += 1
+        else:
+            misses.append(f"{label}/{filename} -> {predicted}")
+    return results, misses
+
+@pytest.mark.parametrize("corpus_dir", [CORPUS_DIR, HOLDOUT_DIR])
+def test_corpus_covers_all_languages(corpus_dir):
+    """
+    Test that the labelled corpus and the held-out set have samples for every supported language.
+
+    Expected Output:
+        - At least five samples per language
+    """
+    labels = [label for label, _, _ in load_corpus(corpus_dir)]
+    for language in LANGUAGES:
+        assert labels.count(language) >= 5
+
+def test_detect_language_accuracy():
+    """
+    Benchmark the classifier's accuracy against the labelled corpus.
+
+    Expected Output:
+        - Overall accuracy of at least MIN_ACCURACY
+        - Every language individually reaching MIN_ACCURACY
+    """
+    results, misses = score_corpus(CORPUS_DIR)
+
+    correct = sum(hits for hits, _ in results.values())
+    total = sum(count for _, count in results.values())
+    assert correct / total >= MIN_ACCURACY, misses
+    for language, (hits, count) in results.items():
+        assert hits / count >= MIN_ACCURACY, (language, misses)
+
+def test_detect_language_holdout_accuracy():
+    """
+    Benchmark the classifier on samples its rules were not written against.
+
+    Expected Output:
+        - Overall accuracy of at least HOLDOUT_MIN_ACCURACY
+        - Every language reaching HOLDOUT_MIN_LANGUAGE_ACCURACY
+    """
+    results, misses = score_corpus(HOLDOUT_DIR)
+
+    correct = sum(hits for hits, _ in results.values())
+    total = sum(count for _, count in results.values())
+    assert correct / total >= HOLDOUT_MIN_ACCURACY, misses
+    for language, (hits, count) in results.items():
+        assert hits / count >= HOLDOUT_MIN_LANGUAGE_ACCURACY, (language, misses)
+
+def test_detect_language_latency():
+    """
+    Benchmark detection time over the corpus.
+
+    Expected Output:
+        - Average detection time well under a millisecond-scale budget
+    """
+    samples = [text for _, _, text in load_corpus()]
+    start = time.perf_counter()
+    for text in samples:
+        detect_language(text)
+    average = (time.perf_counter() - start) / len(samples)
+    assert average < 0.005
+
+@pytest.mark.parametrize("text", ["", "   ", "Hello there, this is a short note."])
+def test_detect_language_non_code(text):
+    """
+    Test that empty input and plain prose are not mistaken for code.
+
+    Expected Output:
+        - 'other'
+    """
+    assert detect_language(text) == "other"
+
+def test_detect_language_large_input():
+    """
+    Test that very large inputs are classified from their head only.
+
+    Expected Output:
+        - 'python' for a long Python file
+    """
+    text = "def add(a, b):\n    return a + b\n\n" * 50000
+    assert detect_language(text) == "python"
@@ -0,0 +1,87 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry
+from services.metrics import MetricsMiddleware, StatsCollector, http_requests, http_request_duration, latest_metrics
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware)
+
+@app.get("/items/{item_id}")
+async def get_item(item_id: str):
+    return {"id": item_id}
+
+@app.get("/stream")
+async def stream():
+    async def body():
+        for part in (b"a", b"b"):
+            yield part
+    return StreamingResponse(body())
+
+client = TestClient(app)
+
+def sample(metric, suffix="_total", **labels):
+    """
+    Reads the current value of one labelled series.
+
+    Returns:
+        float: The value, 0 when the series does not exist yet
+    """
+    for family in metric.collect():
+        for s in family.samples:
+            if s.name == family.name + suffix and s.labels == labels:
+                return s.value
+    return 0.0
+
+def test_requests_labelled_by_route_template():
+    """
+    Test that requests are counted under their route template, not the raw path.
+
+    Expected Output:
+        - Two requests to different IDs counted in one series
+        - Unknown paths grouped under 'unmatched'
+    """
+    before = sample(http_requests, method="GET", route="/items/{item_id}", status="200")
+    client.get("/items/1")
+    client.get("/items/2")
+    assert sample(http_requests, method="GET", route="/items/{item_id}", status="200") == before + 2
+
+    before = sample(http_requests, method="GET", route="unmatched", status="404")
+    assert client.get("/missing/path").status_code == 404
+    assert sample(http_requests, method="GET", route="unmatched", status="404") == before + 1
+
+def test_streamed_response_measured():
+    """
+    Test that streamed responses are recorded once their body has been sent.
+
+    Expected Output:
+        - One more latency observation for the streaming route
+    """
+    before = sample(http_request_duration, suffix="_count", method="GET", route="/stream")
+    assert client.get("/stream").content == b"ab"
+    assert sample(http_request_duration, suffix="_count", method="GET", route="/stream") == before + 1
+
+def test_stats_collector_exports_dict():
+    """
+    Test that an in-process stats dict is exported as a counter read at scrape time.
+
+    Expected Output:
+        - One series per key, reflecting later updates
+    """
+    stats = {"hits": 1, "misses": 0}
+    registry = CollectorRegistry()
+    registry.register(StatsCollector("test_cache", "Test cache events", stats))
+    stats["hits"] += 2
+    assert registry.get_sample_value("test_cache_total", {"event": "hits"}) == 3
+    assert registry.get_sample_value("test_cache_total", {"event": "misses"}) == 0
+
+def test_latest_metrics_format():
+    """
+    Test that the exposition is in the Prometheus text format.
+
+    Expected Output:
+        - Prometheus content type and application metric names in the body
+    """
+    body, content_type = latest_metrics()
+    assert content_type.startswith("text/plain")
+    assert b"briefly_http_requests_total" in body
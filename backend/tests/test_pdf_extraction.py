@@ -0,0 +1,172 @@
+import asyncio
+import os
+import time
+import pytest
+from PyPDF2 import PdfReader
+from reportlab.pdfgen import canvas
+import services.pdf_extraction as pdf_extraction
+from services.pdf_extraction import extract_pdf_text, shutdown_pdf_pool, time_limit, ExtractionTimeout, extract_page_range
+from services.utils import extract_text_from_file, StoredUploadFile
+from exceptions import ServiceError
+
+@pytest.fixture(scope="module", autouse=True)
+def pdf_pool():
+    """
+    Shuts the extraction process pool down once the module's tests are done.
+    """
+    yield
+    shutdown_pdf_pool()
+
+def write_pdf(path, pages, lines_per_page=1):
+    """
+    Writes a PDF whose pages start with a numbered line of text.
+
+    Returns:
+        str: Path of the written file
+    """
+    c = canvas.Canvas(str(path))
+    for page_num in range(pages):
+        c.drawString(100, 750, f"Page number {page_num}")
+        for line in range(1, lines_per_page):
+            c.drawString(72, 750 - line * 14, f"Line {line} of page {page_num}: the quick brown fox jumps over the lazy dog.")
+        c.showPage()
+    c.save()
+    return str(path)
+
+def extract_sequentially(path):
+    """
+    Reference extractor: reads every page in turn in this process.
+
+    Returns:
+        str: Text of all pages
+    """
+    return "".join(page.extract_text() for page in PdfReader(path).pages)
+
+def test_extract_pdf_text_in_page_order(tmp_path, monkeypatch):
+    """
+    Test that pages extracted across several worker tasks are joined in order.
+
+    Input:
+        - 23-page PDF split into ranges of 5 pages
+    Expected Output:
+        - Same text as the sequential extractor
+        - One timing per page
+    """
+    monkeypatch.setattr(pdf_extraction, "PDF_PAGES_PER_TASK", 5)
+    path = write_pdf(tmp_path / "ordered.pdf", 23)
+
+    extraction = asyncio.run(extract_pdf_text(path))
+
+    assert extraction["text"] == extract_sequentially(path)
+    assert extraction["pages"] == 23
+    assert len(extraction["page_timings"]) == 23
+    positions = [extraction["text"].index(f"Page number {page_num}") for page_num in range(23)]
+    assert positions == sorted(positions)
+
+def test_extract_pdf_text_page_limit(tmp_path, monkeypatch):
+    """
+    Test that documents over the page limit are rejected.
+
+    Expected Output:
+        - ServiceError with status 413
+    """
+    monkeypatch.setattr(pdf_extraction, "PDF_MAX_PAGES", 3)
+    path = write_pdf(tmp_path / "long.pdf", 4)
+
+    with pytest.raises(ServiceError) as exc_info:
+        asyncio.run(extract_pdf_text(path))
+    assert exc_info.value.status_code == 413
+
+def test_extract_pdf_text_time_limit(tmp_path, monkeypatch):
+    """
+    Test that extraction is stopped once it exceeds the time limit.
+
+    Expected Output:
+        - ServiceError with status 422
+    """
+    monkeypatch.setattr(pdf_extraction, "PDF_EXTRACT_TIMEOUT_SECONDS", 0)
+    path = write_pdf(tmp_path / "slow.pdf", 2)
+
+    with pytest.raises(ServiceError) as exc_info:
+        asyncio.run(extract_pdf_text(path))
+    assert exc_info.value.status_code == 422
+
+def test_time_limit_interrupts_running_work():
+    """
+    Test that work still running at the deadline is interrupted, as it is in the workers.
+
+    Expected Output:
+        - ExtractionTimeout raised out of a loop that would otherwise never end
+    """
+    started = time.perf_counter()
+    with pytest.raises(ExtractionTimeout):
+        with time_limit(time.time() + 0.1):
+            while True:
+                pass
+    assert time.perf_counter() - started < 5
+
+def test_page_range_past_deadline_returns_at_once(tmp_path):
+    """
+    Test that a task picked up after its document's deadline does no work.
+
+    Expected Output:
+        - ExtractionTimeout raised without extracting any page
+    """
+    path = write_pdf(tmp_path / "late.pdf", 2)
+
+    with pytest.raises(ExtractionTimeout):
+        extract_page_range(path, 0, 2, time.time() - 1)
+
+def test_extract_pdf_text_invalid_file(tmp_path):
+    """
+    Test that unreadable files are reported as bad input.
+
+    Expected Output:
+        - ServiceError with status 400
+    """
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"this is not a pdf")
+
+    with pytest.raises(ServiceError) as exc_info:
+        asyncio.run(extract_pdf_text(str(path)))
+    assert exc_info.value.status_code == 400
+
+def test_extract_pdf_text_parallel_speedup(tmp_path, monkeypatch):
+    """
+    Benchmark extraction of a long document against the sequential extractor.
+
+    Input:
+        - 300-page PDF
+    Expected Output:
+        - Identical text
+        - Faster than sequential extraction
+    """
+    if min(pdf_extraction.PDF_EXTRACT_WORKERS, os.cpu_count() or 1) < 2:
+        pytest.skip("Parallel extraction needs at least two CPUs and worker processes")
+    monkeypatch.setattr(pdf_extraction, "PDF_PAGES_PER_TASK", 25)
+    path = write_pdf(tmp_path / "paper.pdf", 300, lines_per_page=45)
+    # Warm the pool so process start-up is not part of the measurement
+    asyncio.run(extract_pdf_text(write_pdf(tmp_path / "warmup.pdf", 1)))
+
+    started = time.perf_counter()
+    expected = extract_sequentially(path)
+    sequential = time.perf_counter() - started
+
+    extraction = asyncio.run(extract_pdf_text(path))
+
+    assert extraction["text"] == expected
+    assert extraction["seconds"] < sequential
+
+def test_extract_text_from_file_rejects_pdf(tmp_path):
+    """
+    Test that the synchronous extractor refuses PDFs instead of decoding them as text.
+
+    Expected Output:
+        - ServiceError with status 400 naming the PDF path to use
+    """
+    path = write_pdf(tmp_path / "upload.pdf", 1)
+
+    with open(path, "rb") as f, pytest.raises(ServiceError) as exc_info:
+        extract_text_from_file(StoredUploadFile("upload.pdf", f))
+    assert exc_info.value.status_code == 400
+    assert "extract_text_from_stored_file" in exc_info.value.detail
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+import pytest
+import services.query_profiler as query_profiler_module
+from services.query_profiler import QueryProfiler, query_shape, returned_documents
+
+class FakeDatabase:
+    """
+    Stands in for a Motor database, answering explain commands.
+    """
+
+    def __init__(self, explained):
+        self.explained = explained
+
+    async def command(self, command):
+        self.explained.append(command)
+        return {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+
+class FakeClient:
+    """
+    Stands in for the Motor client, recording the explain commands it runs.
+    """
+
+    def __init__(self):
+        self.explained = []
+
+    def __getitem__(self, name):
+        return FakeDatabase(self.explained)
+
+def run_command(profiler, request_id, command_name, command, milliseconds, reply=None):
+    """
+    Feeds the profiler the started and succeeded events of one command.
+    """
+    started = SimpleNamespace(command_name=command_name, command=command, database_name="internaldb",
+                              connection_id=("localhost", 27017), request_id=request_id)
+    profiler.started(started)
+    succeeded = SimpleNamespace(command_name=command_name, connection_id=("localhost", 27017), request_id=request_id,
+                                duration_micros=int(milliseconds * 1000), reply=reply or {"ok": 1})
+    profiler.succeeded(succeeded)
+
+def find_command(user_id):
+    return {"find": "summaries", "filter": {"userId": user_id}, "sort": {"createdAt": -1}, "lsid": {"id": "session"}}
+
+def test_query_shape_removes_values():
+    """
+    Test that commands differing only in their values share a shape.
+
+    Expected Output:
+        - Same shape for two users' queries, with values replaced by '?'
+        - Aggregations described by their stages
+    """
+    assert query_shape("find", find_command("alice")) == query_shape("find", find_command("bob"))
+    assert query_shape("find", find_command("alice")) == 'find summaries {"userId": "?"} sort {"createdAt": -1}'
+    pipeline = {"aggregate": "shared_summaries", "pipeline": [{"$match": {"recipient_id": "bob"}}, {"$lookup": {"from": "summaries"}}]}
+    assert query_shape("aggregate", pipeline) == 'aggregate shared_summaries [$match {"recipient_id": "?"}, $lookup]'
+
+def test_returned_documents():
+    """
+    Test counting the documents in command replies.
+
+    Expected Output:
+        - Cursor batches, findAndModify values and write counts all counted
+    """
+    assert returned_documents({"cursor": {"firstBatch": [{}, {}]}}) == 2
+    assert returned_documents({"cursor": {"nextBatch": [{}]}}) == 1
+    assert returned_documents({"value": None}) == 0
+    assert returned_documents({"n": 3}) == 3
+
+def test_profiler_ranks_query_shapes():
+    """
+    Test that commands are grouped by shape and ranked by cost.
+
+    Expected Output:
+        - One entry per shape with counts, durations and documents
+        - Reply bytes recorded for the slow command only
+        - Entries ordered by the requested field
+    """
+    profiler = QueryProfiler()
+    run_command(profiler, 1, "find", find_command("alice"), 4, {"cursor": {"firstBatch": [{}, {}]}})
+    run_command(profiler, 2, "find", find_command("bob"), 6, {"cursor": {"firstBatch": [{}]}})
+    run_command(profiler, 3, "insert", {"insert": "summaries", "documents": [{}]}, 20, {"n": 1})
+    run_command(profiler, 5, "delete", {"delete": "summaries", "deletes": [{"q": {"_id": "x"}}]}, 150, {"n": 1})
+    run_command(profiler, 4, "hello", {"hello": 1}, 50)
+
+    top = profiler.top()
+    assert [entry["shape"].split()[0] for entry in top] == ["delete", "insert", "find"]
+    find = top[2]
+    assert find["count"] == 2
+    assert find["total_ms"] == 10
+    assert find["max_ms"] == 6
+    assert find["mean_ms"] == 5
+    assert find["documents"] == 3
+    # Replies are only sized for slow commands
+    assert find["bytes"] == 0
+    assert top[0]["bytes"] > 0
+    assert profiler.top(order_by="count")[0]["shape"] == find["shape"]
+
+def test_profiler_caps_tracked_shapes():
+    """
+    Test that shapes beyond the limit are counted but not tracked.
+
+    Expected Output:
+        - At most max_shapes entries, the rest counted as untracked
+    """
+    profiler = QueryProfiler(max_shapes=1)
+    run_command(profiler, 1, "find", find_command("alice"), 1)
+    run_command(profiler, 2, "count", {"count": "users", "query": {"email": "a"}}, 1)
+    assert len(profiler.top()) == 1
+    assert profiler.untracked == 1
+
+def test_slow_query_logged_and_explained(monkeypatch, caplog):
+    """
+    Test that slow commands are logged and explained once per interval.
+
+    Expected Output:
+        - A warning for each slow command
+        - A single explain, without the driver's session fields, and its plan logged
+    """
+    monkeypatch.setattr(query_profiler_module, "MONGO_SLOW_QUERY_MS", 10)
+    profiler = QueryProfiler()
+    client = FakeClient()
+
+    async def scenario():
+        profiler.start(client)
+        run_command(profiler, 1, "find", find_command("alice"), 5)
+        run_command(profiler, 2, "find", find_command("alice"), 50)
+        run_command(profiler, 3, "find", find_command("bob"), 60)
+        await asyncio.sleep(0.05)
+        await profiler.stop()
+
+    with caplog.at_level(logging.WARNING, logger="services.query_profiler"):
+        asyncio.run(scenario())
+
+    assert len([record for record in caplog.records if record.getMessage().startswith("Slow find")]) == 2
+    assert len(client.explained) == 1
+    assert client.explained[0]["explain"] == {"find": "summaries", "filter": {"userId": "alice"}, "sort": {"createdAt": -1}}
+    assert any("COLLSCAN" in record.getMessage() for record in caplog.records)
+    assert profiler.top()[0]["slow"] == 2
@@ -0,0 +1,189 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+import services.rate_limiter as rate_limiter_module
+import services.calls_to_ai as calls_to_ai
+from services.calls_to_ai import chat_completion, stream_chat
+from services.rate_limiter import TokenBucket, LocalRateLimiter, MongoRateLimiter
+
+class FakeClock:
+    """
+    Stands in for the time and asyncio.sleep used by the limiters; sleeping advances the clock.
+    Starts at the beginning of the next minute, so window documents are not already past their TTL.
+    """
+
+    def __init__(self):
+        self.start_window = int(time.time() // 60) + 1
+        self.now = float(self.start_window * 60)
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Runs the limiters on a fake clock.
+    """
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(time=clock.time, monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limiter_module, "asyncio", SimpleNamespace(sleep=clock.sleep, Lock=asyncio.Lock))
+    return clock
+
+@pytest.fixture
+def limits(monkeypatch):
+    """
+    Gives model-a a quota of 2 requests/min and model-b one of 100 requests/min, both 1000 tokens/min.
+    """
+    monkeypatch.setenv("MISTRAL_RPM_MODEL_A", "2")
+    monkeypatch.setenv("MISTRAL_RPM_MODEL_B", "100")
+    monkeypatch.setenv("MISTRAL_TPM_MODEL_A", "1000")
+    monkeypatch.setenv("MISTRAL_TPM_MODEL_B", "1000")
+
+def test_token_bucket_refills_over_time(clock):
+    """
+    Test that an empty bucket refills at its rate and never beyond its capacity.
+
+    Expected Output:
+        - A wait of one refill interval when empty, shrinking as time passes
+        - No wait, and a full bucket, after a long idle period
+    """
+    bucket = TokenBucket(60, period=60)
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    clock.now += 600
+    assert bucket.wait_time(1) == 0
+    assert bucket.tokens == 60
+
+def test_token_bucket_overuse_delays_next_request(clock):
+    """
+    Test that consuming more than the balance is carried as debt.
+
+    Expected Output:
+        - Wait covers the debt as well as the requested amount
+    """
+    bucket = TokenBucket(60, period=60)
+    bucket.consume(90)
+    assert bucket.wait_time(1) == pytest.approx(31.0)
+
+def test_local_limiter_waits_per_model(clock, limits):
+    """
+    Test that a model over its quota waits without holding up other models.
+
+    Expected Output:
+        - No wait for the first two model-a requests, a wait of 30s for the third
+        - No wait for model-b meanwhile
+    """
+    limiter = LocalRateLimiter()
+
+    async def scenario():
+        await limiter.acquire("model-a", 10)
+        await limiter.acquire("model-a", 10)
+        assert clock.sleeps == []
+        await limiter.acquire("model-b", 10)
+        assert clock.sleeps == []
+        await limiter.acquire("model-a", 10)
+
+    asyncio.run(scenario())
+    assert sum(clock.sleeps) == pytest.approx(30.0)
+
+def test_local_limiter_settle_corrects_tokens(clock, limits):
+    """
+    Test that settling replaces the estimate with the reported usage.
+
+    Expected Output:
+        - Token balance reduced by the actual usage, not the estimate
+    """
+    limiter = LocalRateLimiter()
+
+    async def scenario():
+        await limiter.acquire("model-a", 100)
+        await limiter.settle("model-a", 100, 400)
+
+    asyncio.run(scenario())
+    (_, token_bucket), _ = limiter._get("model-a")
+    assert token_bucket.tokens == pytest.approx(600)
+
+def test_mongo_limiter_waits_for_next_window(clock, limits):
+    """
+    Test that the shared limiter admits requests up to the quota of the current minute.
+
+    Expected Output:
+        - Two requests admitted in the first window
+        - The third admitted in the next window after sleeping until it starts
+    """
+    limiter = MongoRateLimiter(AsyncMongoMockClient()["testdb"]["rate_limits"])
+
+    async def scenario():
+        return [await limiter.acquire("model-a", 10) for _ in range(3)]
+
+    windows = asyncio.run(scenario())
+    assert windows == [clock.start_window, clock.start_window, clock.start_window + 1]
+    assert clock.sleeps == [60.0]
+
+def test_mongo_limiter_settles_admitting_window(clock, limits):
+    """
+    Test that a correction settled after the minute rolled over goes to the window that admitted the request.
+
+    Expected Output:
+        - Admitting window charged the actual usage
+        - No correction applied to, or window created for, the current minute
+    """
+    collection = AsyncMongoMockClient()["testdb"]["rate_limits"]
+    limiter = MongoRateLimiter(collection)
+
+    async def scenario():
+        window = await limiter.acquire("model-a", 100)
+        clock.now += 90
+        await limiter.settle("model-a", 100, 250, window)
+        return window, await collection.find_one({"_id": f"model-a:{window}"}), await collection.count_documents({})
+
+    window, admitting, count = asyncio.run(scenario())
+    assert window == clock.start_window
+    assert admitting["tokens"] == 250
+    assert count == 1
+
+class FailingChat:
+    """
+    Stands in for client.chat: every request fails the way a timeout or 5xx would.
+    """
+
+    async def complete_async(self, **kwargs):
+        raise TimeoutError("request timed out")
+
+    async def stream_async(self, **kwargs):
+        raise TimeoutError("request timed out")
+
+def test_failed_requests_release_their_estimate(clock, limits, monkeypatch):
+    """
+    Test that requests which raise settle to zero tokens instead of keeping their estimate.
+
+    Expected Output:
+        - The error reaches the caller, for completions and streams alike
+        - A full token bucket afterwards
+    """
+    limiter = LocalRateLimiter()
+    monkeypatch.setattr(calls_to_ai, "rate_limiter", limiter)
+    client = SimpleNamespace(chat=FailingChat())
+    messages = [{"role": "user", "content": "x" * 2000}]
+
+    async def scenario():
+        with pytest.raises(TimeoutError):
+            await chat_completion(client, "model-a", messages, {"type": "text"})
+        with pytest.raises(TimeoutError):
+            async for _ in stream_chat(client, "model-a", messages, {"type": "text"}):
+                pass
+
+    asyncio.run(scenario())
+    (_, token_bucket), _ = limiter._get("model-a")
+    assert token_bucket.tokens == pytest.approx(1000)
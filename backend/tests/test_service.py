@@ -1,4 +1,6 @@
 import pytest
+import asyncio
+import threading
 import uuid
 from fastapi.testclient import TestClient
 from main import app
@@ -6,12 +8,15 @@ from models.models import User, Summary
 import datetime
 import os
 from gridfs import GridFS
-from pymongo import MongoClient
+from pymongo import MongoClient, monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
 from io import BytesIO
 from reportlab.pdfgen import canvas
 from docx import Document
 from gridfs import GridFS
 from services.service import service_download_file
+import services.service as service_module
+from services.indexes import missing_indexes, collection_scans
 from fastapi.responses import StreamingResponse
 from bson import ObjectId
 from fastapi.exceptions import HTTPException
@@ -26,6 +31,31 @@ summaries_collection = db["summaries"]
 shared_summaries_collection = db["shared_summaries"]
 grid_fs = GridFS(db)
 
+@pytest.fixture(scope="module", autouse=True)
+def app_session():
+    """
+    Keeps a single TestClient session open for the whole module.
+    The async Mongo client binds to the first event loop it runs on, so all
+    requests and direct service calls must share the client's portal loop.
+    """
+    with client:
+        yield client
+
+def wait_for_job(job_id, headers, timeout=60):
+    """
+    Polls a background job until it finishes.
+    
+    Returns:
+        dict: The serialized job once it is completed or failed
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}", headers=headers).json()["result"]
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.5)
+    raise AssertionError(f"Job {job_id} did not finish within {timeout}s")
+
 @pytest.fixture(scope="module", autouse=True)
 def setup_database():
     """
@@ -153,6 +183,17 @@ def create_summary(create_user):
     print("Create summary ",response.json())
     return response.json(), auth_token
 
+def test_indexes_cover_hot_queries():
+    """
+    Test that startup created every expected index and no hot query scans a whole collection.
+    
+    Expected Output:
+        - No missing indexes
+        - No COLLSCAN plans
+    """
+    assert client.portal.call(missing_indexes) == []
+    assert client.portal.call(collection_scans) == []
+
 def test_create_user():
     """
     Test user creation endpoint.
@@ -230,7 +271,9 @@ def test_regenerate_feedback_with_file():
     print("upload_response")
     print(upload_response)
     print("upload_response")
-    assert upload_response.status_code == 201
+    assert upload_response.status_code == 202
+    job = wait_for_job(upload_response.json()["result"]["job_id"], headers)
+    assert job["status"] == "completed"
     
     # Get the created summary
     summaries_response = client.get(f"/summaries/{userId}", headers=headers)
@@ -327,6 +370,30 @@ def test_create_user_with_existing_email():
     assert response.status_code == 409  # Conflict status code for existing user
     assert response.json().get("detail") == "User Already Exists"
 
+def test_create_user_with_existing_email_different_phone():
+    """
+    Test creating a user with a registered email but a different phone number.
+    Expected Output:
+        - 409 status code
+        - "User Already Exists" error message
+        - No second account for the email
+    """
+    user_data = User(
+        firstName="Alice",
+        lastName="Smith",
+        phone="+14132752734",
+        email="alice.smith@example.com",
+        password="password123"
+    )
+    user_data_dict = user_data.dict()
+    user_data_dict['createdAt'] = user_data.createdAt.isoformat()
+    user_data_dict['lastLoggedInAt'] = user_data.lastLoggedInAt.isoformat()
+
+    response = client.post("/user/create", json=user_data_dict)
+    assert response.status_code == 409
+    assert response.json().get("detail") == "User Already Exists"
+    assert users_collection.count_documents({"email": "alice.smith@example.com"}) == 1
+
 def test_verify_user():
     """
     Test user verification with valid credentials.
@@ -376,6 +443,61 @@ def test_create_summary():
     assert response["status"] == "OK"
     assert "summary_id" in response['result']
 
+def test_create_summaries_batch():
+    """
+    Test creating several summaries in one request.
+    
+    Input:
+        - Two valid items and one without initialData
+    Expected Output:
+        - 200 status code
+        - Per-item results in request order, with only the invalid item failed
+        - The created summaries saved
+    """
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    auth_token = response.json()['result']['auth_token']
+    userId = response.json()['result']['user']['id']
+    batch = [
+        {"userId": userId, "type": "code", "uploadType": "upload", "initialData": "print('Hello World')"},
+        {"userId": userId, "type": "code", "uploadType": "upload"},
+        {"userId": userId, "type": "code", "uploadType": "upload", "initialData": "print('Goodbye World')"},
+    ]
+
+    time.sleep(3)
+    response = client.post("/summary/create/batch", json=batch, headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+    result = response.json()["result"]
+    assert result["created"] == 2
+    assert result["failed"] == 1
+    assert [item["status"] for item in result["results"]] == ["created", "failed", "created"]
+    assert [item["index"] for item in result["results"]] == [0, 1, 2]
+    for item in (result["results"][0], result["results"][2]):
+        assert summaries_collection.find_one({"_id": item["summary_id"]}) is not None
+
+def test_create_summaries_batch_too_large(monkeypatch):
+    """
+    Test that batches over the item limit are rejected.
+    
+    Expected Output:
+        - 422 status code
+    """
+    monkeypatch.setattr(service_module, "SUMMARY_BATCH_MAX_ITEMS", 1)
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    auth_token = response.json()['result']['auth_token']
+    userId = response.json()['result']['user']['id']
+    item = {"userId": userId, "type": "code", "uploadType": "upload", "initialData": "print(1)"}
+
+    response = client.post("/summary/create/batch", json=[item, item], headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 422
+
 def test_user_summaries():
     """
     Test retrieving all summaries for a user.
@@ -400,6 +522,53 @@ def test_user_summaries():
     assert response.status_code == 200
     assert isinstance(response.json()["result"], list)
 
+def test_user_summaries_pagination():
+    """
+    Test paging through a user's summaries with cursors.
+    
+    Expected Output:
+        - Pages of at most the requested size, in the same order as the unpaged list
+        - Entries with a preview of at most SUMMARY_PREVIEW_CHARS characters and no full text
+    """
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    headers = {"Authorization": f"Bearer {response.json()['result']['auth_token']}"}
+    userId = response.json()['result']['user']['id']
+
+    summary_ids = [f"paged-summary-{index}" for index in range(7)]
+    summaries_collection.insert_many([
+        {"_id": summary_id, "userId": userId, "type": "code", "uploadType": "text", "title": summary_id,
+         "initialData": "print('Hello')", "outputData": "x" * 500,
+         "createdAt": datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=index // 3)}
+        for index, summary_id in enumerate(summary_ids)
+    ])
+    try:
+        everything = client.get(f"/summaries/{userId}", headers=headers).json()["result"]
+        paged = []
+        cursor = None
+        while True:
+            params = {"limit": 3}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(f"/summaries/{userId}", params=params, headers=headers)
+            assert response.status_code == 200
+            assert len(response.json()["result"]) <= 3
+            paged.extend(response.json()["result"])
+            cursor = response.json()["next_cursor"]
+            if not cursor:
+                break
+
+        assert sorted(summary["id"] for summary in paged) == sorted(summary["id"] for summary in everything)
+        assert [summary["id"] for summary in paged if summary["id"] in summary_ids] == sorted(summary_ids, reverse=True)
+        entry = next(summary for summary in paged if summary["id"] in summary_ids)
+        assert "outputData" not in entry and "initialData" not in entry
+        assert entry["preview"] == "x" * service_module.SUMMARY_PREVIEW_CHARS
+    finally:
+        summaries_collection.delete_many({"_id": {"$in": summary_ids}})
+
 def test_delete_summary():
     """
     Test deleting a specific summary.
@@ -531,6 +700,60 @@ def test_share_summary_with_self():
     assert share_response.status_code == 400  # Expecting Bad Request
     assert share_response.json().get("detail") == "Failed to share summary: 400: You cannot share a summary with yourself."
 
+def test_share_summary_bulk():
+    """
+    Test sharing a summary with several recipients in one request.
+    
+    Input:
+        - Bob (twice), the summary's owner and an unregistered address
+    Expected Output:
+        - 200 status code
+        - One outcome per distinct recipient, in request order
+        - A single share record for Bob, even when the request is repeated
+    """
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    auth_token = response.json()['result']['auth_token']
+    userId = response.json()['result']['user']['id']
+    summary = summaries_collection.find_one({'userId': userId})
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    recipients = ["bob.johnson@example.com", "alice.smith@example.com", "nobody@example.com", "bob.johnson@example.com"]
+
+    response = client.post("/summary/share/bulk", json={"summary_id": summary["_id"], "recipients": recipients}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["result"]["results"]
+    assert [result["recipient"] for result in results] == recipients[:3]
+    assert results[0]["status"] in ("shared", "already_shared")
+    assert results[1]["status"] == "self"
+    assert results[2]["status"] == "not_found"
+
+    response = client.post("/summary/share/bulk", json={"summary_id": summary["_id"], "recipients": recipients}, headers=headers)
+    assert response.json()["result"]["shared"] == 0
+    assert response.json()["result"]["results"][0]["status"] == "already_shared"
+    bob = users_collection.find_one({"email": "bob.johnson@example.com"})
+    assert shared_summaries_collection.count_documents({"summary_id": summary["_id"], "recipient_id": bob["_id"]}) == 1
+
+def test_share_summary_bulk_not_found():
+    """
+    Test bulk sharing a summary that doesn't exist.
+    
+    Expected Output:
+        - 404 status code
+    """
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    auth_token = response.json()['result']['auth_token']
+
+    response = client.post("/summary/share/bulk", json={"summary_id": str(uuid.uuid4()), "recipients": ["bob.johnson@example.com"]},
+                           headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 404
+
 def test_get_summary_success():
     """
     Test retrieving a specific summary.
@@ -656,6 +879,174 @@ def test_get_shared_summaries_invalid_user():
     assert response.status_code == 200  # Assuming the API returns an empty list for non-existent users
     assert response.json()["result"] == []  # Expecting an empty list since the user does not exist
 
+class CommandCounter(monitoring.CommandListener):
+    """Records the name of every command sent to MongoDB."""
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        self.commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+@pytest.fixture
+def shared_inbox():
+    """
+    Shares 25 of Alice's summaries (plus one whose summary was deleted) with Bob.
+    
+    Returns:
+        str: Bob's user ID
+    """
+    sender_id = "03b4aab0-02bf-4920-be97-301f942dadc9"
+    recipient_id = "aac0c1cc-8af4-4501-81a4-ee10a90cbbcb"
+    shared_at = datetime.datetime(2024, 1, 1)
+    summary_ids = [f"inbox-summary-{index}" for index in range(25)]
+    summaries_collection.insert_many([
+        {"_id": summary_id, "userId": sender_id, "type": "code", "uploadType": "text", "title": summary_id,
+         "initialData": "print('Hello')", "outputData": "Summary", "createdAt": shared_at}
+        for summary_id in summary_ids
+    ])
+    shared_summaries_collection.insert_many([
+        {"_id": f"inbox-share-{index}", "summary_id": summary_id, "sender_id": sender_id,
+         "recipient_id": recipient_id, "shared_at": shared_at + datetime.timedelta(minutes=index // 2)}
+        for index, summary_id in enumerate(summary_ids + ["deleted-summary"])
+    ])
+    yield recipient_id
+    summaries_collection.delete_many({"_id": {"$in": summary_ids}})
+    shared_summaries_collection.delete_many({"_id": {"$regex": "^inbox-share-"}})
+
+def test_get_shared_summaries_round_trips(shared_inbox, monkeypatch):
+    """
+    Test that the shared inbox costs the same number of database round-trips however many shares it holds.
+    
+    Expected Output:
+        - A single aggregate command for the whole inbox
+        - Shares whose summary no longer exists are skipped
+    """
+    counter = CommandCounter()
+    counting_client = AsyncIOMotorClient(os.environ['DATABASE_URL'], event_listeners=[counter])
+    monkeypatch.setattr(service_module, "shared_summaries_collection_name", counting_client.internaldb["shared_summaries"])
+
+    res = client.portal.call(service_module.service_get_shared_summaries, shared_inbox)
+
+    assert len(res["summaries"]) >= 25
+    assert "deleted-summary" not in [summary["id"] for summary in res["summaries"]]
+    assert counter.commands == ["aggregate"]
+
+def test_get_shared_summaries_pagination(shared_inbox):
+    """
+    Test paging through the shared inbox with cursors.
+    
+    Expected Output:
+        - Pages of at most the requested size, newest first
+        - Every shared summary exactly once across the pages
+        - 422 status code for a malformed cursor
+    """
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    headers = {"Authorization": f"Bearer {response.json()['result']['auth_token']}"}
+
+    everything = client.get(f"/user/{shared_inbox}/shared-summaries", headers=headers).json()["result"]
+    paged = []
+    cursor = None
+    while True:
+        params = {"limit": 10}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"/user/{shared_inbox}/shared-summaries", params=params, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()["result"]) <= 10
+        paged.extend(response.json()["result"])
+        cursor = response.json()["next_cursor"]
+        if not cursor:
+            break
+    assert [summary["id"] for summary in paged] == [summary["id"] for summary in everything]
+
+    response = client.get(f"/user/{shared_inbox}/shared-summaries", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.fixture
+def search_corpus():
+    """
+    Gives Bob summaries to search: his own, some Alice shared with him, and one she did not.
+    
+    Returns:
+        dict: Bob's auth headers
+    """
+    alice_id = "03b4aab0-02bf-4920-be97-301f942dadc9"
+    bob_id = "aac0c1cc-8af4-4501-81a4-ee10a90cbbcb"
+    created_at = datetime.datetime(2024, 1, 1)
+    documents = [
+        {"_id": "search-title", "userId": bob_id, "title": "Quicksort walkthrough", "outputData": "Sorting an array in place."},
+        {"_id": "search-body", "userId": bob_id, "title": "Notes", "outputData": "Mentions quicksort once."},
+        {"_id": "search-shared", "userId": alice_id, "title": "Merge helpers", "outputData": "Falls back to quicksort for small runs."},
+        {"_id": "search-private", "userId": alice_id, "title": "Quicksort internals", "outputData": "Alice's own quicksort notes."},
+    ]
+    documents += [
+        {"_id": f"search-page-{index}", "userId": bob_id, "title": f"Heapsort note {index}", "outputData": "Heapsort details."}
+        for index in range(7)
+    ]
+    summaries_collection.insert_many([
+        {"type": "code", "uploadType": "text", "initialData": "", "createdAt": created_at, **document}
+        for document in documents
+    ])
+    shared_summaries_collection.insert_one({"_id": "search-share", "summary_id": "search-shared", "sender_id": alice_id,
+                                            "recipient_id": bob_id, "shared_at": created_at})
+    response = client.post("/user/verify", json={"email": "bob.johnson@example.com", "password": "password123"})
+    yield {"Authorization": f"Bearer {response.json()['result']['auth_token']}"}
+    summaries_collection.delete_many({"_id": {"$regex": "^search-"}})
+    shared_summaries_collection.delete_one({"_id": "search-share"})
+
+def test_search_summaries(search_corpus):
+    """
+    Test searching owned and shared summaries.
+    
+    Expected Output:
+        - Bob's own and shared matches, title matches ranked first
+        - Summaries not shared with Bob excluded
+    """
+    response = client.get("/search/summaries", params={"q": "quicksort"}, headers=search_corpus)
+    assert response.status_code == 200
+    results = response.json()["result"]
+    assert {result["id"] for result in results} == {"search-title", "search-body", "search-shared"}
+    assert results[0]["id"] == "search-title"
+    assert [result["score"] for result in results] == sorted((result["score"] for result in results), reverse=True)
+    assert {result["id"]: result["shared"] for result in results}["search-shared"] is True
+
+def test_search_summaries_pagination(search_corpus):
+    """
+    Test paging through search results with cursors.
+    
+    Expected Output:
+        - Every match exactly once across pages of at most the requested size
+        - 422 status code for a blank query or a malformed cursor
+    """
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "heapsort", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/search/summaries", params=params, headers=search_corpus)
+        assert response.status_code == 200
+        assert len(response.json()["result"]) <= 3
+        seen.extend(result["id"] for result in response.json()["result"])
+        cursor = response.json()["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(f"search-page-{index}" for index in range(7))
+
+    assert client.get("/search/summaries", params={"q": "  "}, headers=search_corpus).status_code == 422
+    response = client.get("/search/summaries", params={"q": "heapsort", "cursor": "not-a-cursor"}, headers=search_corpus)
+    assert response.status_code == 422
+
 @pytest.fixture
 def sample_pdf():
     """
@@ -675,7 +1066,7 @@ def sample_pdf():
     buffer.seek(0)
     return buffer
 
-def test_extract_text_from_pdf(sample_pdf):
+def test_extract_text_from_pdf(sample_pdf, tmp_path):
     """
     Test PDF text extraction functionality.
     
@@ -684,17 +1075,12 @@ def test_extract_text_from_pdf(sample_pdf):
     Expected Output:
         - Extracted text containing the PDF content
     """
-    # Create a mock UploadFile
-    class MockUploadFile:
-        def __init__(self, filename, contents):
-            self.filename = filename
-            self.file = BytesIO(contents)
-
-    mock_file = MockUploadFile("test.pdf", sample_pdf.getvalue())
+    path = tmp_path / "test.pdf"
+    path.write_bytes(sample_pdf.getvalue())
     
-    # Extract text from the PDF
-    from services.service import extract_text_from_pdf
-    extracted_text = extract_text_from_pdf(mock_file)
+    # Extract text from the PDF in the worker pool
+    from services.pdf_extraction import extract_pdf_text
+    extracted_text = asyncio.run(extract_pdf_text(str(path)))["text"]
     
     # Check if the text was extracted (exact matching might be tricky due to PDF formatting)
     assert "Hello World" in extracted_text
@@ -741,6 +1127,37 @@ async def test_extract_text_from_file(sample_text):
     assert "Hello World" in extracted_text
     assert "This is a test text file" in extracted_text
 
+def test_extract_text_from_file_decodes_in_chunks():
+    """
+    Test that text read from the file object is decoded chunk by chunk.
+    
+    Input:
+        - UTF-8 text with multi-byte characters split across 7-byte chunks
+    Expected Output:
+        - Text identical to decoding the whole file at once
+    """
+    from services.utils import extract_text_from_file, decode_utf8_stream, StoredUploadFile
+    text = "Résumé — naïve café 文字 🙂\n" * 50
+    
+    assert decode_utf8_stream(BytesIO(text.encode('utf-8')), chunk_size=7) == text
+    assert extract_text_from_file(StoredUploadFile("notes.txt", BytesIO(text.encode('utf-8')))) == text
+
+def test_extract_text_from_file_invalid_utf8():
+    """
+    Test that undecodable text files are reported as bad input.
+    
+    Input:
+        - File ending in a truncated multi-byte character
+    Expected Output:
+        - ServiceError with status 400
+    """
+    from services.utils import extract_text_from_file, StoredUploadFile
+    from exceptions import ServiceError
+    
+    with pytest.raises(ServiceError) as exc_info:
+        extract_text_from_file(StoredUploadFile("notes.txt", BytesIO("café".encode('utf-8')[:-1])))
+    assert exc_info.value.status_code == 400
+
 
 @pytest.fixture
 def sample_docx():
@@ -785,6 +1202,28 @@ async def test_extract_text_from_docx(sample_docx):
     assert "Hello World" in extracted_text
     assert "This is a test DOCX file" in extracted_text
 
+def test_split_into_chunks():
+    """
+    Test splitting long text into token-bounded overlapping chunks.
+    
+    Input:
+        - Long text of numbered sentences
+    Expected Output:
+        - Every chunk within the token budget
+        - Consecutive chunks overlapping
+        - All sentences present in order
+    """
+    from services.utils import split_into_chunks
+    text = " ".join(f"Sentence number {i}." for i in range(5000))
+    chunks = split_into_chunks(text, chunk_tokens=1000, overlap_tokens=100)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 4000 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous[-200:] in current
+    assert "Sentence number 0." in chunks[0]
+    assert "Sentence number 4999." in chunks[-1]
+
 def test_regenerate_feedback_with_text():
     """
     Test regenerating a text-based summary with feedback.
@@ -866,7 +1305,7 @@ def test_service_download_file_not_found():
 
     # Ensure the service raises the expected HTTPException
     with pytest.raises(HTTPException) as exc_info:
-        service_download_file(non_existent_file_id)
+        client.portal.call(service_download_file, non_existent_file_id)
 
     # Verify exception details
     assert exc_info.value.status_code == 404
@@ -897,7 +1336,7 @@ def test_service_download_file(sample_pdf):
     except Exception as e:
         pytest.fail(f"File was not stored correctly: {e}")
 
-    response = service_download_file(str(file_id))
+    response = client.portal.call(service_download_file, str(file_id))
     assert isinstance(response, StreamingResponse)
 
     assert response.headers["Content-Disposition"] == "attachment; filename=test.pdf"
@@ -935,6 +1374,103 @@ def test_download_file(sample_pdf):
     # Cleanup: Delete the test file from GridFS
     grid_fs.delete(file_id)
 
+@pytest.fixture
+def large_file():
+    """
+    Stores a file spanning several GridFS chunks.
+    
+    Returns:
+        tuple: (file ID, file contents)
+    """
+    contents = bytes(range(256)) * 4000
+    file_id = GridFS(db).put(contents, filename="large.bin", content_type="application/octet-stream")
+    yield str(file_id), contents
+    GridFS(db).delete(file_id)
+
+def test_download_file_range(large_file):
+    """
+    Test single and suffix byte-range downloads.
+    
+    Expected Output:
+        - 206 status code with Content-Range and only the requested bytes
+        - 416 status code for a range past the end of the file
+    """
+    file_id, contents = large_file
+
+    response = client.get(f"/download/{file_id}", headers={"Range": "bytes=300000-300009"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 300000-300009/{len(contents)}"
+    assert response.content == contents[300000:300010]
+
+    response = client.get(f"/download/{file_id}", headers={"Range": "bytes=-5"})
+    assert response.status_code == 206
+    assert response.content == contents[-5:]
+
+    response = client.get(f"/download/{file_id}", headers={"Range": f"bytes={len(contents)}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(contents)}"
+
+def test_download_file_chunk_size(large_file, monkeypatch):
+    """
+    Test that downloads are served in DOWNLOAD_CHUNK_SIZE blocks with read-ahead.
+    
+    Expected Output:
+        - Blocks no larger than the configured size
+        - Content identical to the stored file, full and ranged
+    """
+    file_id, contents = large_file
+    monkeypatch.setattr(service_module, "DOWNLOAD_CHUNK_SIZE", 64 * 1024)
+
+    with client.stream("GET", f"/download/{file_id}") as response:
+        blocks = list(response.iter_raw())
+    assert max(len(block) for block in blocks) <= 64 * 1024
+    assert b"".join(blocks) == contents
+
+    response = client.get(f"/download/{file_id}", headers={"Range": "bytes=100000-399999"})
+    assert response.content == contents[100000:400000]
+
+def test_download_file_multi_range(large_file):
+    """
+    Test a download of several byte ranges.
+    
+    Expected Output:
+        - 206 status code with a multipart/byteranges body holding each range
+    """
+    file_id, contents = large_file
+
+    response = client.get(f"/download/{file_id}", headers={"Range": "bytes=0-3,600000-600003"})
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert int(response.headers["Content-Length"]) == len(response.content)
+    assert f"Content-Range: bytes 0-3/{len(contents)}".encode() in response.content
+    assert f"Content-Range: bytes 600000-600003/{len(contents)}".encode() in response.content
+    assert contents[600000:600004] in response.content
+
+def test_download_file_conditional(large_file):
+    """
+    Test validators and conditional downloads.
+    
+    Expected Output:
+        - ETag, Last-Modified and Accept-Ranges on a full download
+        - 304 status code when If-None-Match matches
+        - The whole file when If-Range does not match
+    """
+    file_id, contents = large_file
+
+    response = client.get(f"/download/{file_id}")
+    assert response.status_code == 200
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert int(response.headers["Content-Length"]) == len(contents)
+    assert "Last-Modified" in response.headers
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/download/{file_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get(f"/download/{file_id}", headers={"Range": "bytes=0-3", "If-Range": '"outdated"'})
+    assert response.status_code == 200
+    assert response.content == contents
 
 def test_summary_upload(sample_text):
     """
@@ -975,10 +1511,108 @@ def test_summary_upload(sample_text):
 
     print("The response is ",response.json())
 
-    assert response.status_code == 201
+    assert response.status_code == 202
     json_response = response.json()
     assert json_response["status"] == "OK"
     assert "file_id" in json_response["result"]
+    assert "job_id" in json_response["result"]
+
+    # The summary is produced by a background job
+    job = wait_for_job(json_response["result"]["job_id"], {"Authorization": f"Bearer {auth_token}"})
+    assert job["status"] == "completed"
+    assert job["stage"] == "done"
+    assert job["result"]["summary_id"] == json_response["result"]["summary_id"]
+    assert set(job["timings"]) >= {"extracting", "summarising", "saving"}
+    summary = summaries_collection.find_one({"_id": job["result"]["summary_id"]})
+    assert summary is not None
+
+    # The extracted text is stored for later regenerations
+    text_file = grid_fs.get(ObjectId(summary["filedata"]["text_file_id"]))
+    assert text_file.read().decode("utf-8") == "Hello World\nThis is a test text file"
+
+def test_summary_upload_too_large(monkeypatch):
+    """
+    Test that uploads over the size limit are rejected and not kept in GridFS.
+    
+    Expected Output:
+        - 413 status code
+        - No file stored under the upload's name
+    """
+    monkeypatch.setattr(service_module, "MAX_UPLOAD_BYTES", 1024)
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    auth_token = response.json()['result']['auth_token']
+    userId = response.json()['result']['user']['id']
+
+    response = client.post(
+        "/summary/upload",
+        data={"userId": userId, "type": "documentation", "uploadType": "upload"},
+        files={"file": ("too_large.txt", b"x" * 4096, "text/plain")},
+        headers={"Authorization": f"Bearer {auth_token}"},
+    )
+    assert response.status_code == 413
+    assert grid_fs.find_one({"filename": "too_large.txt"}) is None
+
+def test_summary_upload_batch(sample_text, monkeypatch):
+    """
+    Test uploading several files in one request.
+    
+    Input:
+        - A small text file and one over the size limit
+    Expected Output:
+        - 202 status code
+        - The small file queued and its job completed
+        - The large file reported as failed without failing the batch
+    """
+    monkeypatch.setattr(service_module, "MAX_UPLOAD_BYTES", 1024)
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    auth_token = response.json()['result']['auth_token']
+    userId = response.json()['result']['user']['id']
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    time.sleep(3)
+    response = client.post(
+        "/summary/upload/batch",
+        data={"userId": userId, "type": "code", "uploadType": "upload"},
+        files=[
+            ("files", ("batch_small.txt", sample_text, "text/plain")),
+            ("files", ("batch_large.txt", b"x" * 4096, "text/plain")),
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 202
+    small, large = response.json()["result"]["results"]
+    assert small["status"] == "queued"
+    assert large["status"] == "failed"
+    assert grid_fs.find_one({"filename": "batch_large.txt"}) is None
+
+    job = wait_for_job(small["job_id"], headers)
+    assert job["status"] == "completed"
+    assert summaries_collection.find_one({"_id": small["summary_id"]}) is not None
+
+def test_get_job_not_found():
+    """
+    Test polling a job that does not exist.
+    
+    Expected Output:
+        - 404 status code
+    """
+    user_data = {
+        "email": "alice.smith@example.com",
+        "password": "password123"
+    }
+    response = client.post("/user/verify", json=user_data)
+    auth_token = response.json()['result']['auth_token']
+
+    response = client.get(f"/jobs/{uuid.uuid4()}", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 404
 
 def test_user_summaries_empty():
     """
@@ -1025,3 +1659,70 @@ def test_user_summaries_empty():
     
     users_collection.delete_one({"email": new_user.email})
 
+
+def test_failed_upload_job_discards_its_files():
+    """
+    Test that a summary upload job that failed for good deletes the uploaded file and its extracted text.
+    
+    Expected Output:
+        - Neither GridFS file left afterwards
+        - Files of a job whose summary was saved are kept
+    """
+    file_id = grid_fs.put(b"uploaded", filename="failed_upload.txt")
+    text_file_id = grid_fs.put(b"uploaded", filename="failed_upload.txt.txt", metadata={"sourceFileId": str(file_id)})
+    job = {"_id": str(uuid.uuid4()), "type": "summary_upload",
+           "payload": {"summary": {"_id": str(uuid.uuid4()), "filedata": {"file_id": str(file_id)}}}}
+    
+    client.portal.call(service_module.discard_summary_upload, job)
+    
+    assert not grid_fs.exists(file_id)
+    assert not grid_fs.exists(text_file_id)
+    
+    kept_file_id = grid_fs.put(b"uploaded", filename="saved_upload.txt")
+    saved = {"_id": str(uuid.uuid4()), "filedata": {"file_id": str(kept_file_id)}}
+    summaries_collection.insert_one(dict(saved))
+    client.portal.call(service_module.discard_summary_upload, {**job, "payload": {"summary": saved}})
+    
+    assert grid_fs.exists(kept_file_id)
+    summaries_collection.delete_one({"_id": saved["_id"]})
+    grid_fs.delete(kept_file_id)
+
+def test_copy_grid_out_writes_off_the_event_loop():
+    """
+    Test that copying a stored file into a local file does not write on the event loop thread.
+    
+    Input:
+        - Download stream of three chunks
+    Expected Output:
+        - Every chunk copied in order, by writes and a flush outside the loop's thread
+    """
+    from services.utils import copy_grid_out
+    
+    class FakeGridOut:
+        def __init__(self, chunks):
+            self.chunks = list(chunks)
+            self.length = sum(len(chunk) for chunk in chunks)
+        
+        async def readchunk(self):
+            return self.chunks.pop(0) if self.chunks else b""
+    
+    class RecordingFile(BytesIO):
+        def __init__(self):
+            super().__init__()
+            self.threads = set()
+        
+        def write(self, data):
+            self.threads.add(threading.get_ident())
+            return super().write(data)
+        
+        def flush(self):
+            self.threads.add(threading.get_ident())
+    
+    async def scenario():
+        target = RecordingFile()
+        await copy_grid_out(FakeGridOut([b"one ", b"two ", b"three"]), target)
+        return target, threading.get_ident()
+    
+    target, loop_thread = asyncio.run(scenario())
+    assert target.getvalue() == b"one two three"
+    assert target.threads and loop_thread not in target.threads
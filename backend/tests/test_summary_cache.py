@@ -0,0 +1,154 @@
+import asyncio
+import datetime
+import json
+import pytest
+from types import SimpleNamespace
+from mongomock_motor import AsyncMongoMockClient
+import services.calls_to_ai as calls_to_ai
+import services.summary_cache as summary_cache_module
+import services.utils as utils_module
+from services.summary_cache import (
+    normalise_text, summary_cache_key, cached_call_to_AI, get_cached_summary, store_cached_summary, cache_stats,
+)
+
+@pytest.fixture(autouse=True)
+def cache_collection(monkeypatch):
+    """
+    Gives each test an empty in-memory cache collection and zeroed counters.
+    """
+    collection = AsyncMongoMockClient()["testdb"]["summary_cache"]
+    monkeypatch.setattr(summary_cache_module, "summary_cache_collection_name", collection)
+    for key in cache_stats:
+        monkeypatch.setitem(cache_stats, key, 0)
+    return collection
+
+@pytest.fixture
+def ai_calls(monkeypatch):
+    """
+    Replaces the model call with a stub recording the inputs it was given.
+    """
+    calls = []
+
+    async def fake_call_to_AI(input_type, initial_data, examples=None):
+        calls.append((input_type, initial_data))
+        return {"Title": "Title", "Summary": f"Summary of {initial_data}"}
+
+    monkeypatch.setattr(summary_cache_module, "call_to_AI", fake_call_to_AI)
+    return calls
+
+def test_key_ignores_whitespace_differences():
+    """
+    Test that copies of the same text differing only in whitespace share a key.
+
+    Expected Output:
+        - Equal normalised text and keys for CRLF line endings and trailing spaces
+    """
+    text = "Line one\nLine two\n"
+    variant = "Line one  \r\nLine two\r\n\r\n"
+    assert normalise_text(text) == normalise_text(variant)
+    assert summary_cache_key("documentation", text) == summary_cache_key("documentation", variant)
+
+def test_key_depends_on_type_and_model(monkeypatch):
+    """
+    Test that the same text gets different keys for another input type or model.
+
+    Expected Output:
+        - Different keys across types, and across models for the same type
+    """
+    text = "A paragraph of documentation."
+    key = summary_cache_key("documentation", text)
+    assert key != summary_cache_key("research", text)
+
+    monkeypatch.setattr(summary_cache_module, "select_model", lambda input_type: "another-model")
+    assert key != summary_cache_key("documentation", text)
+
+def test_cached_call_counts_miss_then_hit(ai_calls):
+    """
+    Test that a repeated input is answered from the cache.
+
+    Expected Output:
+        - One model call for two requests
+        - One miss, then one hit
+    """
+    first = asyncio.run(cached_call_to_AI("documentation", "Cache me"))
+    assert cache_stats == {"hits": 0, "misses": 1, "evictions": 0}
+    second = asyncio.run(cached_call_to_AI("documentation", "Cache me  \n"))
+    assert cache_stats == {"hits": 1, "misses": 1, "evictions": 0}
+    assert first == second
+    assert len(ai_calls) == 1
+
+def test_expired_entry_not_returned(cache_collection):
+    """
+    Test that an entry past its expiry time counts as a miss.
+
+    Expected Output:
+        - None for the expired entry, and one miss recorded
+    """
+    async def scenario():
+        await store_cached_summary("expired", {"Title": "T", "Summary": "S"})
+        past = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+        await cache_collection.update_one({"_id": "expired"}, {"$set": {"expiresAt": past}})
+        return await get_cached_summary("expired")
+
+    assert asyncio.run(scenario()) is None
+    assert cache_stats["misses"] == 1
+
+def test_store_evicts_least_recently_used(cache_collection, monkeypatch):
+    """
+    Test that storing beyond the size limit evicts the least recently used entries.
+
+    Expected Output:
+        - Size kept at the limit
+        - The entry read most recently survives; the oldest unread one is evicted
+    """
+    monkeypatch.setattr(summary_cache_module, "SUMMARY_CACHE_MAX_ENTRIES", 2)
+
+    async def scenario():
+        await store_cached_summary("first", {"Title": "1", "Summary": "1"})
+        await store_cached_summary("second", {"Title": "2", "Summary": "2"})
+        # Age both entries, "first" the most, so only the read below can save it
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for key, age in (("first", 2), ("second", 1)):
+            await cache_collection.update_one({"_id": key}, {"$set": {"lastAccessedAt": now - datetime.timedelta(hours=age)}})
+        # Reading "first" makes "second" the least recently used entry
+        await get_cached_summary("first")
+        await store_cached_summary("third", {"Title": "3", "Summary": "3"})
+        return sorted([entry["_id"] async for entry in cache_collection.find({}, {"_id": 1})])
+
+    assert asyncio.run(scenario()) == ["first", "third"]
+    assert cache_stats["evictions"] == 1
+
+def test_code_language_detected_once_per_request(monkeypatch):
+    """
+    Test that the key and the model call share one pick of the examples.
+
+    Input:
+        - Code input missing the cache, then hitting it
+    Expected Output:
+        - One language detection per request
+        - The model sent the examples of the detected language
+    """
+    detections = []
+    sent_messages = []
+
+    def fake_detect_language(text):
+        detections.append(text)
+        return "python"
+
+    async def fake_complete_chat(client, model, prompts, input_type, example_code_summaries, initial_data):
+        sent_messages.append(example_code_summaries)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(
+            content=json.dumps({"Title": "Title", "Summary": "Summary"})
+        ))])
+
+    monkeypatch.setattr(utils_module, "detect_language", fake_detect_language)
+    monkeypatch.setattr(calls_to_ai, "complete_chat", fake_complete_chat)
+    monkeypatch.setattr(calls_to_ai, "get_mistral_client", lambda: None)
+    code = "def add(a, b):\n    return a + b\n"
+
+    asyncio.run(cached_call_to_AI("code", code))
+    assert len(detections) == 1
+    assert sent_messages == [utils_module.get_all_examples_for_language("python")]
+    asyncio.run(cached_call_to_AI("code", code))
+    assert len(detections) == 2
+    assert cache_stats["hits"] == 1
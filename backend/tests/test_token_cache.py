@@ -0,0 +1,114 @@
+import datetime
+import time
+import jwt
+import pytest
+import services.token_cache as token_cache_module
+from services.token_cache import TokenCache, decode_token, token_cache_stats
+
+SECRET = "test-secret"
+
+def make_token(user_id="user-1", expires_in=datetime.timedelta(days=30)):
+    """
+    Builds an HS256 token like create_access_token does.
+
+    Returns:
+        str: Encoded JWT
+    """
+    expire = datetime.datetime.now(datetime.timezone.utc) + expires_in
+    return jwt.encode({"userId": user_id, "exp": expire}, SECRET, algorithm="HS256")
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    """
+    Gives each test an empty cache and zeroed counters.
+    """
+    monkeypatch.setattr(token_cache_module, "token_cache", TokenCache(max_entries=3))
+    for key in token_cache_stats:
+        monkeypatch.setitem(token_cache_stats, key, 0)
+
+def test_decode_token_cached():
+    """
+    Test that a token is decoded once and then served from the cache.
+
+    Expected Output:
+        - Same claims both times
+        - One miss, then one hit
+    """
+    token = make_token()
+    first = decode_token(token, SECRET)
+    second = decode_token(token, SECRET)
+    assert first == second
+    assert first["userId"] == "user-1"
+    assert token_cache_stats["misses"] == 1
+    assert token_cache_stats["hits"] == 1
+
+def test_decode_token_invalid_not_cached():
+    """
+    Test that tokens failing verification are rejected every time.
+
+    Expected Output:
+        - jwt.InvalidTokenError on each attempt
+        - Nothing cached
+    """
+    token = jwt.encode({"userId": "user-1", "exp": time.time() + 60}, "wrong-secret", algorithm="HS256")
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidTokenError):
+            decode_token(token, SECRET)
+    assert len(token_cache_module.token_cache) == 0
+
+def test_decode_token_expires_with_token():
+    """
+    Test that a cached token stops being accepted once its exp has passed.
+
+    Expected Output:
+        - jwt.ExpiredSignatureError after expiry, despite the earlier cache entry
+    """
+    token = make_token(expires_in=datetime.timedelta(seconds=1))
+    decode_token(token, SECRET)
+    time.sleep(1.1)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_token(token, SECRET)
+
+def test_token_cache_lru_eviction():
+    """
+    Test that the least recently used token is evicted when the cache is full.
+
+    Expected Output:
+        - Cache size capped at max_entries
+        - The recently used token still cached, the stale one evicted
+    """
+    tokens = [make_token(f"user-{index}") for index in range(4)]
+    for token in tokens[:3]:
+        decode_token(token, SECRET)
+    decode_token(tokens[0], SECRET)  # Refresh the first token
+    decode_token(tokens[3], SECRET)
+
+    assert len(token_cache_module.token_cache) == 3
+    assert token_cache_stats["evictions"] == 1
+    hits = token_cache_stats["hits"]
+    decode_token(tokens[0], SECRET)
+    assert token_cache_stats["hits"] == hits + 1
+    decode_token(tokens[1], SECRET)
+    assert token_cache_stats["hits"] == hits + 1
+
+def test_decode_token_cache_speedup():
+    """
+    Benchmark cached verification against a full jwt.decode.
+
+    Expected Output:
+        - Cached lookups faster than decoding
+    """
+    token = make_token()
+    rounds = 2000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        jwt.decode(token, SECRET, algorithms=["HS256"])
+    uncached = time.perf_counter() - started
+
+    decode_token(token, SECRET)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        decode_token(token, SECRET)
+    cached = time.perf_counter() - started
+
+    assert cached < uncached
@@ -95,10 +95,62 @@ export const userSummaryUpload = async (userData) => {
       { headers } // Include headers in the request
     );
 
-    return response.data;
+    // The summary is generated by a background job; wait for it to finish
+    const job = await waitForJob(response.data.result.job_id);
+    if (job.status === 'failed') {
+      throw { detail: job.error || 'Error creating user summary' };
+    }
+
+    return { status: response.data.status, result: { message: 'Summary created successfully', ...job.result } };
   } catch (error) {
-    console.error('Error creating user summary:', error.response?.data || error.message);
-    throw error.response?.data || 'Error creating user summary';
+    console.error('Error creating user summary:', error.response?.data || error.message || error.detail);
+    throw error.response?.data || (error.detail ? error : 'Error creating user summary');
+  }
+};
+
+// Function to fetch the status of a background job
+// Input: jobId (string) - ID of the job returned by an upload
+// Output: Promise resolving to the job's status, stage, timings and result
+export const getJobStatus = async (jobId) => {
+  try {
+    const token = localStorage.getItem('auth_token');
+
+    const headers = {
+      Authorization: `Bearer ${token}`,
+    };
+
+    const response = await axios.get(`${API_BASE_URL}/jobs/${jobId}`, { headers });
+    return response.data.result;
+  } catch (error) {
+    console.error('Error fetching job status:', error.response?.data || error.message);
+    throw error.response?.data || 'Error fetching job status';
+  }
+};
+
+// Polling of background jobs: the delay starts at JOB_POLL_INITIAL_MS and grows by
+// JOB_POLL_BACKOFF up to JOB_POLL_MAX_INTERVAL_MS; waiting stops after JOB_POLL_TIMEOUT_MS
+const JOB_POLL_INITIAL_MS = 1000;
+const JOB_POLL_MAX_INTERVAL_MS = 10000;
+const JOB_POLL_BACKOFF = 1.5;
+const JOB_POLL_TIMEOUT_MS = 10 * 60 * 1000;
+
+// Polls a background job until it completes or fails, backing off between polls
+// Input: jobId (string), timeoutMs (number) - how long to wait for the job to finish
+// Output: Promise resolving to the finished job, rejecting with { detail } if it does not finish in time
+const waitForJob = async (jobId, timeoutMs = JOB_POLL_TIMEOUT_MS) => {
+  const deadline = Date.now() + timeoutMs;
+  let intervalMs = JOB_POLL_INITIAL_MS;
+  for (;;) {
+    const job = await getJobStatus(jobId);
+    if (job.status === 'completed' || job.status === 'failed') {
+      return job;
+    }
+    const remainingMs = deadline - Date.now();
+    if (remainingMs <= 0) {
+      throw { detail: `The summary is still being generated after ${Math.round(timeoutMs / 1000)} seconds; check your summaries again later` };
+    }
+    await new Promise((resolve) => setTimeout(resolve, Math.min(intervalMs, remainingMs)));
+    intervalMs = Math.min(intervalMs * JOB_POLL_BACKOFF, JOB_POLL_MAX_INTERVAL_MS);
   }
 };
 
@@ -177,6 +229,33 @@ export const shareSummary = async (summaryId, recipient) => {
   }
 };
 
+// Function to share a summary with several users in one request
+// Input: summaryId (string), recipients (array of strings) - ID of the summary and recipients' emails
+// Output: Promise resolving to the per-recipient outcomes ('shared', 'already_shared', 'not_found' or 'self')
+export const shareSummaryBulk = async (summaryId, recipients) => {
+  try {
+    const token = localStorage.getItem('auth_token'); // Get auth token
+    const response = await axios.post(
+      `${API_BASE_URL}/summary/share/bulk`,
+      {
+        summary_id: summaryId,
+        recipients: recipients,
+      },
+      {
+        headers: {
+          Authorization: `Bearer ${token}`, // Include authorization token
+          'Content-Type': 'application/json',
+        },
+      }
+    );
+
+    return response.data; // Return the response data
+  } catch (error) {
+    console.error('Error sharing summary:', error.response?.data || error.message);
+    throw error.response?.data || 'Error sharing summary';
+  }
+};
+
 // Function to get shared summaries for a user
 // Input: userId (string) - ID of the user whose shared summaries are to be fetched
 // Output: Promise resolving to the user's shared summaries
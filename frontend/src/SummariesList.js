@@ -21,7 +21,7 @@ import {
 } from '@mui/material';
 import { styled } from '@mui/material/styles';
 import { useAuth } from './App';
-import { getUserSummaries, deleteUserSummary,shareSummary,getUserSharedSummaries, getUserSummary} from './RequestService'; // Import the delete function
+import { getUserSummaries, deleteUserSummary,shareSummary,shareSummaryBulk,getUserSharedSummaries, getUserSummary} from './RequestService'; // Import the delete function
 import {
   Search, 
   Add,
@@ -158,20 +158,41 @@ const SummariesList = ({ selectedSummary, setSelectedSummary, onNewSummaryClick,
   };
 
   /**
-   * Handles the actual sharing of a summary with a recipient
+   * Handles the actual sharing of a summary with one recipient, or with several
+   * comma-separated recipients in a single bulk request
    */
   const handleSendShare = async () => {
-    if (!recipient) {
+    const recipients = recipient.split(/[,;\s]+/).filter(Boolean);
+    if (recipients.length === 0) {
       alert('Please enter a recipient email or username.');
       return;
     }
 
     try {
       setSharing(true);
-      await shareSummary(sharingSummary.id, recipient); // Call the share API
-      alert(`Summary shared successfully with ${recipient}`);
+      if (recipients.length === 1) {
+        await shareSummary(sharingSummary.id, recipients[0]); // Call the share API
+        alert(`Summary shared successfully with ${recipients[0]}`);
+      } else {
+        const response = await shareSummaryBulk(sharingSummary.id, recipients); // One request for all recipients
+        const failed = response.result.filter((outcome) => outcome.status === 'not_found' || outcome.status === 'self');
+        if (failed.length > 0) {
+          // Keep the dialog open with only the recipients that could not be shared with
+          setRecipient(failed.map((outcome) => outcome.recipient).join(', '));
+          const shared = response.result.length - failed.length;
+          setErrorMessage([
+            ...(shared > 0 ? [`Shared with ${shared} of ${recipients.length} recipients`] : []),
+            ...failed.map((outcome) => (
+              outcome.status === 'self' ? `You cannot share with yourself (${outcome.recipient})` : `No user found for ${outcome.recipient}`
+            )),
+          ].join('. '));
+          return;
+        }
+        alert(`Summary shared successfully with ${recipients.join(', ')}`);
+      }
       setSharingSummary(null);
       setRecipient('');
+      setErrorMessage('');
     } catch (err) {
       console.error('Error sharing summary:', err);
       const errorMessage = err.detail;
@@ -518,6 +539,7 @@ const SummariesList = ({ selectedSummary, setSelectedSummary, onNewSummaryClick,
             <TextField
               fullWidth
               label="Recipient Email or Username"
+              helperText="Separate several recipients with commas"
               variant="outlined"
               value={recipient}
               onChange={(e) => setRecipient(e.target.value)}
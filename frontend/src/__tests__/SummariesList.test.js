@@ -1,8 +1,8 @@
 import React from 'react';
-import { render, screen, fireEvent, waitFor, getByLabelText } from '@testing-library/react';
+import { render, screen, fireEvent, waitFor, getByLabelText, within } from '@testing-library/react';
 import '@testing-library/jest-dom';
 import SummariesList from '../SummariesList';
-import { getUserSummaries, deleteUserSummary, shareSummary, getUserSummary, getUserSharedSummaries } from '../RequestService';
+import { getUserSummaries, deleteUserSummary, shareSummary, shareSummaryBulk, getUserSummary, getUserSharedSummaries } from '../RequestService';
 import { AuthProvider, useAuth } from '../App';
 import { act } from 'react-dom/test-utils';
 
@@ -10,6 +10,7 @@ jest.mock('../RequestService', () => ({
     getUserSummaries: jest.fn(),
     deleteUserSummary: jest.fn(),
     shareSummary: jest.fn(),
+    shareSummaryBulk: jest.fn(),
     getUserSummary: jest.fn(),
     getUserSharedSummaries: jest.fn(),
 }));
@@ -367,6 +368,41 @@ describe('SummariesList Component', () => {
         expect(screen.queryByLabelText(/Recipient Email or Username/i)).not.toBeInTheDocument();
     });
 
+    test('shares with several comma-separated recipients in one bulk request', async () => {
+        getUserSummaries.mockResolvedValue({
+            status: 'OK',
+            result: mockSummaries,
+        });
+        shareSummaryBulk.mockResolvedValue({
+            status: 'OK',
+            result: [
+                { recipient: 'a@example.com', status: 'shared' },
+                { recipient: 'missing@example.com', status: 'not_found' },
+            ],
+        });
+
+        render(
+            <AuthProvider>
+                <SummariesList />
+            </AuthProvider>
+        );
+
+        await screen.findByText('Summary 1');
+        fireEvent.click(screen.getAllByRole('button', { name: /^Share$/ })[0]);
+
+        const dialog = await screen.findByRole('dialog');
+        fireEvent.change(within(dialog).getByRole('textbox'), { target: { value: 'a@example.com, missing@example.com' } });
+        fireEvent.click(within(dialog).getByRole('button', { name: /^Share$/ }));
+
+        await waitFor(() => {
+            expect(shareSummaryBulk).toHaveBeenCalledWith(mockSummaries[0].id, ['a@example.com', 'missing@example.com']);
+        });
+        expect(shareSummary).not.toHaveBeenCalled();
+        // The dialog stays open with only the recipient that could not be shared with
+        expect(await within(dialog).findByText(/No user found for missing@example.com/)).toBeInTheDocument();
+        expect(within(dialog).getByRole('textbox')).toHaveValue('missing@example.com');
+    });
+
     test('prevents share dialog from opening when clicking view with stopPropagation', async () => {
         getUserSummaries.mockResolvedValue({
             status: 'OK',